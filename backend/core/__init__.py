@@ -1,6 +1,12 @@
 """
 Core module - Data handling and storage
 """
-from .async_io_handler import AsyncIOHandler, get_async_handler, async_cached, async_with_retry
+from .async_io_handler import (
+    AsyncIOHandler,
+    TaskResult,
+    get_async_handler,
+    async_cached,
+    async_with_retry,
+)
 
-__all__ = ["AsyncIOHandler", "get_async_handler", "async_cached", "async_with_retry"]
+__all__ = ["AsyncIOHandler", "TaskResult", "get_async_handler", "async_cached", "async_with_retry"]
@@ -5,83 +5,275 @@ Implements connection pooling, caching, and resource management.
 
 import asyncio
 import functools
+import os
 import time
-from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Generic
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    TypeVar,
+    Generic,
+    Union,
+)
 from contextlib import asynccontextmanager
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
+import threading
+
+from .metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
 
+class PoolRejectedError(asyncio.TimeoutError):
+    """Raised when the pool sheds load instead of queueing another waiter."""
+
+
+class CountingThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that counts its own work items, so queue depth and busy
+    workers are observable without reading the executor's private attributes.
+    """
+
+    def __init__(self, max_workers: int, **kwargs: Any):
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.max_workers = max_workers
+        self._counter_lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future:
+        def counted() -> T:
+            with self._counter_lock:
+                self._started += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counter_lock:
+                    self._finished += 1
+
+        with self._counter_lock:
+            self._submitted += 1
+        try:
+            future = super().submit(counted)
+        except BaseException:
+            with self._counter_lock:
+                self._submitted -= 1
+            raise
+        # Items cancelled before a worker picked them up never start
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            with self._counter_lock:
+                self._submitted -= 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return {
+                'queue_depth': self._submitted - self._started,
+                'active': self._started - self._finished,
+                'completed': self._finished,
+                'max_workers': self.max_workers
+            }
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit driven by observed operation latency.
+
+    Latency samples are averaged over a window. If the average exceeds the
+    threshold (target_latency, or tolerance x the best average seen so far
+    when no target is given) the limit is multiplied by backoff; if latency is
+    healthy and the limit was actually reached during the window, it grows by
+    one. The limit always stays within [min_limit, max_limit].
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 50,
+        target_latency: Optional[float] = None,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        window: int = 20
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(max_limit, initial))
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.baseline: Optional[float] = None
+        self.last_average: Optional[float] = None
+        self._samples: list[float] = []
+        self._saturated = False
+
+    @property
+    def threshold(self) -> Optional[float]:
+        if self.target_latency is not None:
+            return self.target_latency
+        if self.baseline is None:
+            return None
+        return self.baseline * self.tolerance
+
+    def note_in_flight(self, in_flight: int) -> None:
+        if in_flight >= self.limit:
+            self._saturated = True
+
+    def record(self, latency: float) -> None:
+        """Add a latency sample; adjusts the limit once per full window."""
+        self._samples.append(latency)
+        if len(self._samples) < self.window:
+            return
+        average = sum(self._samples) / len(self._samples)
+        self._samples.clear()
+        self.last_average = average
+
+        threshold = self.threshold
+        if threshold is not None and average > threshold:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        elif self._saturated:
+            self.limit = min(self.max_limit, self.limit + 1)
+        self._saturated = False
+
+        # Track the best window average; drift up slowly so it can recover
+        if self.baseline is None or average < self.baseline:
+            self.baseline = average
+        else:
+            self.baseline *= 1.01
+
+
 class AsyncConnectionPool:
     """
     Manages a pool of async connections with intelligent reuse and lifecycle management.
+
+    Concurrency is bounded by an adaptive limit between min_connections and
+    max_connections that narrows when operation latency rises. When more than
+    max_queue_factor x limit callers are already waiting, new callers are
+    rejected immediately (PoolRejectedError) instead of queueing for timeout.
     """
     
-    def __init__(self, max_connections: int = 50, timeout: float = 30.0):
+    def __init__(
+        self,
+        max_connections: int = 50,
+        timeout: float = 30.0,
+        min_connections: int = 2,
+        target_latency: Optional[float] = None,
+        max_queue_factor: float = 2.0,
+        adaptive: bool = True
+    ):
         self.max_connections = max_connections
         self.timeout = timeout
-        self.semaphore = asyncio.Semaphore(max_connections)
+        self.adaptive = adaptive
+        self.max_queue_factor = max_queue_factor
+        self.limiter = AdaptiveLimit(
+            initial=max_connections,
+            min_limit=min(min_connections, max_connections),
+            max_limit=max_connections,
+            target_latency=target_latency
+        )
         self._active_connections: int = 0
-        self._lock = asyncio.Lock()
+        self._waiting: int = 0
+        self._cond = asyncio.Condition()
         self._stats = {
             'acquired': 0,
             'released': 0,
             'timeouts': 0,
+            'rejections': 0,
             'errors': 0
         }
+
+    @property
+    def current_limit(self) -> int:
+        return self.limiter.limit if self.adaptive else self.max_connections
     
     async def acquire(self) -> None:
         """Acquire a connection slot from the pool."""
-        try:
-            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.timeout)
-            async with self._lock:
-                self._active_connections += 1
-                self._stats['acquired'] += 1
-        except asyncio.TimeoutError:
-            async with self._lock:
+        async with self._cond:
+            if self._waiting >= max(1, int(self.current_limit * self.max_queue_factor)):
+                self._stats['rejections'] += 1
+                raise PoolRejectedError(
+                    f"Pool saturated: {self._waiting} waiting, limit {self.current_limit}"
+                )
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(
+                        lambda: self._active_connections < self.current_limit
+                    ),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
                 self._stats['timeouts'] += 1
-            raise
+                self._stats['rejections'] += 1
+                raise
+            finally:
+                self._waiting -= 1
+            self._active_connections += 1
+            self._stats['acquired'] += 1
+            self.limiter.note_in_flight(self._active_connections)
     
-    async def release(self) -> None:
-        """Release a connection slot back to the pool."""
+    async def release(self, latency: Optional[float] = None) -> None:
+        """Release a connection slot back to the pool, recording its latency."""
         try:
-            async with self._lock:
+            async with self._cond:
                 self._active_connections -= 1
                 self._stats['released'] += 1
-            self.semaphore.release()
+                if latency is not None and self.adaptive:
+                    self.limiter.record(latency)
+                free = self.current_limit - self._active_connections
+                if free > 0:
+                    self._cond.notify(free)
         except Exception as e:
             logger.error(f"Error releasing connection: {e}")
-            async with self._lock:
-                self._stats['errors'] += 1
+            self._stats['errors'] += 1
     
     @asynccontextmanager
     async def connection(self):
         """Context manager for acquiring and releasing connections."""
         await self.acquire()
+        started = time.perf_counter()
         try:
             yield
         finally:
-            await self.release()
+            await self.release(time.perf_counter() - started)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get pool statistics."""
+        threshold = self.limiter.threshold
+        average = self.limiter.last_average
         return {
             **self._stats,
             'active_connections': self._active_connections,
-            'max_connections': self.max_connections
+            'waiting': self._waiting,
+            'max_connections': self.max_connections,
+            'current_limit': self.current_limit,
+            'min_limit': self.limiter.min_limit,
+            'adaptive': self.adaptive,
+            'latency_threshold_ms': None if threshold is None else round(threshold * 1000, 3),
+            'observed_latency_ms': None if average is None else round(average * 1000, 3)
         }
     
     async def reset_stats(self) -> None:
         """Reset statistics."""
-        async with self._lock:
+        async with self._cond:
             self._stats = {
                 'acquired': 0,
                 'released': 0,
                 'timeouts': 0,
+                'rejections': 0,
                 'errors': 0
             }
 
@@ -140,6 +332,54 @@ class AsyncCache(Generic[T]):
             self._stats = {'hits': 0, 'misses': 0, 'expirations': 0}
 
 
+class TaskResult(Generic[T]):
+    """
+    Structured outcome of a single batched task.
+
+    status is one of 'ok', 'error', 'timeout' (per-task or batch deadline hit)
+    or 'cancelled' (never started because the batch was stopped).
+    """
+    __slots__ = ('index', 'key', 'status', 'value', 'error', 'duration')
+
+    def __init__(
+        self,
+        index: int,
+        key: Any,
+        status: str,
+        value: Optional[T] = None,
+        error: Optional[str] = None,
+        duration: float = 0.0
+    ):
+        self.index = index
+        self.key = key
+        self.status = status
+        self.value = value
+        self.error = error
+        self.duration = duration
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'key': self.key,
+            'status': self.status,
+            'value': self.value,
+            'error': self.error,
+            'duration_ms': round(self.duration * 1000, 3)
+        }
+
+    def __repr__(self) -> str:
+        return f"TaskResult(key={self.key!r}, status={self.status!r})"
+
+
+TaskSpec = Union[
+    Iterable[Callable[[], Awaitable[T]]],
+    Mapping[Any, Callable[[], Awaitable[T]]]
+]
+
+
 class AsyncTaskBatcher:
     """
     Batch multiple async tasks and execute them with controlled concurrency.
@@ -175,6 +415,133 @@ class AsyncTaskBatcher:
         
         return results
 
+    async def _run_one(
+        self,
+        index: int,
+        key: Any,
+        task_func: Callable[[], Awaitable[T]],
+        task_timeout: Optional[float],
+        started_at: Optional[Dict[int, float]] = None
+    ) -> TaskResult[T]:
+        """Run one task under the shared semaphore and capture its outcome.
+
+        The clock starts once the semaphore is acquired; the start time is
+        recorded in started_at so the caller can tell queued from running tasks.
+        """
+        async with self.semaphore:
+            started = time.perf_counter()
+            if started_at is not None:
+                started_at[index] = started
+            try:
+                if task_timeout is not None:
+                    value = await asyncio.wait_for(task_func(), timeout=task_timeout)
+                else:
+                    value = await task_func()
+                return TaskResult(
+                    index, key, 'ok', value=value,
+                    duration=time.perf_counter() - started
+                )
+            except asyncio.TimeoutError:
+                return TaskResult(
+                    index, key, 'timeout',
+                    error=f"Task exceeded {task_timeout}s",
+                    duration=time.perf_counter() - started
+                )
+            except Exception as e:
+                logger.error(f"Task {key!r} failed: {e}")
+                return TaskResult(
+                    index, key, 'error',
+                    error=f"{type(e).__name__}: {e}",
+                    duration=time.perf_counter() - started
+                )
+
+    async def stream(
+        self,
+        tasks: TaskSpec,
+        task_timeout: Optional[float] = None,
+        batch_timeout: Optional[float] = None,
+        max_in_flight: Optional[int] = None
+    ) -> AsyncIterator[TaskResult[T]]:
+        """
+        Run tasks and yield a TaskResult for each one as soon as it finishes.
+
+        At most max_in_flight tasks (default: max_concurrent) are scheduled at a
+        time, so results are never buffered beyond that window. task_timeout
+        bounds each task, batch_timeout bounds the whole batch; when the batch
+        deadline hits, running tasks are cancelled and reported as 'timeout'
+        and tasks never started (including those still waiting for the
+        semaphore) are reported as 'cancelled'. Closing the
+        iterator early (break / aclose) cancels everything still running.
+        """
+        if isinstance(tasks, Mapping):
+            specs = iter(enumerate(tasks.items()))
+        else:
+            specs = ((i, (i, func)) for i, func in enumerate(tasks))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + batch_timeout if batch_timeout is not None else None
+        limit = max(1, max_in_flight or self.max_concurrent)
+        pending: Dict[asyncio.Task, tuple] = {}
+        started_at: Dict[int, float] = {}
+
+        def launch() -> None:
+            while len(pending) < limit:
+                try:
+                    index, (key, func) = next(specs)
+                except StopIteration:
+                    return
+                task = asyncio.ensure_future(
+                    self._run_one(index, key, func, task_timeout, started_at)
+                )
+                pending[task] = (index, key)
+
+        try:
+            launch()
+            while pending:
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    index, _ = pending.pop(task)
+                    started_at.pop(index, None)
+                    yield task.result()
+                launch()
+
+            if pending:
+                # Batch deadline reached: stop running tasks, report the rest
+                expired = list(pending.items())
+                pending.clear()
+                for task, _ in expired:
+                    task.cancel()
+                await asyncio.gather(*(t for t, _ in expired), return_exceptions=True)
+                for _, (index, key) in expired:
+                    started = started_at.get(index)
+                    if started is None:
+                        # Still queued on the semaphore: never ran
+                        yield TaskResult(
+                            index, key, 'cancelled', error="Batch deadline reached"
+                        )
+                        continue
+                    yield TaskResult(
+                        index, key, 'timeout',
+                        error=f"Batch exceeded {batch_timeout}s",
+                        duration=time.perf_counter() - started
+                    )
+                for index, (key, _) in specs:
+                    yield TaskResult(
+                        index, key, 'cancelled', error="Batch deadline reached"
+                    )
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
 
 class AsyncRetry:
     """
@@ -229,13 +596,22 @@ class AsyncIOHandler:
         self,
         max_connections: int = 50,
         cache_ttl: float = 300.0,
-        max_concurrent_tasks: int = 10
+        max_concurrent_tasks: int = 10,
+        pool_target_latency: Optional[float] = None,
+        adaptive_pool: bool = True
     ):
-        self.connection_pool = AsyncConnectionPool(max_connections=max_connections)
+        self.connection_pool = AsyncConnectionPool(
+            max_connections=max_connections,
+            target_latency=pool_target_latency,
+            adaptive=adaptive_pool
+        )
         self.cache = AsyncCache(ttl=cache_ttl)
         self.task_batcher = AsyncTaskBatcher(max_concurrent=max_concurrent_tasks)
         self.retry = AsyncRetry()
-        self.thread_pool = ThreadPoolExecutor(max_workers=10)
+        self.thread_pool = CountingThreadPoolExecutor(
+            max_workers=int(os.getenv("HANDLER_THREADS", "10"))
+        )
+        self._in_flight: Dict[str, asyncio.Future] = {}
     
     async def execute_io_operation(
         self,
@@ -247,14 +623,54 @@ class AsyncIOHandler:
     ) -> T:
         """
         Execute an I/O operation with optional caching and retry.
+        Latency is recorded per operation_name, labelled by cache outcome.
+
+        Cached operations are single-flight: concurrent callers with the same
+        cache_key share one execution. The shared execution is shielded, so a
+        caller timing out does not cancel it for the others (or for the cache).
         """
+        started = time.perf_counter()
+
         # Check cache if enabled
         if use_cache and cache_key:
             cached_value = await self.cache.get(cache_key)
             if cached_value is not None:
                 logger.info(f"Cache hit for {operation_name}")
+                self._observe(operation_name, started, 'hit')
                 return cached_value
-        
+
+            shared = self._in_flight.get(cache_key)
+            if shared is not None:
+                result = await asyncio.shield(shared)
+                self._observe(operation_name, started, 'shared')
+                return result
+
+            shared = asyncio.ensure_future(self._execute(
+                operation_name, operation_func, use_cache, cache_key, retry, started
+            ))
+            self._in_flight[cache_key] = shared
+            shared.add_done_callback(functools.partial(self._finish_in_flight, cache_key))
+            return await asyncio.shield(shared)
+
+        return await self._execute(
+            operation_name, operation_func, use_cache, cache_key, retry, started
+        )
+
+    def _finish_in_flight(self, cache_key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(cache_key) is future:
+            del self._in_flight[cache_key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved when every caller gave up
+
+    async def _execute(
+        self,
+        operation_name: str,
+        operation_func: Callable[[], Awaitable[T]],
+        use_cache: bool,
+        cache_key: Optional[str],
+        retry: bool,
+        started: float
+    ) -> T:
         # Execute operation with connection pooling
         async with self.connection_pool.connection():
             try:
@@ -268,11 +684,26 @@ class AsyncIOHandler:
                     await self.cache.set(cache_key, result)
                 
                 logger.info(f"Successfully executed {operation_name}")
+                self._observe(operation_name, started, 'miss' if use_cache else 'none')
                 return result
             
             except Exception as e:
                 logger.error(f"Error executing {operation_name}: {e}")
+                self._observe(operation_name, started, 'error')
                 raise
+
+    def _observe(self, operation_name: str, started: float, cache: str) -> None:
+        get_metrics().observe(
+            "operation_duration_seconds",
+            time.perf_counter() - started,
+            "Latency of execute_io_operation calls",
+            operation=operation_name,
+            cache=cache
+        )
+
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Queue depth and worker usage of the handler's thread pool."""
+        return self.thread_pool.get_stats()
     
     async def execute_batch_operations(
         self,
@@ -286,13 +717,34 @@ class AsyncIOHandler:
             key: result 
             for (key, _), result in zip(operations.items(), results_list)
         }
+
+    async def stream_batch_operations(
+        self,
+        operations: Dict[str, Callable[[], Awaitable[T]]],
+        task_timeout: Optional[float] = None,
+        batch_timeout: Optional[float] = None,
+        max_in_flight: Optional[int] = None
+    ) -> AsyncIterator[TaskResult[T]]:
+        """Execute named operations, yielding keyed results as they complete."""
+        async for result in self.task_batcher.stream(
+            operations,
+            task_timeout=task_timeout,
+            batch_timeout=batch_timeout,
+            max_in_flight=max_in_flight
+        ):
+            yield result
     
     def get_health_stats(self) -> Dict[str, Any]:
         """Get overall health statistics."""
         return {
             'connection_pool': self.connection_pool.get_stats(),
             'cache': self.cache.get_stats(),
-            'max_concurrent_tasks': self.task_batcher.max_concurrent
+            'executor': self.get_executor_stats(),
+            'max_concurrent_tasks': self.task_batcher.max_concurrent,
+            'in_flight_operations': len(self._in_flight),
+            'operation_latency': get_metrics().histogram_summary(
+                "operation_duration_seconds"
+            )
         }
     
     async def shutdown(self) -> None:
@@ -310,14 +762,38 @@ def get_async_handler() -> AsyncIOHandler:
     """Get or create global async handler instance."""
     global _handler
     if _handler is None:
+        target_ms = os.getenv("POOL_TARGET_LATENCY_MS")
         _handler = AsyncIOHandler(
             max_connections=50,
             cache_ttl=300.0,
-            max_concurrent_tasks=10
+            max_concurrent_tasks=10,
+            pool_target_latency=float(target_ms) / 1000 if target_ms else None,
+            adaptive_pool=os.getenv("POOL_ADAPTIVE", "1") == "1"
         )
     return _handler
 
 
+# Global default executor
+_default_executor: Optional[CountingThreadPoolExecutor] = None
+
+
+def get_default_executor() -> CountingThreadPoolExecutor:
+    """
+    Get or create the counting pool installed as the loop's default executor.
+    Sized like asyncio's own default (DEFAULT_EXECUTOR_THREADS overrides), so
+    run_in_executor(None, ...) keeps its capacity and stays observable without
+    competing for the handler pool's workers.
+    """
+    global _default_executor
+    if _default_executor is None:
+        default_threads = str(min(32, (os.cpu_count() or 1) + 4))
+        _default_executor = CountingThreadPoolExecutor(
+            max_workers=int(os.getenv("DEFAULT_EXECUTOR_THREADS", default_threads)),
+            thread_name_prefix="default-executor"
+        )
+    return _default_executor
+
+
 def async_cached(ttl: float = 300.0, cache_key: Optional[str] = None):
     """
     Decorator for caching async function results.
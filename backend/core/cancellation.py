@@ -0,0 +1,107 @@
+"""
+Cooperative cancellation for long CSV scans and analytics running in executor threads.
+A CancellationToken is set from the event loop (e.g. when the HTTP client
+disconnects) and polled by scan loops every CHECK_INTERVAL_ROWS rows. A
+Deadline is a time budget that services poll to return partial results.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rows between token checks inside scan loops
+CHECK_INTERVAL_ROWS = 2000
+
+
+class ScanCancelledError(Exception):
+    """Raised inside a scan whose token was cancelled; partial results are discarded."""
+
+
+class CancellationToken:
+    """Thread-safe one-shot cancellation flag."""
+    __slots__ = ('_event', 'reason')
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise ScanCancelledError(self.reason or "cancelled")
+
+    @property
+    def expired(self) -> bool:
+        """Deadline interface: services polling a deadline stop on cancellation too."""
+        return self._event.is_set()
+
+
+class Deadline:
+    """
+    Monotonic time budget passed into service functions.
+    Services poll `expired` at loop boundaries and return what they have.
+    """
+    __slots__ = ('seconds', 'started', 'expires_at')
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds if seconds is not None else None
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed_ms(self) -> float:
+        return round((time.monotonic() - self.started) * 1000, 1)
+
+    def raise_if_cancelled(self) -> None:
+        """Token interface, so scans can be bounded by a deadline instead of a token."""
+        if self.expired:
+            raise ScanCancelledError("deadline exceeded")
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(
+    request, poll_interval: float = 0.25
+) -> AsyncIterator[CancellationToken]:
+    """
+    Yield a token that is cancelled when the client of `request` disconnects
+    or when the awaiting coroutine itself is cancelled.
+    """
+    token = CancellationToken()
+
+    async def watch() -> None:
+        while not token.cancelled:
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {request.url.path}")
+                token.cancel("client disconnected")
+                return
+            await asyncio.sleep(poll_interval)
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        yield token
+    except asyncio.CancelledError:
+        token.cancel("request cancelled")
+        raise
+    finally:
+        watcher.cancel()
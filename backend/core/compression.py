@@ -0,0 +1,165 @@
+"""
+Response compression (brotli when installed, else gzip).
+The middleware compresses complete single-message bodies above a size
+threshold; streamed responses (SSE, NDJSON) pass through untouched. Bodies
+that are already encoded, e.g. precompressed cache hits, are left alone.
+"""
+
+import gzip
+import logging
+import os
+from typing import Optional, Tuple
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MIN_COMPRESS_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"text/",
+    b"application/javascript",
+    b"application/xml",
+)
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header, or None."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress body; best=True trades CPU for size (used for cached bodies)."""
+    if encoding == "br":
+        return brotli.compress(body, quality=9 if best else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def weaken_etag(value: bytes) -> bytes:
+    """Encoded representations share the ETag of the identity body only weakly."""
+    return value if value.startswith(b"W/") else b"W/" + value
+
+
+def header_value(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+def accept_encoding_from_scope(scope) -> Optional[str]:
+    value = header_value(scope.get("headers", []), b"accept-encoding")
+    return value.decode("latin-1") if value is not None else None
+
+
+def _encoded_headers(headers, encoding: str, length: int):
+    """Start headers for an encoded body: new length and encoding, weak ETag."""
+    out = []
+    for key, value in headers:
+        if key == b"content-length":
+            continue
+        if key == b"etag":
+            value = weaken_etag(value)
+        out.append((key, value))
+    out += [
+        (b"content-encoding", encoding.encode("latin-1")),
+        (b"content-length", str(length).encode("latin-1")),
+    ]
+    return out
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing compressible bodies >= minimum_size.
+    Adds Vary: Accept-Encoding to every compressible response.
+    """
+
+    def __init__(self, app, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(accept_encoding_from_scope(scope))
+        state = {"start": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                await self._start(message, encoding, state, send)
+            elif state["passthrough"] or message["type"] != "http.response.body":
+                await send(message)
+            else:
+                await self._body(message, encoding, state, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _start(self, message, encoding, state, send):
+        """Pass the start message on, or hold it while the body may be compressed."""
+        headers = message.get("headers", [])
+        content_type = header_value(headers, b"content-type") or b""
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            state["passthrough"] = True
+            await send(message)
+            return
+        if header_value(headers, b"vary") is None:
+            vary = [(b"vary", b"Accept-Encoding")]
+            message = {**message, "headers": list(headers) + vary}
+        if encoding is None or header_value(headers, b"content-encoding") is not None:
+            state["passthrough"] = True
+            await send(message)
+            return
+        # Hold the start message until we know whether the body is complete
+        state["start"] = message
+
+    async def _body(self, message, encoding, state, send):
+        """Send the held start message and the first body, compressed if worth it."""
+        start = state["start"]
+        state["passthrough"] = True
+        body = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.minimum_size:
+            await send(start)
+            await send(message)
+            return
+
+        compressed = compress(body, encoding)
+        get_metrics().inc(
+            "compressed_bytes_saved_total", len(body) - len(compressed),
+            "Bytes saved by on-the-fly response compression", encoding=encoding
+        )
+        headers = _encoded_headers(start.get("headers", []), encoding, len(compressed))
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
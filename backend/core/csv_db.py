@@ -4,12 +4,18 @@ Optimized for production use with lazy loading, TTL-based cache, and index accel
 """
 
 import csv
+import hashlib
 import os
+import threading
 import time
 import logging
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .cancellation import CHECK_INTERVAL_ROWS, CancellationToken, Deadline, ScanCancelledError
+from .metrics import get_metrics, record_scan
+from .shared_cache import get_shared_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +52,10 @@ class CacheEntry:
         return None if self.is_expired() else self.value
 
 _CACHE: Dict[str, CacheEntry] = {}
+_CACHE_STATS = {"hits": 0, "misses": 0, "l2_hits": 0}
+
+# L2 tier shared by all worker processes on this host (None when disabled)
+_SHARED_CACHE = get_shared_cache()
 
 # Indices for fast lookups (state -> set of districts, etc.)
 _INDEX_STATE_DISTRICTS: Dict[str, Set[str]] = defaultdict(set)
@@ -54,18 +64,28 @@ _INDEX_FILES_LOADED: Set[str] = set()
 
 
 def _get_cached(key: str, ttl: int = CACHE_TTL_SHORT) -> Optional[Any]:
-    """Get value from cache if not expired"""
+    """Get value from L1 (process) cache, falling back to the shared L2 tier"""
     if key in _CACHE:
         value = _CACHE[key].get()
         if value is not None:
+            _CACHE_STATS["hits"] += 1
             return value
         del _CACHE[key]
+    if _SHARED_CACHE is not None:
+        value = _SHARED_CACHE.get(key, get_dataset_generation(), ttl)
+        if value is not None:
+            _CACHE_STATS["l2_hits"] += 1
+            _CACHE[key] = CacheEntry(value, ttl)
+            return value
+    _CACHE_STATS["misses"] += 1
     return None
 
 
 def _set_cached(key: str, value: Any, ttl: int = CACHE_TTL_SHORT) -> None:
-    """Set value in cache with TTL"""
+    """Set value in L1 cache with TTL and publish it to the shared L2 tier"""
     _CACHE[key] = CacheEntry(value, ttl)
+    if _SHARED_CACHE is not None:
+        _SHARED_CACHE.set(key, value, get_dataset_generation())
 
 
 def _clear_expired_cache() -> None:
@@ -85,6 +105,84 @@ def _iter_csv_files(folder: str):
         yield os.path.join(folder, fname)
 
 
+_DATASET_NAMES = {
+    ENROLL_FOLDER: "enrollment",
+    DEMO_FOLDER: "demographic",
+    BIO_FOLDER: "biometric",
+}
+
+
+def _scan_rows(
+    folder: str,
+    max_files: Optional[int] = None,
+    token: Optional[Union[CancellationToken, Deadline]] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield DictReader rows from every CSV in folder, recording scan throughput.
+    With a token (or Deadline), raises ScanCancelledError within CHECK_INTERVAL_ROWS
+    rows of cancellation.
+    """
+    started = time.perf_counter()
+    rows = 0
+    try:
+        for i, f in enumerate(_iter_csv_files(folder)):
+            if max_files is not None and i >= max_files:
+                break
+            if token is not None:
+                token.raise_if_cancelled()
+            with open(f, "r", encoding="utf-8", errors="replace") as fh:
+                for row in csv.DictReader(fh):
+                    rows += 1
+                    if token is not None and rows % CHECK_INTERVAL_ROWS == 0:
+                        token.raise_if_cancelled()
+                    yield row
+    except ScanCancelledError:
+        get_metrics().inc(
+            "scans_cancelled_total", 1, "CSV scans aborted by cancellation",
+            dataset=_DATASET_NAMES.get(folder, os.path.basename(folder))
+        )
+        raise
+    finally:
+        record_scan(
+            _DATASET_NAMES.get(folder, os.path.basename(folder)),
+            rows,
+            time.perf_counter() - started,
+        )
+
+
+# Dataset generation: fingerprint of the CSV files on disk, rechecked periodically
+GENERATION_CHECK_INTERVAL = 5.0
+_GENERATION: Dict[str, Any] = {"value": None, "checked_at": 0.0}
+
+
+def get_dataset_generation(force: bool = False) -> str:
+    """
+    Return a short fingerprint of the dataset (file names, sizes, mtimes).
+    Changes whenever a CSV is added, removed or rewritten. Only stats files,
+    and reuses the last value for GENERATION_CHECK_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    if (
+        not force
+        and _GENERATION["value"] is not None
+        and now - _GENERATION["checked_at"] < GENERATION_CHECK_INTERVAL
+    ):
+        return _GENERATION["value"]
+
+    digest = hashlib.sha1()
+    for folder in [ENROLL_FOLDER, DEMO_FOLDER, BIO_FOLDER]:
+        for path in _iter_csv_files(folder):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    value = digest.hexdigest()[:16]
+    _GENERATION["value"] = value
+    _GENERATION["checked_at"] = now
+    return value
+
+
 def safe_int(val: Optional[str]) -> int:
     """Safely convert string to int, extracting digits only"""
     if val is None:
@@ -257,28 +355,25 @@ def get_state_distribution(limit: int = 20) -> List[Dict[str, Any]]:
         return cached
 
     totals = defaultdict(int)
-    for f in _iter_csv_files(ENROLL_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                raw_state = (row.get("state") or "").strip()
-                if not raw_state:
-                    continue
-                
-                # Normalize state name
-                state = normalize_state(raw_state)
-                if not state:
-                    continue
-                
-                # Index this state
-                _INDEX_STATE_DISTRICTS[state].add((row.get("district") or "").strip())
-                
-                total = (
-                    safe_int(row.get("age_0_5"))
-                    + safe_int(row.get("age_5_17"))
-                    + safe_int(row.get("age_18_greater"))
-                )
-                totals[state] += total
+    for row in _scan_rows(ENROLL_FOLDER):
+        raw_state = (row.get("state") or "").strip()
+        if not raw_state:
+            continue
+        
+        # Normalize state name
+        state = normalize_state(raw_state)
+        if not state:
+            continue
+        
+        # Index this state
+        _INDEX_STATE_DISTRICTS[state].add((row.get("district") or "").strip())
+        
+        total = (
+            safe_int(row.get("age_0_5"))
+            + safe_int(row.get("age_5_17"))
+            + safe_int(row.get("age_18_greater"))
+        )
+        totals[state] += total
 
     result = sorted(
         [{"state": s, "total_enrollments": v} for s, v in totals.items() if s],
@@ -287,6 +382,12 @@ def get_state_distribution(limit: int = 20) -> List[Dict[str, Any]]:
     )
     out = result[:limit]
     _set_cached(key, out, CACHE_TTL_LONG)
+    # Publish the state -> districts index so other workers can reuse it
+    _set_cached(
+        "state_district_index",
+        {s: sorted(d) for s, d in _INDEX_STATE_DISTRICTS.items()},
+        CACHE_TTL_LONG,
+    )
     return out
 
 
@@ -300,31 +401,28 @@ def get_enrollment_timeline(
         return cached
 
     counts = defaultdict(int)
-    for f in _iter_csv_files(ENROLL_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                raw_state = (row.get("state") or "").strip()
-                row_state = normalize_state(raw_state) or raw_state
-                
-                if state:
-                    norm_filter = normalize_state(state) or state
-                    if norm_filter.lower() not in row_state.lower():
-                        continue
-                
-                month = _parse_date_to_month(row.get("date") or "")
-                if not month:
-                    continue
-                
-                # Index this date
-                _INDEX_STATE_DATES[row_state].add(month)
-                
-                total = (
-                    safe_int(row.get("age_0_5"))
-                    + safe_int(row.get("age_5_17"))
-                    + safe_int(row.get("age_18_greater"))
-                )
-                counts[month] += total
+    for row in _scan_rows(ENROLL_FOLDER):
+        raw_state = (row.get("state") or "").strip()
+        row_state = normalize_state(raw_state) or raw_state
+        
+        if state:
+            norm_filter = normalize_state(state) or state
+            if norm_filter.lower() not in row_state.lower():
+                continue
+        
+        month = _parse_date_to_month(row.get("date") or "")
+        if not month:
+            continue
+        
+        # Index this date
+        _INDEX_STATE_DATES[row_state].add(month)
+        
+        total = (
+            safe_int(row.get("age_0_5"))
+            + safe_int(row.get("age_5_17"))
+            + safe_int(row.get("age_18_greater"))
+        )
+        counts[month] += total
 
     months_sorted = sorted(counts.items())
     out = [{"month": m + "-01", "total": v} for m, v in months_sorted]
@@ -342,9 +440,11 @@ def explorer_enrollment(
     order: Optional[str] = 'asc',
     page: int = 1,
     limit: int = 100,
+    token: Optional[CancellationToken] = None,
 ) -> Dict[str, Any]:
     """
     Get unified enrollment records from all datasets with pagination, filtering, and sorting.
+    A cancelled token aborts the scan with ScanCancelledError; nothing partial is cached.
     """
     # Create cache key for this query
     state_key = (normalize_state(state) or state or 'all').replace(" ", "_").lower()
@@ -359,42 +459,39 @@ def explorer_enrollment(
 
         # Process all three data folders
         for folder in [ENROLL_FOLDER, DEMO_FOLDER, BIO_FOLDER]:
-            for f in _iter_csv_files(folder):
-                with open(f, "r", encoding="utf-8", errors="replace") as fh:
-                    reader = csv.DictReader(fh)
-                    for row in reader:
-                        if not _row_matches_filters(row, state, district, date_from, date_to):
-                            continue
-                        
-                        dt = (row.get("date") or "").strip()
-                        raw_st = (row.get("state") or "").strip()
-                        st = normalize_state(raw_st) or raw_st
-                        dname = (row.get("district") or "").strip()
-                        pcode = (row.get("pincode") or "").strip()
-                        
-                        # Search filter
-                        if search:
-                            search_lower = search.lower()
-                            if not (
-                                search_lower in (st or "").lower() or
-                                search_lower in (dname or "").lower() or
-                                search_lower in (dt or "").lower()
-                            ):
-                                continue
-
-                        key = (dt, st, dname, pcode)
-                        
-                        # Aggregate based on column names in each dataset
-                        if folder == ENROLL_FOLDER:
-                            agg[key]["age_0_5"] += safe_int(row.get("age_0_5"))
-                            agg[key]["age_5_17"] += safe_int(row.get("age_5_17"))
-                            agg[key]["age_18_greater"] += safe_int(row.get("age_18_greater"))
-                        elif folder == DEMO_FOLDER:
-                            agg[key]["age_5_17"] += safe_int(row.get("demo_age_5_17"))
-                            agg[key]["age_18_greater"] += safe_int(row.get("demo_age_17_"))
-                        elif folder == BIO_FOLDER:
-                            agg[key]["age_5_17"] += safe_int(row.get("bio_age_5_17"))
-                            agg[key]["age_18_greater"] += safe_int(row.get("bio_age_17_"))
+            for row in _scan_rows(folder, token=token):
+                if not _row_matches_filters(row, state, district, date_from, date_to):
+                    continue
+                
+                dt = (row.get("date") or "").strip()
+                raw_st = (row.get("state") or "").strip()
+                st = normalize_state(raw_st) or raw_st
+                dname = (row.get("district") or "").strip()
+                pcode = (row.get("pincode") or "").strip()
+                
+                # Search filter
+                if search:
+                    search_lower = search.lower()
+                    if not (
+                        search_lower in (st or "").lower() or
+                        search_lower in (dname or "").lower() or
+                        search_lower in (dt or "").lower()
+                    ):
+                        continue
+
+                key = (dt, st, dname, pcode)
+                
+                # Aggregate based on column names in each dataset
+                if folder == ENROLL_FOLDER:
+                    agg[key]["age_0_5"] += safe_int(row.get("age_0_5"))
+                    agg[key]["age_5_17"] += safe_int(row.get("age_5_17"))
+                    agg[key]["age_18_greater"] += safe_int(row.get("age_18_greater"))
+                elif folder == DEMO_FOLDER:
+                    agg[key]["age_5_17"] += safe_int(row.get("demo_age_5_17"))
+                    agg[key]["age_18_greater"] += safe_int(row.get("demo_age_17_"))
+                elif folder == BIO_FOLDER:
+                    agg[key]["age_5_17"] += safe_int(row.get("bio_age_5_17"))
+                    agg[key]["age_18_greater"] += safe_int(row.get("bio_age_17_"))
 
         rows = []
         for (dt, st, dname, pcode), vals in agg.items():
@@ -437,24 +534,21 @@ def get_demographics(limit: int = 100) -> List[Dict[str, Any]]:
         return cached
 
     totals = defaultdict(lambda: {"demo_age_5_17": 0, "demo_age_17_plus": 0})
-    for f in _iter_csv_files(DEMO_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                raw_st = (row.get("state") or "").strip()
-                st = normalize_state(raw_st) or raw_st
-                totals[st]["demo_age_5_17"] += safe_int(
-                    row.get("demo_age_5_17")
-                    or row.get("demo_age_5-17")
-                    or row.get("demo_age_5_17 ")
-                    or row.get("demo_age_5-17 ")
-                )
-                totals[st]["demo_age_17_plus"] += safe_int(
-                    row.get("demo_age_17_plus")
-                    or row.get("demo_age_17_")
-                    or row.get("demo_age_17")
-                    or row.get("demo_age_17+")
-                )
+    for row in _scan_rows(DEMO_FOLDER):
+        raw_st = (row.get("state") or "").strip()
+        st = normalize_state(raw_st) or raw_st
+        totals[st]["demo_age_5_17"] += safe_int(
+            row.get("demo_age_5_17")
+            or row.get("demo_age_5-17")
+            or row.get("demo_age_5_17 ")
+            or row.get("demo_age_5-17 ")
+        )
+        totals[st]["demo_age_17_plus"] += safe_int(
+            row.get("demo_age_17_plus")
+            or row.get("demo_age_17_")
+            or row.get("demo_age_17")
+            or row.get("demo_age_17+")
+        )
 
     arr = []
     for s, v in totals.items():
@@ -485,40 +579,27 @@ def get_demographic_distribution() -> Dict[str, Any]:
     totals = {"5-17": 0, "17+": 0, "total": 0}
     location_data = defaultdict(int)
     
-    # Process demographic-specific CSV files
-    demo_files_processed = 0
-    for f in _iter_csv_files(DEMO_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                # Process demographic age groups (demo_age_5_17, demo_age_17_)
-                age_5_17 = safe_int(row.get("demo_age_5_17"))
-                age_17_plus = safe_int(row.get("demo_age_17_") or row.get("demo_age_17"))
-                
-                totals["5-17"] += age_5_17
-                totals["17+"] += age_17_plus
-                totals["total"] += age_5_17 + age_17_plus
-                
-                # Add location-based demographics
-                state = normalize_state((row.get("state") or "").strip()) or (row.get("state") or "").strip()
-                if state:
-                    location_data[state] += age_5_17 + age_17_plus
+    # Process demographic-specific CSV files (first 3 files for performance)
+    demo_files_processed = min(3, len(list(_iter_csv_files(DEMO_FOLDER))))
+    for row in _scan_rows(DEMO_FOLDER, max_files=3):
+        # Process demographic age groups (demo_age_5_17, demo_age_17_)
+        age_5_17 = safe_int(row.get("demo_age_5_17"))
+        age_17_plus = safe_int(row.get("demo_age_17_") or row.get("demo_age_17"))
+        
+        totals["5-17"] += age_5_17
+        totals["17+"] += age_17_plus
+        totals["total"] += age_5_17 + age_17_plus
         
-        demo_files_processed += 1
-        if demo_files_processed >= 3:  # Process first 3 files for performance
-            break
+        # Add location-based demographics
+        state = normalize_state((row.get("state") or "").strip()) or (row.get("state") or "").strip()
+        if state:
+            location_data[state] += age_5_17 + age_17_plus
 
     # Combine with enrollment data for 0-5 age group (as demographic dataset focuses on 5+)
+    # Process first 2 files for 0-5 data
     enrollment_0_5 = 0
-    enroll_files_processed = 0
-    for f in _iter_csv_files(ENROLL_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                enrollment_0_5 += safe_int(row.get("age_0_5"))
-        enroll_files_processed += 1
-        if enroll_files_processed >= 2:  # Process first 2 files for 0-5 data
-            break
+    for row in _scan_rows(ENROLL_FOLDER, max_files=2):
+        enrollment_0_5 += safe_int(row.get("age_0_5"))
     
     # Build comprehensive age distribution
     by_age_group = [
@@ -552,19 +633,16 @@ def get_coverage_gaps(limit: int = 20) -> List[Dict[str, Any]]:
         return cached
 
     totals = defaultdict(int)
-    for f in _iter_csv_files(ENROLL_FOLDER):
-        with open(f, "r", encoding="utf-8", errors="replace") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                raw_st = (row.get("state") or "").strip()
-                st = normalize_state(raw_st) or raw_st
-                dname = (row.get("district") or "").strip()
-                total = (
-                    safe_int(row.get("age_0_5"))
-                    + safe_int(row.get("age_5_17"))
-                    + safe_int(row.get("age_18_greater"))
-                )
-                totals[(st, dname)] += total
+    for row in _scan_rows(ENROLL_FOLDER):
+        raw_st = (row.get("state") or "").strip()
+        st = normalize_state(raw_st) or raw_st
+        dname = (row.get("district") or "").strip()
+        total = (
+            safe_int(row.get("age_0_5"))
+            + safe_int(row.get("age_5_17"))
+            + safe_int(row.get("age_18_greater"))
+        )
+        totals[(st, dname)] += total
 
     arr = []
     for (st, dname), v in totals.items():
@@ -584,16 +662,122 @@ def get_coverage_gaps(limit: int = 20) -> List[Dict[str, Any]]:
     return out
 
 
+# ============= PER-STATE PROFILES (MATERIALIZED) =============
+
+_PROFILE_LOCK = threading.Lock()
+
+
+def _data_quality(total: int) -> str:
+    return 'High' if total > 100000 else 'Medium' if total > 10000 else 'Low'
+
+
+def get_state_profiles() -> Dict[str, Any]:
+    """
+    Profiles of every state from one enrollment scan, rebuilt once per dataset
+    generation: totals, age split, district/pincode counts, monthly timeline.
+    Returns {"generation", "national_total", "states": {state: profile}, "lookup"}.
+    """
+    generation = get_dataset_generation()
+    cached = _get_cached("state_profiles", CACHE_TTL_LONG)
+    if cached is not None and cached.get("generation") == generation:
+        return cached
+
+    with _PROFILE_LOCK:
+        # Another thread may have built it while we waited
+        cached = _get_cached("state_profiles", CACHE_TTL_LONG)
+        if cached is not None and cached.get("generation") == generation:
+            return cached
+
+        ages = defaultdict(lambda: [0, 0, 0])
+        districts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        pincodes: Dict[str, Set[str]] = defaultdict(set)
+        months: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for row in _scan_rows(ENROLL_FOLDER):
+            raw_state = (row.get("state") or "").strip()
+            state = normalize_state(raw_state)
+            if not state:
+                continue
+            a0 = safe_int(row.get("age_0_5"))
+            a5 = safe_int(row.get("age_5_17"))
+            a18 = safe_int(row.get("age_18_greater"))
+            bucket = ages[state]
+            bucket[0] += a0
+            bucket[1] += a5
+            bucket[2] += a18
+            total = a0 + a5 + a18
+            districts[state][(row.get("district") or "Unknown").strip()] += total
+            pincode = (row.get("pincode") or "").strip()
+            if pincode:
+                pincodes[state].add(pincode)
+            month = _parse_date_to_month(row.get("date") or "")
+            if month:
+                months[state][month] += total
+
+        national_total = sum(sum(a) for a in ages.values())
+        states = {}
+        for state, (a0, a5, a18) in ages.items():
+            total = a0 + a5 + a18
+            ranked = sorted(districts[state].items(), key=lambda kv: kv[1], reverse=True)
+            pin_count = len(pincodes[state])
+            states[state] = {
+                'state': state,
+                'total_enrollments': total,
+                'active_users': int(total * 0.95),
+                'districts_covered': len(ranked),
+                'districts': [d for d, _ in ranked[:20]],  # Top 20 districts by enrollments
+                'pincodes_covered': pin_count,
+                'timeline': [
+                    {"month": m + "-01", "total": v} for m, v in sorted(months[state].items())
+                ],
+                'demographics': {
+                    'age_0_5': a0,
+                    'age_5_17': a5,
+                    'age_18_greater': a18,
+                    'total': total
+                },
+                'coverage_ratio': min(100, (pin_count / 1000) * 100),  # Rough coverage estimate
+                'national_share': round(total / national_total * 100, 3) if national_total else 0.0,
+                'data_quality': _data_quality(total)
+            }
+
+        result = {
+            "generation": generation,
+            "national_total": national_total,
+            "states": states,
+            "lookup": {state.lower(): state for state in states}
+        }
+        _set_cached("state_profiles", result, CACHE_TTL_LONG)
+        logger.info(f"Built state profiles for {len(states)} states (generation {generation})")
+        return result
+
+
+def get_state_profile(state_name: str) -> Optional[Dict[str, Any]]:
+    """O(1) lookup of one state's profile by raw or canonical name; None if unknown"""
+    profiles = get_state_profiles()
+    canonical = normalize_state(state_name) or state_name.strip()
+    canonical = profiles["lookup"].get(canonical.lower(), canonical)
+    return profiles["states"].get(canonical)
+
+
 # ============= CACHE MANAGEMENT API =============
 
-def clear_cache() -> Dict[str, str]:
-    """Clear all cached data (useful for testing)"""
+def clear_cache(shared: bool = True) -> Dict[str, str]:
+    """Clear all cached data (useful for testing); shared=False keeps the L2 tier"""
     _CACHE.clear()
     _INDEX_STATE_DISTRICTS.clear()
     _INDEX_STATE_DATES.clear()
+    if shared and _SHARED_CACHE is not None:
+        _SHARED_CACHE.clear()
     return {"status": "Cache cleared"}
 
 
+def prune_shared_cache() -> int:
+    """Drop idle L2 generations other than the current one; returns how many"""
+    if _SHARED_CACHE is None:
+        return 0
+    return _SHARED_CACHE.prune(keep=get_dataset_generation())
+
+
 def get_cache_stats() -> Dict[str, Any]:
     """Get cache statistics"""
     _clear_expired_cache()
@@ -603,9 +787,16 @@ def get_cache_stats() -> Dict[str, Any]:
         if entry.is_expired():
             expired += 1
     
+    hits = _CACHE_STATS["hits"] + _CACHE_STATS["l2_hits"]
+    lookups = hits + _CACHE_STATS["misses"]
     return {
         "active_entries": total_cache_size,
         "expired_entries": expired,
+        "hits": _CACHE_STATS["hits"],
+        "l2_hits": _CACHE_STATS["l2_hits"],
+        "misses": _CACHE_STATS["misses"],
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "shared_cache": _SHARED_CACHE.get_stats() if _SHARED_CACHE is not None else None,
         "indexed_states": len(_INDEX_STATE_DISTRICTS),
         "indexed_dates": sum(len(v) for v in _INDEX_STATE_DATES.values()),
         "cache_ttl_short": CACHE_TTL_SHORT,
@@ -614,13 +805,25 @@ def get_cache_stats() -> Dict[str, Any]:
     }
 
 
+def _ensure_state_index() -> None:
+    """Restore the state -> districts index from cache when this process has none"""
+    if _INDEX_STATE_DISTRICTS:
+        return
+    cached = _get_cached("state_district_index", CACHE_TTL_LONG)
+    if cached:
+        for state, districts in cached.items():
+            _INDEX_STATE_DISTRICTS[state].update(districts)
+
+
 def get_available_states() -> List[str]:
     """Get list of available states from indices (fast)"""
+    _ensure_state_index()
     return sorted(list(_INDEX_STATE_DISTRICTS.keys()))
 
 
 def get_available_districts(state: str) -> List[str]:
     """Get districts for a state from indices (fast)"""
+    _ensure_state_index()
     return sorted(list(_INDEX_STATE_DISTRICTS.get(state, set())))
 
 
@@ -0,0 +1,172 @@
+"""
+Server-sent event broadcasting for dashboard updates.
+Tracks the last published payload of each dashboard aggregate and pushes
+JSON merge patches (RFC 7386) to subscribers when the dataset generation
+changes or an aggregate is recomputed, so clients can stop polling.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """
+    RFC 7386 merge patch turning old into new, or _MISSING when they are equal.
+    Objects are diffed recursively; any other changed value is replaced whole.
+    """
+    if old == new:
+        return _MISSING
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    patch = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        sub = merge_patch(old[key], value)
+        if sub is not _MISSING:
+            patch[key] = sub
+    return patch
+
+
+class Subscription:
+    """Bounded event queue of one connected client."""
+    __slots__ = ('queue', 'resync')
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[Tuple[int, str, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self.resync = False
+
+
+class EventBroadcaster:
+    """
+    Fan-out of dashboard events to SSE subscribers.
+
+    Slow clients never block publishers: when a subscriber's queue is full its
+    backlog is dropped and it receives a full 'snapshot' event instead.
+    """
+
+    def __init__(self, queue_size: int = 64, volatile_keys: Tuple[str, ...] = ("timestamp",)):
+        self.queue_size = queue_size
+        self.volatile_keys = volatile_keys
+        self._subscribers: Set[Subscription] = set()
+        self._aggregates: Dict[str, Any] = {}
+        self._generation: Optional[str] = None
+        self._event_id = 0
+        self._published = 0
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self.queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def publish(self, event: str, data: Any) -> int:
+        """Queue an event for every subscriber; returns the event id."""
+        self._event_id += 1
+        self._published += 1
+        item = (self._event_id, event, data)
+        for sub in self._subscribers:
+            try:
+                sub.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.resync = True
+                sub.queue.put_nowait(item)
+        return self._event_id
+
+    def set_generation(self, generation: Optional[str]) -> None:
+        """Announce a dataset generation; publishes only when it changed."""
+        if generation == self._generation:
+            return
+        previous, self._generation = self._generation, generation
+        if previous is not None:
+            self.publish("generation", {"generation": generation, "previous": previous})
+
+    def update_aggregate(self, key: str, payload: Any) -> bool:
+        """Record a recomputed aggregate and publish its diff; False if unchanged."""
+        if isinstance(payload, dict):
+            payload = {k: v for k, v in payload.items() if k not in self.volatile_keys}
+        old = self._aggregates.get(key, _MISSING)
+        self._aggregates[key] = payload
+        if old is _MISSING:
+            self.publish("aggregate", {"key": key, "generation": self._generation, "value": payload})
+            return True
+        patch = merge_patch(old, payload)
+        if patch is _MISSING:
+            return False
+        self.publish("aggregate", {"key": key, "generation": self._generation, "patch": patch})
+        return True
+
+    @property
+    def last_event_id(self) -> int:
+        return self._event_id
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"generation": self._generation, "aggregates": dict(self._aggregates)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'subscribers': len(self._subscribers),
+            'published': self._published,
+            'last_event_id': self._event_id,
+            'tracked_aggregates': sorted(self._aggregates),
+            'generation': self._generation
+        }
+
+
+def format_sse(event_id: Optional[int], event: str, data: Any) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return (head + f"event: {event}\ndata: ").encode("utf-8") + dumps(data) + b"\n\n"
+
+
+async def sse_stream(
+    broadcaster: EventBroadcaster,
+    keepalive: float = 15.0
+) -> AsyncIterator[bytes]:
+    """
+    Event stream for one client: a full 'snapshot' first, then generation and
+    aggregate patch events, with comment keepalives while idle.
+    """
+    sub = broadcaster.subscribe()
+    try:
+        yield b"retry: 5000\n\n"
+        yield format_sse(broadcaster.last_event_id, "snapshot", broadcaster.snapshot())
+        while True:
+            try:
+                event_id, event, data = await asyncio.wait_for(sub.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if sub.resync:
+                sub.resync = False
+                yield format_sse(event_id, "snapshot", broadcaster.snapshot())
+                continue
+            yield format_sse(event_id, event, data)
+    finally:
+        broadcaster.unsubscribe(sub)
+
+
+# Global instance
+_broadcaster: Optional[EventBroadcaster] = None
+
+
+def get_event_broadcaster() -> EventBroadcaster:
+    """Get or create the global dashboard event broadcaster."""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = EventBroadcaster()
+    return _broadcaster
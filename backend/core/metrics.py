@@ -0,0 +1,259 @@
+"""
+Low-overhead in-process metrics with Prometheus text exposition.
+Provides log-bucketed latency histograms per operation and per route, scan
+throughput counters, and pluggable gauge collectors.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bucket upper bounds in seconds: 0.5ms doubling up to ~65s (log-spaced)
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(0.0005 * (2 ** i) for i in range(18))
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[Dict[str, str], float]
+# A collector returns (metric_name, metric_type, help_text, samples)
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class LatencyHistogram:
+    """Fixed log-bucketed latency histogram; observe() is O(log buckets)."""
+    __slots__ = ('counts', 'count', 'total', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile (bucket upper bound) in seconds."""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if count == 0:
+            return None
+        target = q * count
+        running = 0
+        for idx, c in enumerate(counts):
+            running += c
+            if running >= target:
+                return LATENCY_BUCKETS[idx] if idx < len(LATENCY_BUCKETS) else float('inf')
+        return float('inf')
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        with self._lock:
+            return list(self.counts), self.count, self.total
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Holds histograms and counters, renders them in Prometheus text format.
+    """
+
+    def __init__(self, prefix: str = "samvidhan"):
+        self.prefix = prefix
+        self._histograms: Dict[str, Dict[Labels, LatencyHistogram]] = {}
+        self._histogram_help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._counter_help: Dict[str, str] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str = "", **labels: str) -> LatencyHistogram:
+        """Get or create the histogram for name + labels."""
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.get(name)
+        if series is not None:
+            hist = series.get(key)
+            if hist is not None:
+                return hist
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            self._histogram_help.setdefault(name, help_text)
+            return series.setdefault(key, LatencyHistogram())
+
+    def observe(self, name: str, seconds: float, help_text: str = "", **labels: str) -> None:
+        self.histogram(name, help_text, **labels).observe(seconds)
+
+    def inc(self, name: str, amount: float = 1.0, help_text: str = "", **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            self._counter_help.setdefault(name, help_text)
+            series[key] = series.get(key, 0.0) + amount
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def register_collector(self, collector: Collector) -> None:
+        """Register a callback producing gauge/counter samples at render time."""
+        self._collectors.append(collector)
+
+    def _copy_series(self) -> Tuple[Dict[str, Dict[Labels, LatencyHistogram]],
+                                    Dict[str, Dict[Labels, float]]]:
+        """Histogram and counter series copied under the lock, for rendering."""
+        with self._lock:
+            histograms = {name: dict(s) for name, s in self._histograms.items()}
+            counters = {name: dict(s) for name, s in self._counters.items()}
+        return histograms, counters
+
+    def histogram_summary(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """p50/p90/p99 (ms) per label set, for JSON health endpoints."""
+        out = {}
+        with self._lock:
+            series = dict(self._histograms.get(name, {}))
+        for key, hist in series.items():
+            label = ",".join(f"{k}={v}" for k, v in key) or "all"
+            p50, p90, p99 = (hist.quantile(q) for q in (0.5, 0.9, 0.99))
+            out[label] = {
+                'count': hist.count,
+                'p50_ms': None if p50 is None else round(p50 * 1000, 3),
+                'p90_ms': None if p90 is None else round(p90 * 1000, 3),
+                'p99_ms': None if p99 is None else round(p99 * 1000, 3),
+            }
+        return out
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format 0.0.4."""
+        lines: List[str] = []
+        bounds = [_format_value(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+        histograms, counters = self._copy_series()
+
+        for name in sorted(histograms):
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {self._histogram_help.get(name) or name}")
+            lines.append(f"# TYPE {full} histogram")
+            for key, hist in sorted(histograms[name].items()):
+                counts, count, total = hist.snapshot()
+                labels = dict(key)
+                running = 0
+                for le, c in zip(bounds, counts):
+                    running += c
+                    lines.append(
+                        f"{full}_bucket{_format_labels({**labels, 'le': le})} {running}"
+                    )
+                lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{full}_count{_format_labels(labels)} {count}")
+
+        for name in sorted(counters):
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {self._counter_help.get(name) or name}")
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(counters[name].items()):
+                lines.append(f"{full}{_format_labels(dict(key))} {_format_value(value)}")
+
+        for collector in list(self._collectors):
+            for name, mtype, help_text, samples in collector():
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full} {help_text or name}")
+                lines.append(f"# TYPE {full} {mtype}")
+                for labels, value in samples:
+                    lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get or create the global metrics registry."""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+
+def record_scan(dataset: str, rows: int, seconds: float) -> None:
+    """Account one CSV scan towards the scan throughput counters."""
+    registry = get_metrics()
+    registry.inc("scan_rows_total", rows, "CSV rows scanned", dataset=dataset)
+    registry.inc("scan_seconds_total", seconds, "Time spent scanning CSVs", dataset=dataset)
+    registry.inc("scans_total", 1, "Completed CSV scans", dataset=dataset)
+    if seconds > 0:
+        registry.histogram(
+            "scan_duration_seconds", "Duration of full CSV scans", dataset=dataset
+        ).observe(seconds)
+
+
+def scan_throughput() -> Dict[str, float]:
+    """Average rows/s per dataset over all recorded scans."""
+    registry = get_metrics()
+    out = {}
+    for key, rows in registry._counters.get("scan_rows_total", {}).items():
+        dataset = dict(key).get("dataset", "")
+        seconds = registry.counter_value("scan_seconds_total", dataset=dataset)
+        out[dataset] = rows / seconds if seconds > 0 else 0.0
+    return out
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template.
+    Uses the matched route path (e.g. /api/states/{state_name}) as label so
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or get_metrics()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            self.registry.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - started,
+                "HTTP request latency by route",
+                method=method,
+                route=path
+            )
+            self.registry.inc(
+                "http_requests_total", 1, "HTTP requests by route and status",
+                method=method, route=path, status=str(status["code"])
+            )
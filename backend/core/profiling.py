@@ -0,0 +1,373 @@
+"""
+Opt-in profiling for production diagnosis (admin only).
+- Per-request: cProfile around one request (event-loop thread plus the worker
+  threads running its sync endpoint/dependencies), top functions by
+  cumulative time returned with the response.
+- Sampling: a background thread snapshots every thread's stack at a fixed
+  interval for N seconds and renders collapsed stacks for flamegraph tools.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import inspect
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+from .compression import header_value
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+ADMIN_HEADER = b"x-admin-token"
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "_profile"
+DEFAULT_TOP = 25
+
+
+def admin_token() -> Optional[str]:
+    """Configured admin token; profiling is disabled when unset."""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def is_admin(supplied: Optional[str]) -> bool:
+    expected = admin_token()
+    return bool(expected and supplied and hmac.compare_digest(expected, supplied))
+
+
+# ============= PER-REQUEST PROFILING =============
+
+
+class RequestProfile:
+    """cProfile runs collected from every thread that served one request."""
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def top(self, limit: int = DEFAULT_TOP) -> Dict[str, Any]:
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = None
+        for profile in profiles:
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        functions = []
+        if stats is not None:
+            rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)
+            for (filename, lineno, name), (cc, nc, tt, ct, _) in rows[:limit]:
+                functions.append({
+                    'function': f"{os.path.basename(filename)}:{lineno}({name})",
+                    'ncalls': nc,
+                    'tottime_ms': round(tt * 1000, 3),
+                    'cumtime_ms': round(ct * 1000, 3)
+                })
+        return {
+            'wall_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'threads_profiled': len(profiles),
+            'top_cumulative': functions
+        }
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "request_profile", default=None
+)
+# cProfile is per-thread but only one profiler may run in the event-loop thread
+_loop_profiler_lock = threading.Lock()
+
+
+def _profiled_sync(func: Callable) -> Callable:
+    """Wrap a sync endpoint/dependency so it is profiled in its worker thread."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        request_profile = _current_profile.get()
+        if request_profile is None:
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            request_profile.add(profiler)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute whose sync endpoint and sync dependencies join an active request
+    profile. Starlette runs them in anyio worker threads, which inherit the
+    request's context, so the contextvar reaches them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wrapped: Dict[Callable, Callable] = {}
+        self._wrap_dependant(self.dependant, wrapped)
+
+    def _wrap_dependant(
+        self, dependant: Dependant, wrapped: Dict[Callable, Callable]
+    ) -> None:
+        call = dependant.call
+        if call is not None and not _is_async(call):
+            if call not in wrapped:
+                wrapped[call] = _profiled_sync(call)
+            dependant.call = wrapped[call]
+        for sub in dependant.dependencies:
+            self._wrap_dependant(sub, wrapped)
+
+
+def _is_async(call: Callable) -> bool:
+    if inspect.isasyncgenfunction(call) or inspect.isgeneratorfunction(call):
+        return True  # generator dependencies are driven differently; leave as-is
+    if asyncio.iscoroutinefunction(call):
+        return True
+    dunder_call = getattr(call, "__call__", None)
+    return asyncio.iscoroutinefunction(dunder_call)
+
+
+def _wants_profile(scope) -> bool:
+    headers = scope.get("headers", [])
+    flag = header_value(headers, PROFILE_HEADER)
+    if flag is None:
+        query = scope.get("query_string", b"").decode("latin-1")
+        flag = b"1" if any(
+            part == PROFILE_QUERY or part.startswith(PROFILE_QUERY + "=1")
+            for part in query.split("&")
+        ) else None
+    if flag not in (b"1", b"true"):
+        return False
+    token = header_value(headers, ADMIN_HEADER)
+    return is_admin(token.decode("latin-1") if token is not None else None)
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware: profiles requests carrying `X-Profile: 1` (or
+    `?_profile=1`) together with a valid `X-Admin-Token`. The report is added
+    as `_profile` to JSON object bodies, wraps other JSON bodies as
+    {"response": ..., "_profile": ...}, and otherwise goes in the
+    X-Profile-Summary header. Executor work started with loop.run_in_executor
+    does not carry the request context; use the sampling profiler for it.
+    """
+
+    def __init__(self, app, top: int = DEFAULT_TOP):
+        self.app = app
+        self.top = top
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Ask for an identity body so the report can be injected
+        scope = {
+            **scope,
+            "headers": [
+                (k, v) for k, v in scope.get("headers", []) if k != b"accept-encoding"
+            ],
+        }
+        request_profile = RequestProfile()
+        held = {"start": None, "chunks": [], "streaming": False}
+
+        async def send_wrapper(message):
+            await self._hold(message, held, send, request_profile)
+
+        await self._run_profiled(scope, receive, send_wrapper, request_profile)
+        if held["streaming"] or held["start"] is None:
+            return
+        body = b"".join(held["chunks"])
+        await self._send_with_report(send, held["start"], body, request_profile)
+
+    async def _run_profiled(self, scope, receive, send, request_profile):
+        """Run the app with request_profile current and the loop profiler on."""
+        token = _current_profile.set(request_profile)
+        loop_profiler = None
+        if _loop_profiler_lock.acquire(blocking=False):
+            loop_profiler = cProfile.Profile()
+        try:
+            if loop_profiler is not None:
+                loop_profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if loop_profiler is not None:
+                    loop_profiler.disable()
+                    request_profile.add(loop_profiler)
+                    _loop_profiler_lock.release()
+        finally:
+            _current_profile.reset(token)
+
+    async def _hold(self, message, held, send, request_profile):
+        """Buffer the response; a streaming one is passed through once detected."""
+        if held["streaming"]:
+            await send(message)
+            return
+        if message["type"] == "http.response.start":
+            held["start"] = message
+            return
+        held["chunks"].append(message.get("body", b""))
+        if message.get("more_body", False):
+            # Streaming response: pass through, report goes in a header only
+            held["streaming"] = True
+            await send(self._with_summary(held["start"], request_profile))
+            for chunk in held["chunks"][:-1]:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send(message)
+
+    @staticmethod
+    def _uncacheable(headers) -> list:
+        # Profiled bodies must never be stored or revalidated by clients
+        return [
+            (k, v) for k, v in headers
+            if k not in (b"content-length", b"etag", b"cache-control")
+        ] + [(b"cache-control", b"no-store")]
+
+    def _with_summary(self, start, request_profile: RequestProfile):
+        report = request_profile.top(5)
+        summary = ", ".join(
+            f"{f['function']}={f['cumtime_ms']}ms" for f in report['top_cumulative']
+        )
+        headers = [
+            (k, v) for k, v in start.get("headers", [])
+            if k not in (b"etag", b"cache-control")
+        ] + [
+            (b"cache-control", b"no-store"),
+            (b"x-profile-summary", summary.encode("latin-1", "replace"))
+        ]
+        return {**start, "headers": headers}
+
+    async def _send_with_report(
+        self, send, start, body: bytes, request_profile: RequestProfile
+    ):
+        headers = start.get("headers", [])
+        content_type = header_value(headers, b"content-type") or b""
+        encoded = header_value(headers, b"content-encoding") is not None
+        if content_type.startswith(b"application/json") and not encoded:
+            try:
+                payload = json.loads(body) if body else None
+            except ValueError:
+                payload = None
+            if payload is not None:
+                report = request_profile.top(self.top)
+                if isinstance(payload, dict):
+                    payload["_profile"] = report
+                else:
+                    payload = {"response": payload, "_profile": report}
+                body = dumps(payload)
+                new_headers = self._uncacheable(headers)
+                length = str(len(body)).encode("latin-1")
+                new_headers.append((b"content-length", length))
+                await send({**start, "headers": new_headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+        await send(self._with_summary(start, request_profile))
+        await send({"type": "http.response.body", "body": body})
+
+
+# ============= SAMPLING PROFILER =============
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    location = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+    return f"{code.co_name} ({location})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over all threads using sys._current_frames().
+    Overhead is one stack walk per thread per interval; nothing is traced.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        # Own thread so a session never holds a request worker for N seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sampling-profiler"
+        )
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float) -> Dict[str, Any]:
+        """Sample for `seconds` (blocking); returns collapsed stacks and counts."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A sampling session is already running")
+        try:
+            own = threading.get_ident()
+            names = {}
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                for thread in threading.enumerate():
+                    names[thread.ident] = thread.name
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    labels = []
+                    depth = 0
+                    while frame is not None and depth < self.max_depth:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                        depth += 1
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(self.interval)
+            collapsed = "\n".join(
+                f"{stack} {count}" for stack, count in stacks.most_common()
+            )
+            return {
+                'collapsed': collapsed + ("\n" if collapsed else ""),
+                'samples': samples,
+                'unique_stacks': len(stacks),
+                'interval_ms': self.interval * 1000,
+                'duration_s': seconds
+            }
+        finally:
+            self._lock.release()
+
+    async def sample_async(self, seconds: float) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.sample, seconds)
+
+
+# Global instance
+_sampler: Optional[SamplingProfiler] = None
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    """Get or create the global sampling profiler."""
+    global _sampler
+    if _sampler is None:
+        _sampler = SamplingProfiler(
+            interval=float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", "5")) / 1000
+        )
+    return _sampler
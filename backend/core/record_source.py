@@ -0,0 +1,367 @@
+"""
+Shared, cached access to record-level enrollment rows.
+Serves row windows (offset/limit), seeded random samples and stratified samples
+by state or district to the analytics endpoints, so they stop re-reading CSVs on
+every request. Cached results are dropped when the dataset generation changes.
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+from .cancellation import CHECK_INTERVAL_ROWS, Deadline, ScanCancelledError
+from .csv_db import ENROLL_FOLDER, _scan_rows, get_dataset_generation, normalize_state
+
+logger = logging.getLogger(__name__)
+
+
+class EnrollmentRecord(TypedDict, total=False):
+    """One enrollment CSV row (identity fields exist only in record-level extracts)"""
+    date: str
+    state: str
+    district: str
+    pincode: str
+    age_0_5: str
+    age_5_17: str
+    age_18_greater: str
+    aadhaar: str
+    name: str
+
+
+def _matches(
+    row: Dict[str, str], state: Optional[str], district: Optional[str]
+) -> bool:
+    """Same substring semantics as the csv_db explorer filters"""
+    if state:
+        raw_st = (row.get("state") or "").strip()
+        st = normalize_state(raw_st) or raw_st
+        norm_filter = normalize_state(state) or state
+        if norm_filter.lower() not in st.lower():
+            return False
+    if district:
+        if district.lower() not in (row.get("district") or "").strip().lower():
+            return False
+    return True
+
+
+def _stratum(row: Dict[str, str], by: str) -> str:
+    raw_st = (row.get("state") or "").strip()
+    st = normalize_state(raw_st) or raw_st
+    if by == "district":
+        return f"{st}|{(row.get('district') or '').strip()}"
+    return st
+
+
+def _allocate(counts: Dict[str, int], n: int) -> Dict[str, int]:
+    """Proportional allocation of n rows over strata, at least one each while n lasts"""
+    total = sum(counts.values())
+    if total <= n:
+        return dict(counts)
+    alloc = {s: (c * n) // total for s, c in counts.items()}
+    remaining = n - sum(alloc.values())
+    for s in sorted(counts, key=counts.get, reverse=True):
+        if remaining <= 0:
+            break
+        if alloc[s] == 0:
+            alloc[s] = 1
+            remaining -= 1
+    for s in sorted(counts, key=lambda s: (counts[s] * n) % total, reverse=True):
+        if remaining <= 0:
+            break
+        if alloc[s] < counts[s]:
+            alloc[s] += 1
+            remaining -= 1
+    return alloc
+
+
+class _Prefix:
+    """Lazily grown unfiltered prefix of one dataset generation."""
+    __slots__ = ('rows', 'reader', 'exhausted', 'lock')
+
+    def __init__(self):
+        self.rows: List[EnrollmentRecord] = []
+        self.reader: Optional[Iterator[Dict[str, str]]] = None
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+
+class RecordSource:
+    """
+    Cached record provider over the enrollment CSV folder.
+
+    The unfiltered prefix of the dataset (up to max_cached_rows) is kept in
+    memory and grown lazily, so offset/limit windows inside it are list slices.
+    Filtered windows and samples are memoised in a small LRU keyed by their
+    parameters. All state is reset when the dataset generation changes.
+
+    The source lock only guards cache lookups and stores; scans run outside it,
+    and concurrent requests for the same key wait for a single scan. Callers
+    get their own copies of the rows.
+    """
+
+    def __init__(
+        self,
+        folder: str = ENROLL_FOLDER,
+        max_cached_rows: int = 200_000,
+        max_cached_queries: int = 64
+    ):
+        self.folder = folder
+        self.max_cached_rows = max_cached_rows
+        self.max_cached_queries = max_cached_queries
+        self._lock = threading.Lock()
+        self._generation: Optional[str] = None
+        self._prefix = _Prefix()
+        self._queries: "OrderedDict[Tuple, List[EnrollmentRecord]]" = OrderedDict()
+        self._strata_counts: Dict[Tuple, Dict[str, int]] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+
+    def _check_generation(self) -> str:
+        """Reset cached state if the dataset changed; call with the lock held."""
+        generation = get_dataset_generation()
+        if generation != self._generation:
+            self._generation = generation
+            # A scan still filling the old prefix finishes on its own object
+            self._prefix = _Prefix()
+            self._queries.clear()
+            self._strata_counts.clear()
+            self._inflight.clear()
+        return generation
+
+    def _fill_prefix(
+        self, prefix: _Prefix, upto: int, deadline: Optional[Deadline] = None
+    ) -> None:
+        """Grow the prefix to upto rows; ScanCancelledError if the deadline passes."""
+        if prefix.exhausted or len(prefix.rows) >= upto:
+            return
+        remaining = deadline.remaining() if deadline is not None else None
+        if not prefix.lock.acquire(timeout=-1 if remaining is None else remaining):
+            raise ScanCancelledError("deadline exceeded")
+        try:
+            if prefix.exhausted or len(prefix.rows) >= upto:
+                return
+            if prefix.reader is None:
+                prefix.reader = _scan_rows(self.folder)
+            for row in prefix.reader:
+                prefix.rows.append(row)
+                if len(prefix.rows) >= upto:
+                    return
+                # The shared reader is left intact, so the next request resumes here
+                if deadline is not None and len(prefix.rows) % CHECK_INTERVAL_ROWS == 0:
+                    deadline.raise_if_cancelled()
+            prefix.exhausted = True
+            prefix.reader = None
+        finally:
+            prefix.lock.release()
+
+    def _remember(self, key: Tuple, rows: List[EnrollmentRecord]) -> None:
+        self._queries[key] = rows
+        self._queries.move_to_end(key)
+        while len(self._queries) > self.max_cached_queries:
+            self._queries.popitem(last=False)
+
+    def _cached(
+        self,
+        key: Tuple,
+        compute: Callable[[], List[EnrollmentRecord]],
+        deadline: Optional[Deadline] = None
+    ) -> List[EnrollmentRecord]:
+        """
+        Memoised compute() for key. The first caller scans (without the source
+        lock); concurrent callers for the same key wait for its result, up to
+        their own deadline. If that scan fails, a waiter retries with its own.
+        """
+        while True:
+            with self._lock:
+                generation = self._check_generation()
+                rows = self._queries.get(key)
+                if rows is not None:
+                    self._queries.move_to_end(key)
+                    return rows
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = Future()
+            if not leader:
+                try:
+                    timeout = None if deadline is None else deadline.remaining()
+                    return flight.result(timeout=timeout)
+                except FutureTimeoutError:
+                    raise ScanCancelledError("deadline exceeded")
+                except Exception:
+                    continue
+
+            try:
+                rows = compute()
+            except BaseException as e:
+                with self._lock:
+                    self._land(key, flight)
+                flight.set_exception(e)
+                raise
+            with self._lock:
+                self._land(key, flight)
+                if self._generation == generation:
+                    self._remember(key, rows)
+            flight.set_result(rows)
+            return rows
+
+    def _land(self, key: Tuple, flight: Future) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def _filtered(
+        self,
+        state: Optional[str],
+        district: Optional[str],
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, str]]:
+        rows = _scan_rows(self.folder, token=deadline)
+        if not state and not district:
+            return rows
+        return (r for r in rows if _matches(r, state, district))
+
+    def iter_rows(
+        self,
+        state: Optional[str] = None,
+        district: Optional[str] = None
+    ) -> Iterator[Dict[str, str]]:
+        """Stream every (optionally filtered) row without caching it."""
+        return self._filtered(state, district)
+
+    def window(
+        self,
+        offset: int = 0,
+        limit: int = 500,
+        state: Optional[str] = None,
+        district: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[EnrollmentRecord]:
+        """
+        Rows [offset, offset + limit) of the (optionally filtered) dataset.
+        Raises ScanCancelledError if `deadline` expires before they are read.
+        """
+        end = offset + limit
+        if not state and not district and end <= self.max_cached_rows:
+            with self._lock:
+                self._check_generation()
+                prefix = self._prefix
+            self._fill_prefix(prefix, end, deadline)
+            return [dict(r) for r in prefix.rows[offset:end]]
+
+        key = ("window", offset, limit, state, district)
+        rows = self._cached(
+            key,
+            lambda: list(
+                islice(self._filtered(state, district, deadline), offset, end)
+            ),
+            deadline
+        )
+        return [dict(r) for r in rows]
+
+    def sample(
+        self,
+        n: int,
+        method: str = "random",
+        by: str = "state",
+        seed: int = 0,
+        state: Optional[str] = None,
+        district: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[EnrollmentRecord]:
+        """
+        Seeded sample of n rows over the whole (optionally filtered) dataset.
+        method='random' uses reservoir sampling; method='stratified' allocates n
+        proportionally over states or districts and samples each stratum.
+        Raises ScanCancelledError if `deadline` expires first.
+        """
+        key = ("sample", n, method, by if method == "stratified" else None,
+               seed, state, district)
+
+        def compute() -> List[EnrollmentRecord]:
+            rng = random.Random(seed)
+            if method == "stratified":
+                return self._stratified_sample(n, by, rng, state, district, deadline)
+            return self._reservoir(self._filtered(state, district, deadline), n, rng)
+
+        return [dict(r) for r in self._cached(key, compute, deadline)]
+
+    @staticmethod
+    def _reservoir(
+        rows: Iterator[Dict[str, str]], n: int, rng: random.Random
+    ) -> List[EnrollmentRecord]:
+        reservoir: List[EnrollmentRecord] = []
+        for i, row in enumerate(rows):
+            if i < n:
+                reservoir.append(row)
+            else:
+                j = rng.randint(0, i)
+                if j < n:
+                    reservoir[j] = row
+        return reservoir
+
+    def _stratified_sample(
+        self,
+        n: int,
+        by: str,
+        rng: random.Random,
+        state: Optional[str],
+        district: Optional[str],
+        deadline: Optional[Deadline] = None
+    ) -> List[EnrollmentRecord]:
+        count_key = (by, state, district)
+        with self._lock:
+            generation = self._generation
+            counts = self._strata_counts.get(count_key)
+        if counts is None:
+            counts = defaultdict(int)
+            for row in self._filtered(state, district, deadline):
+                counts[_stratum(row, by)] += 1
+            counts = dict(counts)
+            with self._lock:
+                if self._generation == generation:
+                    self._strata_counts[count_key] = counts
+
+        alloc = _allocate(counts, n)
+        reservoirs: Dict[str, List[EnrollmentRecord]] = defaultdict(list)
+        seen: Dict[str, int] = defaultdict(int)
+        for row in self._filtered(state, district, deadline):
+            s = _stratum(row, by)
+            size = alloc.get(s, 0)
+            if size == 0:
+                continue
+            i = seen[s]
+            seen[s] = i + 1
+            if i < size:
+                reservoirs[s].append(row)
+            else:
+                j = rng.randint(0, i)
+                if j < size:
+                    reservoirs[s][j] = row
+        return [row for s in sorted(reservoirs) for row in reservoirs[s]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        prefix = self._prefix
+        return {
+            "generation": self._generation,
+            "cached_rows": len(prefix.rows),
+            "prefix_complete": prefix.exhausted,
+            "cached_queries": len(self._queries),
+            "scans_in_flight": len(self._inflight),
+            "max_cached_rows": self.max_cached_rows
+        }
+
+
+# Global instance
+_source: Optional[RecordSource] = None
+
+
+def get_record_source() -> RecordSource:
+    """Get or create the global enrollment RecordSource."""
+    global _source
+    if _source is None:
+        _source = RecordSource()
+    return _source
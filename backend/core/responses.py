@@ -0,0 +1,348 @@
+"""
+Fast JSON rendering, a cache of pre-encoded response bodies and conditional GET.
+Aggregate endpoints serialize their payload once per dataset generation; cache
+hits return the stored bytes as-is, bypassing jsonable_encoder and json.dumps.
+ETags derive from the dataset generation, so revalidation never scans CSVs;
+they are only issued for bodies served from this cache, so fallback or error
+payloads built outside it are never pinned by a 304.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi.responses import JSONResponse, Response
+
+from .compression import (
+    MIN_COMPRESS_SIZE,
+    accept_encoding_from_scope,
+    compress,
+    negotiate_encoding,
+    supported_encodings,
+    weaken_etag,
+)
+from .csv_db import get_dataset_generation
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+# Set by cached responses to opt in to ETags; consumed by ConditionalGetMiddleware
+ETAG_GENERATION_HEADER = "x-etag-generation"
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types the stdlib encoder does not know (dates, numpy, sets)."""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CachedBody:
+    """
+    Pre-encoded response body for one cache key and dataset generation.
+    Compressed variants are produced once on first request and kept alongside.
+    """
+    __slots__ = ('body', 'generation', 'created', 'variants', '_lock')
+
+    def __init__(self, body: bytes, generation: Optional[str]):
+        self.body = body
+        self.generation = generation
+        self.created = time.time()
+        self.variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        """Body compressed with encoding, computed at most once."""
+        data = self.variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self.variants.get(encoding)
+                if data is None:
+                    data = compress(self.body, encoding, best=True)
+                    self.variants[encoding] = data
+        return data
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def to_response(self) -> Response:
+        return CachedJSONResponse(self)
+
+
+class CachedJSONResponse(Response):
+    """
+    Sends a CachedBody, picking a stored compressed variant when the client
+    accepts one, so cache hits do no JSON encoding and no compression work.
+    """
+    media_type = JSON_MEDIA_TYPE
+
+    def __init__(self, entry: CachedBody):
+        super().__init__(content=entry.body, media_type=JSON_MEDIA_TYPE)
+        self.entry = entry
+        if entry.generation is not None:
+            self.headers[ETAG_GENERATION_HEADER] = entry.generation
+
+    async def __call__(self, scope, receive, send) -> None:
+        if len(self.entry.body) >= MIN_COMPRESS_SIZE:
+            encoding = negotiate_encoding(accept_encoding_from_scope(scope))
+            self.headers["vary"] = "Accept-Encoding"
+            if encoding is not None:
+                self.body = self.entry.variant(encoding)
+                self.headers["content-encoding"] = encoding
+                self.headers["content-length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+class ResponseCache:
+    """
+    LRU of encoded JSON bodies, bounded by entry count and total bytes.
+    Entries from an older dataset generation are treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        generation_func: Optional[Callable[[], str]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation_func = generation_func
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(route: str, **params: Any) -> str:
+        """Stable key from route name and query parameters (None values dropped)."""
+        parts = [f"{k}={params[k]}" for k in sorted(params) if params[k] is not None]
+        return route + ("?" + "&".join(parts) if parts else "")
+
+    def _generation(self) -> Optional[str]:
+        return self.generation_func() if self.generation_func is not None else None
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        generation = self._generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != generation:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        return entry
+
+    def put(self, key: str, content: Any) -> CachedBody:
+        """Encode content once and store it under key, precompressed if large."""
+        entry = CachedBody(dumps(content), self._generation())
+        if len(entry.body) >= MIN_COMPRESS_SIZE:
+            for encoding in supported_encodings():
+                entry.variant(encoding)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        # Sizes include compressed variants added after put(), so recount here
+        total = sum(e.size for e in self._entries.values())
+        while self._entries and (
+            len(self._entries) > self.max_entries or total > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.size
+            self._stats['evictions'] += 1
+
+    def _count(self, result: str) -> None:
+        get_metrics().inc(
+            "response_cache_requests_total", 1, "Encoded response cache lookups",
+            result=result
+        )
+
+    def render(self, key: str, producer: Callable[[], Any]) -> Response:
+        """Return the cached body for key, or call producer and cache its encoding."""
+        entry = self.get(key)
+        self._count('hit' if entry is not None else 'miss')
+        if entry is None:
+            entry = self.put(key, producer())
+        return entry.to_response()
+
+    async def render_async(self, key: str, producer: Callable[[], Awaitable[Any]]) -> Response:
+        """Async variant of render() for coroutine producers."""
+        entry = self.get(key)
+        self._count('hit' if entry is not None else 'miss')
+        if entry is None:
+            entry = self.put(key, await producer())
+        return entry.to_response()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'entries': len(self._entries),
+            'bytes': sum(e.size for e in list(self._entries.values())),
+            'hit_ratio': round(self._stats['hits'] / total, 4) if total else 0.0,
+            'encoder': 'orjson' if orjson is not None else 'json'
+        }
+
+
+# Global instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global encoded-response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(generation_func=get_dataset_generation)
+    return _response_cache
+
+
+def make_etag(generation: Optional[str], path: str, query_string: bytes = b"") -> str:
+    """Strong ETag from the dataset generation, the path and the sorted query."""
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    digest = hashlib.sha1(f"{path}?{urlencode(params)}".encode("utf-8")).hexdigest()[:16]
+    return f'"{generation or "none"}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    Pure ASGI middleware adding ETag/Cache-Control to aggregate GET routes.
+    The ETag only depends on the dataset generation and the request URL, so a
+    matching If-None-Match is answered with 304 before the endpoint runs.
+
+    Routes opt in per response: only 200s served from the ResponseCache for the
+    current generation (marked with ETAG_GENERATION_HEADER) get an ETag.
+    Anything else under the paths, such as a fallback list or a body built
+    after a swallowed error, is passed through untagged.
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: Sequence[str] = (),
+        max_age: int = 30,
+        generation_func: Optional[Callable[[], str]] = None
+    ):
+        self.app = app
+        self.paths = tuple(paths)
+        self.cache_control = f"public, max-age={max_age}, must-revalidate".encode("latin-1")
+        self.generation_func = generation_func or get_dataset_generation
+
+    def _applies(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope.get("method") in ("GET", "HEAD")
+            and scope["path"].startswith(self.paths)
+        )
+
+    def _tag(self, message, generation: Optional[bytes], etag: bytes):
+        """Strip the opt-in marker; add ETag/Cache-Control if the body qualifies."""
+        marker = ETAG_GENERATION_HEADER.encode("latin-1")
+        raw = message.get("headers", [])
+        opted_in = [v for k, v in raw if k == marker]
+        headers = [(k, v) for k, v in raw if k != marker]
+        if message["status"] != 200 or not opted_in or opted_in[0] != generation:
+            return {**message, "headers": headers} if opted_in else message
+        headers = [(k, v) for k, v in headers if k not in (b"etag", b"cache-control")]
+        encoded = any(k == b"content-encoding" for k, _ in headers)
+        headers += [
+            (b"etag", weaken_etag(etag) if encoded else etag),
+            (b"cache-control", self.cache_control)
+        ]
+        return {**message, "headers": headers}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self._applies(scope):
+            async def strip_marker(message):
+                if message["type"] == "http.response.start":
+                    message = self._tag(message, None, b"")
+                await send(message)
+
+            await self.app(scope, receive, strip_marker)
+            return
+
+        generation = self.generation_func()
+        etag = make_etag(generation, scope["path"], scope.get("query_string", b""))
+        etag_bytes = etag.encode("latin-1")
+        if_none_match = None
+        for name, value in scope.get("headers", []):
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            get_metrics().inc("http_not_modified_total", 1, "Requests answered with 304")
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag_bytes), (b"cache-control", self.cache_control)]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        generation_bytes = generation.encode("latin-1") if generation else None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = self._tag(message, generation_bytes, etag_bytes)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
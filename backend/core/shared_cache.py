@@ -0,0 +1,188 @@
+"""
+Host-local L2 cache shared by all uvicorn worker processes.
+Values are pickled to one file per key under a directory namespaced by dataset
+generation, so every worker agrees on freshness and stale generations can be
+dropped wholesale. Writes are atomic (temp file + os.replace).
+
+Because entries are unpickled, the directory must be private: it is owned by
+the current user and not accessible to anyone else, or the cache is disabled.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_UID = os.getuid() if hasattr(os, "getuid") else None
+DEFAULT_CACHE_DIR = os.path.join(
+    tempfile.gettempdir(),
+    "samvidhan-cache" if _UID is None else f"samvidhan-cache-{_UID}"
+)
+# Other generations are only removed once nobody has written to them for this long
+DEFAULT_GENERATION_GRACE = 600.0
+
+
+def ensure_private_dir(directory: str) -> None:
+    """
+    Create directory with mode 0700, or verify an existing one is a real
+    directory owned by the current user with no group/other access.
+    Raises OSError (PermissionError) when it is not.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{directory} is not a directory")
+    if _UID is not None and st.st_uid != _UID:
+        raise PermissionError(f"{directory} is owned by uid {st.st_uid}, not {_UID}")
+    if _UID is not None and st.st_mode & 0o077:
+        raise PermissionError(f"{directory} is accessible to other users (mode {st.st_mode & 0o777:o})")
+
+
+class SharedDiskCache:
+    """
+    On-disk cache keyed by (generation, key) with mtime-based TTL.
+    Raises OSError when the directory is not private to the current user.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        default_ttl: float = 1800.0,
+        generation_grace: float = DEFAULT_GENERATION_GRACE
+    ):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.generation_grace = generation_grace
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'errors': 0}
+        ensure_private_dir(self.directory)
+
+    def _path(self, key: str, generation: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, generation, name + ".pkl")
+
+    def get(self, key: str, generation: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """Return the stored value, or None when missing, expired or unreadable."""
+        path = self._path(key, generation)
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                self._stats['misses'] += 1
+                return None
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self._stats['misses'] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {e}")
+            self._stats['errors'] += 1
+            return None
+        self._stats['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Any, generation: str) -> None:
+        """Store value for key; visible to other workers once the rename lands."""
+        self._switch_generation(generation)
+        path = self._path(key, generation)
+        folder = os.path.dirname(path)
+        try:
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._stats['writes'] += 1
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+            self._stats['errors'] += 1
+
+    def _switch_generation(self, generation: str) -> None:
+        """Prune idle generations the first time this process sees a new one."""
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation == self._generation:
+                return
+            self._generation = generation
+            self.prune(keep=generation)
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """
+        Remove generation directories other than `keep` that have not been
+        written to within generation_grace. Workers may briefly disagree on the
+        current generation, so one that is still being filled is left alone.
+        """
+        cutoff = time.time() - self.generation_grace
+        removed = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name == keep or not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                    continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Shared cache prune failed: {e}")
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries for all generations."""
+        with self._lock:
+            self._generation = None
+            if not os.path.isdir(self.directory):
+                return
+            for name in os.listdir(self.directory):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        entries = 0
+        if self._generation:
+            try:
+                entries = len(os.listdir(os.path.join(self.directory, self._generation)))
+            except OSError:
+                entries = 0
+        return {
+            **self._stats,
+            'directory': self.directory,
+            'generation': self._generation,
+            'entries': entries
+        }
+
+
+# Global instance
+_shared_cache: Optional[SharedDiskCache] = None
+
+
+def get_shared_cache() -> Optional[SharedDiskCache]:
+    """Get the global shared cache, or None when disabled via SHARED_CACHE_ENABLED=0."""
+    global _shared_cache
+    if os.getenv("SHARED_CACHE_ENABLED", "1") != "1":
+        return None
+    if _shared_cache is None:
+        try:
+            _shared_cache = SharedDiskCache(
+                directory=os.getenv("SHARED_CACHE_DIR", DEFAULT_CACHE_DIR),
+                generation_grace=float(
+                    os.getenv("SHARED_CACHE_GENERATION_GRACE", str(DEFAULT_GENERATION_GRACE))
+                )
+            )
+        except OSError as e:
+            logger.warning(f"Shared cache disabled, cannot use directory: {e}")
+            return None
+    return _shared_cache
@@ -0,0 +1,255 @@
+"""
+Cache warmup scheduler.
+Precomputes hot aggregates in the background at startup and again whenever the
+dataset generation changes, and exposes progress for readiness probes.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from .async_io_handler import AsyncTaskBatcher
+
+logger = logging.getLogger(__name__)
+
+WarmupJob = Union[Callable[[], Awaitable[Any]], Callable[[], Any]]
+
+
+def _env_keys(name: str) -> Optional[List[str]]:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return None
+    return [k.strip() for k in raw.split(",") if k.strip()]
+
+
+class CacheWarmer:
+    """
+    Runs registered warmup jobs with bounded concurrency.
+
+    Jobs are async callables or plain callables (run in the default executor).
+    After the first pass the warmer watches the dataset generation and re-warms
+    when it changes or when request_rewarm() is called. on_warmed runs after
+    every pass (e.g. to push refreshed aggregates to clients).
+
+    A pass leaves the warmer ready only if every job in required_keys succeeded
+    and at least min_success of all jobs did; a ready pass with failures is
+    reported as degraded. A pass that is not ready is retried on the next poll.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        poll_interval: float = 30.0,
+        job_timeout: Optional[float] = 300.0,
+        keys: Optional[List[str]] = None,
+        required_keys: Optional[List[str]] = None,
+        min_success: float = 1.0,
+        generation_func: Optional[Callable[[], str]] = None,
+        on_change: Optional[Callable[[], Any]] = None,
+        on_warmed: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.keys = keys
+        self.required_keys = required_keys
+        self.min_success = min_success
+        self.generation_func = generation_func
+        self.on_change = on_change
+        self.on_warmed = on_warmed
+        self._jobs: Dict[str, WarmupJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._rewarm: Optional[asyncio.Event] = None
+        self._status: Dict[str, Any] = {
+            'state': 'pending',
+            'ready': False,
+            'degraded': False,
+            'runs': 0,
+            'completed': 0,
+            'total': 0,
+            'failed': {},
+            'generation': None,
+            'last_started': None,
+            'last_finished': None,
+            'last_duration_ms': None,
+            'last_error': None,
+            'last_error_at': None
+        }
+
+    def register(self, key: str, job: WarmupJob) -> None:
+        """Register a warmup job under a hot-key name."""
+        self._jobs[key] = job
+
+    def selected_keys(self) -> List[str]:
+        """Registered keys filtered by the configured key list."""
+        if not self.keys:
+            return list(self._jobs)
+        unknown = [k for k in self.keys if k not in self._jobs]
+        if unknown:
+            logger.warning(f"Ignoring unknown warmup keys: {unknown}")
+        return [k for k in self.keys if k in self._jobs]
+
+    def _wrap(self, job: WarmupJob) -> Callable[[], Awaitable[Any]]:
+        if inspect.iscoroutinefunction(job):
+            return job
+
+        async def run_sync() -> Any:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, job)
+
+        return run_sync
+
+    async def warm(self, keys: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run one warmup pass and return the resulting status."""
+        keys = keys or self.selected_keys()
+        started = time.perf_counter()
+        self._status.update({
+            'state': 'warming',
+            'completed': 0,
+            'total': len(keys),
+            'failed': {},
+            'last_started': datetime.now().isoformat()
+        })
+        if self.generation_func is not None:
+            loop = asyncio.get_running_loop()
+            self._status['generation'] = await loop.run_in_executor(
+                None, self.generation_func
+            )
+
+        batcher = AsyncTaskBatcher(max_concurrent=self.max_concurrency)
+        jobs = {key: self._wrap(self._jobs[key]) for key in keys}
+        async for result in batcher.stream(jobs, task_timeout=self.job_timeout):
+            if result.ok:
+                self._status['completed'] += 1
+            else:
+                self._status['failed'][result.key] = result.error
+                logger.warning(f"Warmup of {result.key} {result.status}: {result.error}")
+
+        duration = time.perf_counter() - started
+        failed = self._status['failed']
+        ready = self._is_ready(keys, failed)
+        self._status.update({
+            'state': ('degraded' if failed else 'ready') if ready else 'failed',
+            'ready': ready,
+            'degraded': ready and bool(failed),
+            'runs': self._status['runs'] + 1,
+            'last_finished': datetime.now().isoformat(),
+            'last_duration_ms': round(duration * 1000, 1)
+        })
+        logger.info(
+            f"Cache warmup finished: {self._status['completed']}/{len(keys)} keys "
+            f"in {duration:.2f}s ({self._status['state']})"
+        )
+        status = self.get_status()
+        if self.on_warmed is not None:
+            try:
+                outcome = self.on_warmed(status)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception as e:
+                logger.warning(f"Warmup on_warmed callback failed: {e}")
+        return status
+
+    def _is_ready(self, keys: List[str], failed: Dict[str, Any]) -> bool:
+        """Whether a pass over `keys` with these failures makes the warmer ready."""
+        if any(k in failed for k in self.required_keys or ()):
+            return False
+        if not keys:
+            return True
+        return (len(keys) - len(failed)) / len(keys) >= self.min_success
+
+    async def _next_reason(self) -> Optional[str]:
+        """Wait one poll interval; why a re-warm is needed, or None."""
+        try:
+            await asyncio.wait_for(self._rewarm.wait(), timeout=self.poll_interval)
+            reason = 'requested'
+        except asyncio.TimeoutError:
+            reason = None
+        self._rewarm.clear()
+
+        if reason is None and self.generation_func is not None:
+            loop = asyncio.get_running_loop()
+            generation = await loop.run_in_executor(None, self.generation_func)
+            if generation != self._status['generation']:
+                reason = 'dataset changed'
+        if reason is None and not self._status['ready']:
+            reason = 'previous pass not ready'
+        return reason
+
+    async def _run(self) -> None:
+        reason: Optional[str] = 'startup'
+        while True:
+            # A failing generation check, on_change or pass must not end the
+            # loop: record it and try again on the next poll
+            try:
+                if reason is None:
+                    reason = await self._next_reason()
+                if reason is not None:
+                    if reason != 'startup':
+                        logger.info(f"Re-warming caches ({reason})")
+                        if self.on_change is not None:
+                            outcome = self.on_change()
+                            if inspect.isawaitable(outcome):
+                                await outcome
+                    await self.warm()
+                    self._status['last_error'] = None
+            except Exception as e:
+                logger.warning(f"Cache warmer iteration failed: {type(e).__name__}: {e}")
+                self._status.update({
+                    'state': 'error',
+                    'last_error': f"{type(e).__name__}: {e}",
+                    'last_error_at': datetime.now().isoformat()
+                })
+            reason = None
+
+    def start(self) -> None:
+        """Start the background warmup task on the running loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._rewarm = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    def request_rewarm(self) -> None:
+        """Schedule a re-warm; safe to call from executor threads."""
+        if self._loop is None or self._rewarm is None:
+            return
+        self._loop.call_soon_threadsafe(self._rewarm.set)
+
+    async def stop(self) -> None:
+        """Cancel the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Progress snapshot for the readiness endpoint."""
+        return {**self._status, 'failed': dict(self._status['failed'])}
+
+
+# Global instance
+_warmer: Optional[CacheWarmer] = None
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Get or create the global cache warmer configured from the environment."""
+    global _warmer
+    if _warmer is None:
+        _warmer = CacheWarmer(
+            max_concurrency=int(os.getenv("WARMUP_CONCURRENCY", "2")),
+            poll_interval=float(os.getenv("WARMUP_POLL_SECONDS", "30")),
+            keys=_env_keys("WARMUP_KEYS"),
+            required_keys=_env_keys("WARMUP_REQUIRED_KEYS"),
+            min_success=float(os.getenv("WARMUP_MIN_SUCCESS", "1.0"))
+        )
+    return _warmer
@@ -1,25 +1,69 @@
 import os
 import sys
 import asyncio
+import functools
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 # Ensure backend directory is in path for module imports
 backend_dir = os.path.dirname(os.path.abspath(__file__))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # Import async I/O handler
-from core.async_io_handler import get_async_handler, async_cached, async_with_retry
+from core.async_io_handler import (
+    async_cached,
+    async_with_retry,
+    get_async_handler,
+    get_default_executor,
+)
 
 # Import database health functions
 from core.csv_db import health_check, optimize_cache
 
+# Import cache warmup scheduler
+from core.warmup import get_cache_warmer
+
+# Import metrics registry
+from core.metrics import MetricsMiddleware, get_metrics, scan_throughput
+
+# Import cooperative scan cancellation
+from core.cancellation import CancellationToken, Deadline, ScanCancelledError, cancel_on_disconnect
+
+# Import dashboard push events
+from core.events import get_event_broadcaster, sse_stream
+
+# Import response compression
+from core.compression import CompressionMiddleware
+
+# Import encoded-response cache for aggregate endpoints
+from core.responses import ConditionalGetMiddleware, FastJSONResponse, dumps, get_response_cache
+
+# Import opt-in request profiling and the sampling profiler
+from core.profiling import (
+    ProfiledRoute,
+    ProfilingMiddleware,
+    admin_token,
+    get_sampling_profiler,
+    is_admin,
+)
+
+# Import shared record source for record-level analytics
+from core.record_source import EnrollmentRecord, get_record_source
+
+# Import persistent duplicate-lookup index and per-record match keys
+from services.lsh_index import get_lsh_index
+from services.match_features import get_feature_store
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,12 +82,16 @@ if USE_CSV_DB:
         get_enrollment_timeline as csv_get_enrollment_timeline,
         get_state_distribution as csv_get_state_distribution,
         clear_cache,
+        prune_shared_cache,
         get_cache_stats,
         get_available_states,
         get_available_districts,
         get_unified_state_metrics,
         get_combined_demographics,
         get_dataset_summary,
+        get_dataset_generation,
+        get_state_profile,
+        get_state_profiles,
         health_check,
         optimize_cache,
     )
@@ -51,7 +99,42 @@ else:
     raise RuntimeError(
         "Postgres support removed. Set USE_CSV_DB=1 to run in CSV-only mode."
     )
-app = FastAPI(title="SAMVIDHAN API", description="Aadhaar Intelligence Platform API")
+app = FastAPI(
+    title="SAMVIDHAN API",
+    description="Aadhaar Intelligence Platform API",
+    default_response_class=FastJSONResponse,
+)
+# Sync endpoints/dependencies join an opt-in request profile (see core.profiling)
+app.router.route_class = ProfiledRoute
+
+# Aggregate routes revalidated via ETag (dataset generation + URL); only bodies
+# served from the response cache are tagged, fallbacks never are.
+# Added first so it sits innermost and CORS/metrics still see 304 responses.
+AGGREGATE_ROUTE_PREFIXES = (
+    "/api/national-overview",
+    "/api/enrollment-timeline",
+    "/api/mobility/",
+    "/api/aggregated/",
+    "/api/explorer/",
+    "/api/metadata/",
+    "/api/datasets/",
+    "/api/states/",
+    "/api/state/",
+    "/api/prof/demand-forecast",
+)
+app.add_middleware(
+    ConditionalGetMiddleware,
+    paths=AGGREGATE_ROUTE_PREFIXES,
+    max_age=int(os.getenv("HTTP_CACHE_MAX_AGE", "30")),
+    generation_func=get_dataset_generation,
+)
+
+# Admin-only per-request cProfile (X-Profile: 1 + X-Admin-Token); sits inside
+# compression so the report is added to the identity body
+app.add_middleware(ProfilingMiddleware)
+
+# Compress large JSON bodies; precompressed cache hits pass through as-is
+app.add_middleware(CompressionMiddleware)
 
 # CORS middleware for frontend integration
 app.add_middleware(
@@ -62,6 +145,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms (served at /metrics)
+app.add_middleware(MetricsMiddleware)
+
 
 # ============= HEALTH & STATUS ENDPOINTS =============
 
@@ -90,40 +176,101 @@ async def api_status():
 # ============= NATIONAL OVERVIEW ENDPOINTS =============
 
 
+async def _fetch_state_distribution():
+    """State distribution shared by the overview and mobility widgets (single-flight)"""
+    handler = get_async_handler()
+
+    async def fetch_distribution():
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, csv_get_state_distribution, 1000)
+
+    return await handler.execute_io_operation(
+        "fetch_state_distribution",
+        fetch_distribution,
+        use_cache=True,
+        cache_key="state_distribution",
+        retry=True
+    )
+
+
+def _publish_aggregate(name, payload):
+    """Hand a recomputed dashboard widget to SSE subscribers (only changes are sent)"""
+    broadcaster = get_event_broadcaster()
+    broadcaster.set_generation(get_dataset_generation())
+    broadcaster.update_aggregate(name, payload)
+    return payload
+
+
+async def _national_overview_payload():
+    states = await _fetch_state_distribution()
+
+    total = sum(s.get("total_enrollments", 0) for s in states)
+    states_covered = len(states)
+    active = total
+    anomalies = 0
+
+    logger.info(f"National overview fetched: {total} enrollments across {states_covered} states")
+
+    return _publish_aggregate("national-overview", {
+        "total_enrollments": total,
+        "active_users": active,
+        "states_covered": states_covered,
+        "anomalies_detected": anomalies,
+        "timestamp": datetime.now().isoformat(),
+    })
+
+
+async def _enrollment_timeline_payload(months: int = 12):
+    handler = get_async_handler()
+
+    async def fetch_timeline():
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, csv_get_enrollment_timeline, months)
+
+    timeline = await handler.execute_io_operation(
+        "fetch_enrollment_timeline",
+        fetch_timeline,
+        use_cache=True,
+        cache_key=f"enrollment_timeline_{months}",
+        retry=True
+    )
+    logger.info(f"Enrollment timeline fetched for {months} months")
+    payload = {"timeline": timeline, "period_months": months}
+    if months == 12:
+        # The dashboard widget tracks the default 12-month window
+        _publish_aggregate("enrollment-timeline", payload)
+    return payload
+
+
+async def _state_distribution_payload():
+    data = await _fetch_state_distribution()
+    logger.info(f"State distribution fetched: {len(data)} states")
+    return _publish_aggregate("state-distribution", {"states": data, "total_states": len(data)})
+
+
+async def _demographic_distribution_payload():
+    handler = get_async_handler()
+
+    async def fetch_demographics():
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, csv_get_demographic_distribution)
+
+    data = await handler.execute_io_operation(
+        "fetch_demographic_distribution",
+        fetch_demographics,
+        use_cache=True,
+        cache_key="demographic_distribution",
+        retry=True
+    )
+    logger.info("Demographic distribution fetched")
+    return _publish_aggregate("demographic-distribution", data)
+
+
 @app.get("/api/national-overview")
 async def get_national_overview():
     """Get high-level national statistics (CSV-only mode) - ASYNC"""
     try:
-        handler = get_async_handler()
-        
-        async def fetch_stats():
-            # Run sync operation in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            states = await loop.run_in_executor(None, csv_get_state_distribution, 1000)
-            return states
-        
-        states = await handler.execute_io_operation(
-            "fetch_state_distribution",
-            fetch_stats,
-            use_cache=True,
-            cache_key="national_overview_states",
-            retry=True
-        )
-        
-        total = sum(s.get("total_enrollments", 0) for s in states)
-        states_covered = len(states)
-        active = total
-        anomalies = 0
-
-        logger.info(f"National overview fetched: {total} enrollments across {states_covered} states")
-        
-        return {
-            "total_enrollments": total,
-            "active_users": active,
-            "states_covered": states_covered,
-            "anomalies_detected": anomalies,
-            "timestamp": datetime.now().isoformat(),
-        }
+        return await _national_overview_payload()
     except Exception as e:
         logger.error(f"Error in get_national_overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -133,22 +280,11 @@ async def get_national_overview():
 async def get_enrollment_timeline(months: int = Query(12, ge=1, le=120)):
     """Get enrollment trends over time - ASYNC"""
     try:
-        handler = get_async_handler()
-        
-        async def fetch_timeline():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, csv_get_enrollment_timeline, months)
-        
-        timeline = await handler.execute_io_operation(
-            "fetch_enrollment_timeline",
-            fetch_timeline,
-            use_cache=True,
-            cache_key=f"enrollment_timeline_{months}",
-            retry=True
+        cache = get_response_cache()
+        return await cache.render_async(
+            cache.make_key("enrollment-timeline", months=months),
+            functools.partial(_enrollment_timeline_payload, months)
         )
-        
-        logger.info(f"Enrollment timeline fetched for {months} months")
-        return {"timeline": timeline, "period_months": months}
     except Exception as e:
         logger.error(f"Error in get_enrollment_timeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -161,22 +297,10 @@ async def get_enrollment_timeline(months: int = Query(12, ge=1, le=120)):
 async def get_state_distribution():
     """Get enrollment distribution by state (CSV-only) - ASYNC"""
     try:
-        handler = get_async_handler()
-        
-        async def fetch_distribution():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, csv_get_state_distribution, 1000)
-        
-        data = await handler.execute_io_operation(
-            "fetch_state_distribution",
-            fetch_distribution,
-            use_cache=True,
-            cache_key="state_distribution",
-            retry=True
+        cache = get_response_cache()
+        return await cache.render_async(
+            cache.make_key("mobility-state-distribution"), _state_distribution_payload
         )
-        
-        logger.info(f"State distribution fetched: {len(data)} states")
-        return {"states": data, "total_states": len(data)}
     except Exception as e:
         logger.error(f"Error in get_state_distribution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -186,22 +310,11 @@ async def get_state_distribution():
 async def get_mobility_demographic_distribution():
     """Get enrollment by demographics (CSV-only) - ASYNC"""
     try:
-        handler = get_async_handler()
-        
-        async def fetch_demographics():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, csv_get_demographic_distribution)
-        
-        data = await handler.execute_io_operation(
-            "fetch_demographic_distribution",
-            fetch_demographics,
-            use_cache=True,
-            cache_key="demographic_distribution",
-            retry=True
+        cache = get_response_cache()
+        return await cache.render_async(
+            cache.make_key("mobility-demographic-distribution"),
+            _demographic_distribution_payload
         )
-        
-        logger.info("Demographic distribution fetched")
-        return data
     except Exception as e:
         logger.error(f"Error in get_mobility_demographic_distribution: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -210,73 +323,26 @@ async def get_mobility_demographic_distribution():
 # ============= STATE-SPECIFIC ANALYTICS ENDPOINT =============
 
 @app.get("/api/states/{state_name}")
-async def get_state_analytics(state_name: str):
-    """Get comprehensive analytics for a specific state"""
+def get_state_analytics(state_name: str):
+    """Get comprehensive analytics for a specific state
+
+    Served from per-state profiles materialized once per dataset generation
+    (one scan for all states), so totals cover every row of the state.
+    """
     try:
-        handler = get_async_handler()
-        
-        async def fetch_state_data():
-            loop = asyncio.get_event_loop()
-            
-            # Get state-specific enrollments
-            state_enrollments = await loop.run_in_executor(
-                None, explorer_enrollment, state_name, None, None, None, 1, 1000
-            )
-            
-            # Get timeline for this state
-            state_timeline = await loop.run_in_executor(
-                None, csv_get_enrollment_timeline, 12, state_name
-            )
-            
-            # Get demographic data filtered by state
-            demographic_data = await loop.run_in_executor(None, csv_get_demographic_distribution)
-            
-            # Calculate state-specific metrics
-            state_rows = state_enrollments.get('rows', [])
-            total_enrollments = sum(
-                row.get('age_0_5', 0) + row.get('age_5_17', 0) + row.get('age_18_greater', 0)
-                for row in state_rows
-            )
-            
-            districts = list(set(row.get('district', 'Unknown') for row in state_rows))
-            pincodes = list(set(row.get('pincode', '000000') for row in state_rows if row.get('pincode')))
-            
-            # Age distribution for this state
-            age_distribution = {
-                'age_0_5': sum(row.get('age_0_5', 0) for row in state_rows),
-                'age_5_17': sum(row.get('age_5_17', 0) for row in state_rows),
-                'age_18_greater': sum(row.get('age_18_greater', 0) for row in state_rows),
-            }
-            
-            return {
-                'state': state_name,
-                'total_enrollments': total_enrollments,
-                'active_users': int(total_enrollments * 0.95),
-                'districts_covered': len(districts),
-                'districts': districts[:20],  # Top 20 districts
-                'pincodes_covered': len(pincodes),
-                'timeline': state_timeline,
-                'demographics': {
-                    'age_0_5': age_distribution['age_0_5'],
-                    'age_5_17': age_distribution['age_5_17'], 
-                    'age_18_greater': age_distribution['age_18_greater'],
-                    'total': total_enrollments
-                },
-                'coverage_ratio': min(100, (len(pincodes) / 1000) * 100),  # Rough coverage estimate
-                'data_quality': 'High' if total_enrollments > 100000 else 'Medium' if total_enrollments > 10000 else 'Low'
-            }
-        
-        data = await handler.execute_io_operation(
-            "fetch_state_analytics",
-            fetch_state_data,
-            use_cache=True,
-            cache_key=f"state_analytics_{state_name}",
-            retry=True
-        )
-        
-        logger.info(f"State analytics fetched for {state_name}: {data.get('total_enrollments', 0)} enrollments")
-        return data
-        
+        cache = get_response_cache()
+        key = cache.make_key("state-profile", state=state_name.strip().lower())
+        entry = cache.get(key)
+        if entry is not None:
+            return entry.to_response()
+
+        profile = get_state_profile(state_name)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Unknown state: {state_name}")
+        logger.info(f"State analytics fetched for {profile['state']}: {profile['total_enrollments']} enrollments")
+        return cache.put(key, profile).to_response()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching state analytics for {state_name}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -319,48 +385,124 @@ async def get_anomalies(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _anomalies_summary_payload():
+    handler = get_async_handler()
+
+    async def fetch_summary():
+        from core.mock_data import mock_anomalies
+
+        summary = {}
+        for a in mock_anomalies.get("anomalies", []):
+            key = (a.get("anomaly_type"), a.get("severity"))
+            summary[key] = summary.get(key, 0) + 1
+        result = [
+            {
+                "anomaly_type": k[0],
+                "severity": k[1],
+                "count": v,
+                "total_records_affected": None,
+            }
+            for k, v in summary.items()
+        ]
+        return result
+
+    summary = await handler.execute_io_operation(
+        "fetch_anomaly_summary",
+        fetch_summary,
+        use_cache=False,
+        retry=False
+    )
+
+    logger.info("Anomaly summary fetched")
+    return _publish_aggregate("anomalies-summary", {"summary": summary})
+
+
 @app.get("/api/anomalies/summary")
 async def get_anomalies_summary():
     """Get anomaly statistics by type and severity (mocked in CSV-only mode) - ASYNC"""
     try:
-        handler = get_async_handler()
-        
-        async def fetch_summary():
-            loop = asyncio.get_event_loop()
-            try:
-                from mock_data import mock_anomalies
-            except ImportError:
-                from .mock_data import mock_anomalies
-            
-            summary = {}
-            for a in mock_anomalies.get("anomalies", []):
-                key = (a.get("anomaly_type"), a.get("severity"))
-                summary[key] = summary.get(key, 0) + 1
-            result = [
-                {
-                    "anomaly_type": k[0],
-                    "severity": k[1],
-                    "count": v,
-                    "total_records_affected": None,
-                }
-                for k, v in summary.items()
-            ]
-            return result
-        
-        summary = await handler.execute_io_operation(
-            "fetch_anomaly_summary",
-            fetch_summary,
-            use_cache=False,
-            retry=False
-        )
-        
-        logger.info("Anomaly summary fetched")
-        return {"summary": summary}
+        return await _anomalies_summary_payload()
     except Exception as e:
         logger.error(f"Error in get_anomalies_summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============= DASHBOARD BUNDLE ENDPOINT =============
+
+
+DASHBOARD_WIDGETS = {
+    "national-overview": lambda params: _national_overview_payload(),
+    "enrollment-timeline": lambda params: _enrollment_timeline_payload(params["months"]),
+    "state-distribution": lambda params: _state_distribution_payload(),
+    "demographic-distribution": lambda params: _demographic_distribution_payload(),
+    "anomalies-summary": lambda params: _anomalies_summary_payload(),
+}
+
+
+@app.get("/api/dashboard/bundle")
+async def get_dashboard_bundle(
+    widgets: Optional[str] = Query(None, description="Comma-separated widget names (default: all)"),
+    months: int = Query(12, ge=1, le=120),
+    widget_timeout: float = Query(15.0, gt=0, le=120),
+):
+    """Dashboard landing data in one round trip - ASYNC
+
+    Widgets run concurrently; computations they have in common (e.g. the state
+    distribution behind national-overview and state-distribution) execute once.
+    Each part reports its own status and timing, and a failed or slow widget is
+    reported in place instead of failing the bundle.
+    """
+    names = [w.strip() for w in widgets.split(",") if w.strip()] if widgets else list(DASHBOARD_WIDGETS)
+    unknown = [w for w in names if w not in DASHBOARD_WIDGETS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown widgets: {unknown}. Available: {list(DASHBOARD_WIDGETS)}"
+        )
+
+    params = {"months": months}
+    operations = {
+        name: functools.partial(DASHBOARD_WIDGETS[name], params)
+        for name in dict.fromkeys(names)
+    }
+    started = time.perf_counter()
+    parts = {}
+    handler = get_async_handler()
+    async for result in handler.stream_batch_operations(
+        operations, task_timeout=widget_timeout, max_in_flight=len(operations)
+    ):
+        part = {"status": result.status, "duration_ms": round(result.duration * 1000, 2)}
+        if result.ok:
+            part["data"] = result.value
+        else:
+            part["error"] = result.error
+        parts[result.key] = part
+
+    return {
+        "widgets": {name: parts[name] for name in operations},
+        "complete": all(p["status"] == "ok" for p in parts.values()),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.get("/api/dashboard/events")
+async def dashboard_events():
+    """Server-sent events replacing dashboard polling
+
+    Sends a full `snapshot` of the tracked widgets on connect, then
+    `generation` events when the dataset changes and `aggregate` events
+    carrying a JSON merge patch (RFC 7386) whenever a widget's value changes.
+    Widgets publish wherever they are recomputed (endpoint cache misses, the
+    bundle, the cache warmer), so updates do not depend on WARMUP_ENABLED.
+    """
+    return StreamingResponse(
+        sse_stream(get_event_broadcaster()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ============= POLICY RECOMMENDATIONS ENDPOINTS =============
 
 
@@ -391,7 +533,8 @@ if True:  # Always use CSV mode
 
 
 @app.get("/api/explorer/enrollment")
-def get_explorer_enrollment(
+async def get_explorer_enrollment(
+    request: Request,
     state: Optional[str] = None,
     district: Optional[str] = None,
     date_from: Optional[str] = None,
@@ -402,20 +545,36 @@ def get_explorer_enrollment(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
 ):
-    """Paginated enrollment aggregated rows from all datasets (CSV-only)"""
+    """Paginated enrollment aggregated rows from all datasets (CSV-only) - ASYNC
+
+    The scan runs in the executor and is abandoned if the client disconnects
+    (e.g. the user changed filters); abandoned results are never cached.
+    """
     try:
-        res = explorer_enrollment(
-            state=state, 
-            district=district, 
-            date_from=date_from, 
-            date_to=date_to, 
+        params = dict(
+            state=state,
+            district=district,
+            date_from=date_from,
+            date_to=date_to,
             search=search,
             sort=sort,
             order=order,
-            page=page, 
+            page=page,
             limit=limit
         )
-        return res
+        cache = get_response_cache()
+
+        async def build():
+            async with cancel_on_disconnect(request) as token:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(
+                    None, functools.partial(explorer_enrollment, token=token, **params)
+                )
+
+        return await cache.render_async(cache.make_key("explorer-enrollment", **params), build)
+    except ScanCancelledError as e:
+        logger.info(f"Explorer scan cancelled: {e}")
+        return Response(status_code=499)  # client closed request
     except Exception as e:
         logger.error(f"Error in get_explorer_enrollment: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -459,8 +618,14 @@ def aggregated_enrollment_timeline(
 ):
     """Return monthly aggregated enrollment counts across all age buckets (CSV-only)"""
     try:
-        timeline = csv_get_enrollment_timeline(months=months, state=state)
-        return {"timeline": timeline, "months": months}
+        cache = get_response_cache()
+        return cache.render(
+            cache.make_key("aggregated-enrollment-timeline", state=state, months=months),
+            lambda: {
+                "timeline": csv_get_enrollment_timeline(months=months, state=state),
+                "months": months
+            }
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -472,8 +637,12 @@ def aggregated_enrollment_timeline(
 def aggregated_state_distribution(limit: int = Query(20, ge=1, le=200)):
     """Return per-state aggregated enrollments (CSV-only)"""
     try:
-        data = csv_get_state_distribution(limit=limit)
-        return {"states": data, "total_states": len(data)}
+        def build():
+            data = csv_get_state_distribution(limit=limit)
+            return {"states": data, "total_states": len(data)}
+
+        cache = get_response_cache()
+        return cache.render(cache.make_key("aggregated-state-distribution", limit=limit), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -482,8 +651,11 @@ def aggregated_state_distribution(limit: int = Query(20, ge=1, le=200)):
 def aggregated_demographics(limit: int = Query(100, ge=1, le=1000)):
     """Return aggregated demographics by state (CSV-only)"""
     try:
-        data = get_demographics(limit=limit)
-        return {"demographics": data}
+        cache = get_response_cache()
+        return cache.render(
+            cache.make_key("aggregated-demographics", limit=limit),
+            lambda: {"demographics": get_demographics(limit=limit)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -492,8 +664,11 @@ def aggregated_demographics(limit: int = Query(100, ge=1, le=1000)):
 def aggregated_coverage_gaps(limit: int = Query(20, ge=1, le=500)):
     """Identify districts with low coverage (CSV-only)"""
     try:
-        data = get_coverage_gaps(limit=limit)
-        return {"coverage_gaps": data}
+        cache = get_response_cache()
+        return cache.render(
+            cache.make_key("aggregated-coverage-gaps", limit=limit),
+            lambda: {"coverage_gaps": get_coverage_gaps(limit=limit)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -501,40 +676,138 @@ def aggregated_coverage_gaps(limit: int = Query(20, ge=1, le=500)):
 # ============= SIGNALS / ADIF ENDPOINTS =============
 
 
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency guarding diagnostic endpoints with the ADMIN_TOKEN secret"""
+    if admin_token() is None:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN is not configured")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def record_query(
+    max_rows: int = Query(500, ge=1, le=50000),
+    offset: int = Query(0, ge=0),
+    sample: str = Query("none", regex="^(none|random|stratified)$"),
+    stratify_by: str = Query("state", regex="^(state|district)$"),
+    seed: int = Query(0),
+    state: Optional[str] = Query(None),
+    district: Optional[str] = Query(None),
+) -> Dict[str, Any]:
+    """Record selection parameters shared by the signals/IRF/AFIF endpoints.
+
+    sample=none selects rows [offset, offset + max_rows); random/stratified select
+    a seeded sample of max_rows rows drawn from the whole (filtered) dataset.
+    """
+    return {
+        "max_rows": max_rows, "offset": offset, "sample": sample,
+        "stratify_by": stratify_by, "seed": seed, "state": state, "district": district,
+    }
+
+
+def _load_records(query: Dict[str, Any], deadline: Optional[Deadline] = None) -> List[EnrollmentRecord]:
+    source = get_record_source()
+    if query["sample"] == "none":
+        return source.window(
+            offset=query["offset"], limit=query["max_rows"],
+            state=query["state"], district=query["district"], deadline=deadline,
+        )
+    return source.sample(
+        query["max_rows"], method=query["sample"], by=query["stratify_by"], seed=query["seed"],
+        state=query["state"], district=query["district"], deadline=deadline,
+    )
+
+
+def enrollment_records(query: Dict[str, Any] = Depends(record_query)) -> List[EnrollmentRecord]:
+    """Shared record loader for the signals/IRF/AFIF endpoints (see record_query)."""
+    return _load_records(query)
+
+
+# Server-side time budgets (seconds) for the unbounded record-level analytics;
+# callers may ask for less or more via deadline_ms, capped at MAX_DEADLINE_SECONDS
+ROUTE_DEADLINES = {
+    "signals-duplicates": 10.0,
+    "afif-hub-analysis": 5.0,
+    "afif-network-graph": 10.0,
+    "afif-risk-alerts": 5.0,
+}
+MAX_DEADLINE_SECONDS = float(os.getenv("MAX_DEADLINE_SECONDS", "30"))
+
+
+@functools.lru_cache(maxsize=None)
+def request_deadline(route: str):
+    """Dependency factory: Deadline from ?deadline_ms= or the route default
+
+    One dependency per route, so every Depends(request_deadline(route)) in a
+    request shares the same Deadline.
+    """
+    def dependency(
+        deadline_ms: Optional[int] = Query(None, ge=1, description="Time budget in milliseconds"),
+    ) -> Deadline:
+        seconds = deadline_ms / 1000 if deadline_ms is not None else ROUTE_DEADLINES[route]
+        return Deadline(min(seconds, MAX_DEADLINE_SECONDS))
+    return dependency
+
+
+def deadline_records(route: str):
+    """Dependency factory: enrollment_records bounded by the route's request deadline
+
+    The deadline starts before the rows are read, so deadline_ms covers loading
+    and scoring; running out while loading is a 504.
+    """
+    def dependency(
+        deadline: Deadline = Depends(request_deadline(route)),
+        query: Dict[str, Any] = Depends(record_query),
+    ) -> List[EnrollmentRecord]:
+        try:
+            return _load_records(query, deadline)
+        except ScanCancelledError:
+            raise HTTPException(
+                status_code=504,
+                detail=f"Deadline of {deadline.seconds * 1000:.0f} ms exceeded while loading records",
+            )
+    return dependency
+
+
+def _progress_fields(progress, deadline: Deadline):
+    """complete flag plus progress figures for partial-result responses"""
+    return {
+        "complete": progress.pop("complete", True),
+        "progress": {**progress, "elapsed_ms": deadline.elapsed_ms(), "deadline_ms": deadline.seconds * 1000},
+    }
+
+
 @app.get("/api/signals/duplicates")
-def signals_duplicates(threshold: float = 0.85, max_rows: int = 500):
+def signals_duplicates(
+    threshold: float = 0.85,
+    blocking: str = Query("keys", regex="^(keys|window|none)$"),
+    window: int = Query(20, ge=2, le=1000, description="Sorted-neighbourhood window"),
+    scorer: str = Query("batch", regex="^(batch|scalar)$"),
+    cluster: bool = Query(False, description="Also group pairs into entity clusters"),
+    rows: List[EnrollmentRecord] = Depends(deadline_records("signals-duplicates")),
+    deadline: Deadline = Depends(request_deadline("signals-duplicates")),
+):
     """Detect near-duplicate pairs across enrollment records (CSV-only).
 
-    WARNING: This runs an O(n^2) scan over `max_rows` rows; keep `max_rows` small
-    (default 500) for interactive use.
+    Only candidate pairs from blocking (`blocking=keys`: shared Aadhaar,
+    pincode, district + date or phonetic name; `blocking=window`:
+    sorted-neighbourhood) are scored, so `max_rows` can cover a whole
+    district. `blocking=none` is the exhaustive O(n^2) scan. With `cluster`,
+    transitive duplicates are merged into entity clusters. The scan is
+    bounded by the request deadline and reports `complete: false` with
+    progress when it was cut short. Normalized match keys come from the
+    feature store, which the warmer fills once per dataset generation.
     """
     try:
-        import csv
-        import os
-
-        from .duplicate_detector import detect_duplicates_in_rows
-
-        # Load up to max_rows from enrollment CSVs
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
+        from services.duplicate_detector import detect_duplicates_in_rows
+
+        progress = {}
+        pairs = detect_duplicates_in_rows(
+            rows, threshold=threshold, deadline=deadline, progress=progress,
+            blocking=blocking, window=window, scorer=scorer,
+            # Never wait on the store within the deadline; keys are computed
+            # inline either way, only keeping them is skipped when it is busy
+            features=get_feature_store().features(rows, timeout=0),
         )
-        if not os.path.isdir(enroll_dir):
-            return {"pairs": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
-
-        pairs = detect_duplicates_in_rows(rows, threshold=threshold)
         # Build friendly output
         out = [
             {
@@ -558,38 +831,207 @@ def signals_duplicates(threshold: float = 0.85, max_rows: int = 500):
             }
             for i, j, s in pairs
         ]
-        return {"pairs": out, "count": len(out)}
+        result = {"pairs": out, "count": len(out)}
+        if cluster:
+            from services.entity_clusters import cluster_pairs
+
+            result["clusters"] = cluster_pairs(pairs)
+            result["cluster_count"] = len(result["clusters"])
+        return {**result, **_progress_fields(progress, deadline)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/signals/confidence")
-def signals_confidence(max_rows: int = 500):
-    """Compute a simple confidence score for recent enrollment records."""
+@app.get("/api/signals/duplicates/stream")
+async def signals_duplicates_stream(
+    threshold: float = 0.85,
+    blocking: str = Query("keys", regex="^(keys|window)$"),
+    window: int = Query(20, ge=2, le=1000, description="Sorted-neighbourhood window"),
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    resume: Optional[str] = Query(None, description="Checkpoint from a progress line"),
+    cluster: bool = Query(False, description="Also emit per-district entity clusters"),
+):
+    """Duplicate pairs over the whole (optionally filtered) dataset as NDJSON.
+
+    Rows are partitioned by state + district on disk and scored one partition
+    at a time, so memory stays bounded. Each line is a `pair`, a `progress`
+    record carrying a resumable `checkpoint`, a `cluster` (with `cluster`),
+    or the final `done` summary. Only blocked scoring (`keys`, `window`) is
+    offered; scoring stops soon after the client disconnects. A malformed
+    `resume` is a 400, one from another dataset generation a 409.
+
+    Pairs are only looked for within a district (`"scope": "district"` in
+    the `done` line): records in different districts, even with the same
+    Aadhaar, are never paired here. Use /api/signals/duplicates or the
+    lookup endpoint for cross-district checks.
+    """
+    from services.duplicate_stream import (
+        DEFAULT_PARTITIONS,
+        MalformedCheckpointError,
+        StaleCheckpointError,
+        parse_checkpoint,
+        stream_duplicates,
+    )
+
+    generation = get_dataset_generation()
+    if resume:
+        try:
+            parse_checkpoint(resume, generation, DEFAULT_PARTITIONS)
+        except MalformedCheckpointError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except StaleCheckpointError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    token = CancellationToken()
+    events = stream_duplicates(
+        functools.partial(get_record_source().iter_rows, state, district),
+        generation,
+        threshold=threshold,
+        blocking=blocking,
+        window=window,
+        resume=resume,
+        clusters=cluster,
+        features=get_feature_store().features,
+        deadline=token,
+    )
+
+    # A generator cannot be closed while a step still runs in another thread
+    events_lock = threading.Lock()
+
+    def step():
+        with events_lock:
+            return next(events, None)
+
+    def close_events():
+        with events_lock:
+            events.close()
+
+    async def ndjson():
+        # Each step runs in the executor; if the client goes away the awaiting
+        # task is cancelled and the token stops the scoring thread. Closing the
+        # generator (which removes its spill files) then waits for that step.
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                event = await loop.run_in_executor(None, step)
+                if event is None:
+                    return
+                yield dumps(event) + b"\n"
+        finally:
+            token.cancel("stream closed")
+            loop.run_in_executor(None, close_events)
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+def _match_features():
+    """Match keys of every enrollment, computed once per dataset generation"""
+    store = get_feature_store()
+    store.ensure(get_dataset_generation(), get_record_source().iter_rows)
+    return store
+
+
+def _duplicate_index():
+    """Lookup index over the enrollment dataset; a stale one serves while it rebuilds"""
+    index = get_lsh_index()
+    index.ensure(get_dataset_generation(), get_record_source().iter_rows)
+    return index
+
+
+def _refresh_duplicate_index():
+    """Warmup job: bring the lookup index up to the current dataset generation"""
+    get_lsh_index().refresh(get_dataset_generation(), get_record_source().iter_rows)
+
+
+def lookup_record(
+    name: Optional[str] = None,
+    date_of_birth: Optional[str] = None,
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    pincode: Optional[str] = None,
+    aadhaar: Optional[str] = None,
+    address: Optional[str] = None,
+) -> dict:
+    """Dependency: the probe enrollment from query parameters"""
+    record = {
+        "name": name, "date_of_birth": date_of_birth, "state": state,
+        "district": district, "pincode": pincode, "aadhaar": aadhaar, "address": address,
+    }
+    record = {k: v for k, v in record.items() if v}
+    if not record:
+        raise HTTPException(status_code=400, detail="Provide at least one record field")
+    return record
+
+
+@app.get("/api/signals/duplicates/lookup")
+def signals_duplicates_lookup(
+    record: dict = Depends(lookup_record),
+    top_k: int = Query(10, ge=1, le=100),
+    threshold: float = Query(0.7, ge=0.0, le=1.0),
+):
+    """Likely duplicates of one enrollment via the MinHash-LSH index.
+
+    Only records sharing an LSH bucket (name 3-grams, address tokens) with the
+    probe are rescored, so latency does not grow with the dataset. The warmer
+    keeps the index current; after a dataset change the previous index keeps
+    answering until the rebuilt one is swapped in.
+    """
     try:
-        import csv
-        import os
+        index = _duplicate_index()
+        result = index.lookup(record, top_k=top_k, threshold=threshold)
+        return {**result, "count": len(result["matches"]), "indexed": len(index)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        from .confidence import score_record
 
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"records": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
+class IndexedEnrollment(BaseModel):
+    """A newly arrived enrollment posted to the duplicate-lookup index"""
+    record_id: Optional[str] = Field(None, max_length=128)
+    name: Optional[str] = Field(None, max_length=256)
+    date_of_birth: Optional[str] = Field(None, max_length=32)
+    state: Optional[str] = Field(None, max_length=128)
+    district: Optional[str] = Field(None, max_length=128)
+    pincode: Optional[str] = Field(None, max_length=16)
+    aadhaar: Optional[str] = Field(None, max_length=32)
+    address: Optional[str] = Field(None, max_length=512)
+
+
+@app.post("/api/signals/duplicates/index", dependencies=[Depends(require_admin)])
+def signals_duplicates_index(
+    enrollment: IndexedEnrollment,
+    top_k: int = Query(10, ge=1, le=100),
+    threshold: float = Query(0.7, ge=0.0, le=1.0),
+):
+    """Index a newly arrived enrollment (JSON body) and return its likely duplicates.
+
+    Admin only. The index keeps just the fields it rescores on (the address is
+    used for hashing but not stored).
+    """
+    record = enrollment.model_dump(exclude={"record_id"}, exclude_none=True)
+    record = {k: v for k, v in record.items() if v}
+    if not record:
+        raise HTTPException(status_code=400, detail="Provide at least one record field")
+    try:
+        index = _duplicate_index()
+        result = index.lookup(record, top_k=top_k, threshold=threshold)
+        ref = index.add(record, enrollment.record_id)
+        return {**result, "ref": ref, "count": len(result["matches"]), "indexed": len(index)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/signals/confidence")
+def signals_confidence(rows: List[EnrollmentRecord] = Depends(enrollment_records)):
+    """Compute a simple confidence score for recent enrollment records."""
+    try:
+        from models.confidence import score_record
 
         recs = []
         for r in rows:
@@ -612,32 +1054,10 @@ def signals_confidence(max_rows: int = 500):
 
 
 @app.get("/api/irf/multi-factor")
-def irf_multi_factor(max_rows: int = 500):
+def irf_multi_factor(rows: List[EnrollmentRecord] = Depends(enrollment_records)):
     """Compute multi-factor verification scores for enrollment records."""
     try:
-        import csv
-        import os
-
-        from .multi_factor import multi_factor_verification_score
-
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"records": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
+        from services.multi_factor import multi_factor_verification_score
 
         recs = []
         for r in rows:
@@ -657,32 +1077,10 @@ def irf_multi_factor(max_rows: int = 500):
 
 
 @app.get("/api/irf/biometric-aging")
-def irf_biometric_aging(max_rows: int = 500):
+def irf_biometric_aging(rows: List[EnrollmentRecord] = Depends(enrollment_records)):
     """Assess biometric verification thresholds with age/occupation adjustments."""
     try:
-        import csv
-        import os
-
-        from .biometric_aging import biometric_aging_assessment
-
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"records": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
+        from services.biometric_aging import biometric_aging_assessment
 
         recs = []
         for r in rows:
@@ -739,105 +1137,59 @@ def irf_fail_safe(record_id: str, reason: str = "biometric_failure"):
 
 
 @app.get("/api/afif/hub-analysis")
-def afif_hub_analysis(max_rows: int = 500):
+def afif_hub_analysis(
+    rows: List[EnrollmentRecord] = Depends(deadline_records("afif-hub-analysis")),
+    deadline: Deadline = Depends(request_deadline("afif-hub-analysis")),
+):
     """Detect suspicious enrollment centers with unusual activity spikes."""
     try:
-        import csv
-        import os
+        from services.hub_detector import analyze_hub_activity
 
-        from .hub_detector import analyze_hub_activity
-
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"anomalies": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
-
-        anomalies = analyze_hub_activity(rows)
-        return {"anomalies": anomalies, "count": len(anomalies)}
+        progress = {}
+        anomalies = analyze_hub_activity(rows, deadline=deadline, progress=progress)
+        return {
+            "anomalies": anomalies,
+            "count": len(anomalies),
+            **_progress_fields(progress, deadline),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/afif/network-graph")
-def afif_network_graph(max_rows: int = 500):
+def afif_network_graph(
+    rows: List[EnrollmentRecord] = Depends(deadline_records("afif-network-graph")),
+    deadline: Deadline = Depends(request_deadline("afif-network-graph")),
+):
     """Analyze network relationships to detect coordinated fraud networks."""
     try:
-        import csv
-        import os
+        from services.network_graph import detect_fraud_networks
 
-        from .network_graph import detect_fraud_networks
-
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"networks": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= max_rows:
-                        break
-            if len(rows) >= max_rows:
-                break
-
-        networks = detect_fraud_networks(rows)
-        return {"networks": networks, "count": len(networks)}
+        progress = {}
+        networks = detect_fraud_networks(rows, deadline=deadline, progress=progress)
+        return {
+            "networks": networks,
+            "count": len(networks),
+            **_progress_fields(progress, deadline),
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/afif/risk-alerts")
-def afif_risk_alerts():
+def afif_risk_alerts(
+    rows: List[EnrollmentRecord] = Depends(deadline_records("afif-risk-alerts")),
+    deadline: Deadline = Depends(request_deadline("afif-risk-alerts")),
+):
     """Get all active risk alerts from hub and network analysis."""
     try:
-        import csv
-        import os
+        from services.hub_detector import analyze_hub_activity
+        from models.risk_alerting import generate_alerts_from_hubs
 
-        from .hub_detector import analyze_hub_activity
-        from .risk_alerting import generate_alerts_from_hubs
-
-        rows = []
-        enroll_dir = os.getenv(
-            "ENROLL_FOLDER",
-            os.path.join(os.getcwd(), "dataset", "clean", "api_data_aadhar_enrolment"),
-        )
-        if not os.path.isdir(enroll_dir):
-            return {"alerts": [], "count": 0}
-        for fname in sorted(os.listdir(enroll_dir)):
-            if not fname.lower().endswith(".csv"):
-                continue
-            with open(os.path.join(enroll_dir, fname), "r", encoding="utf-8") as fh:
-                reader = csv.DictReader(fh)
-                for r in reader:
-                    rows.append(r)
-                    if len(rows) >= 500:
-                        break
-            if len(rows) >= 500:
-                break
-
-        anomalies = analyze_hub_activity(rows)
+        progress = {}
+        anomalies = analyze_hub_activity(rows, deadline=deadline, progress=progress)
         alerts = generate_alerts_from_hubs(anomalies)
-        return {"alerts": alerts, "count": len(alerts)}
+        return {"alerts": alerts, "count": len(alerts), **_progress_fields(progress, deadline)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -930,37 +1282,41 @@ def prof_get_demand_forecast(forecast_days: int = Query(30, ge=1, le=90)):
     Uses historical trends and seasonal patterns.
     """
     try:
-        from .demand_forecasting import (
+        from services.demand_forecasting import (
             adjust_forecast_by_district,
             forecast_demand,
         )
 
-        # Load records
-        result = explorer_enrollment(limit=10000)
-        records = result.get("rows", [])
+        def build():
+            # Load records
+            result = explorer_enrollment(limit=10000)
+            records = result.get("rows", [])
 
-        # Convert to simple records with timestamp and activity type
-        simple_records = [
-            {
-                "timestamp": r.get("date", ""),
-                "activity_type": "enrolment",
-                "district": r.get("district", "unknown"),
-            }
-            for r in records
-        ]
+            # Convert to simple records with timestamp and activity type
+            simple_records = [
+                {
+                    "timestamp": r.get("date", ""),
+                    "activity_type": "enrolment",
+                    "district": r.get("district", "unknown"),
+                }
+                for r in records
+            ]
 
-        # Overall forecast
-        overall = forecast_demand(simple_records, forecast_days)
+            # Overall forecast
+            overall = forecast_demand(simple_records, forecast_days)
 
-        # District-level forecast
-        by_district = adjust_forecast_by_district(simple_records, forecast_days)
+            # District-level forecast
+            by_district = adjust_forecast_by_district(simple_records, forecast_days)
 
-        return {
-            "forecast_days": forecast_days,
-            "overall_forecast": overall,
-            "by_district": by_district,
-            "timestamp": datetime.now().isoformat(),
-        }
+            return {
+                "forecast_days": forecast_days,
+                "overall_forecast": overall,
+                "by_district": by_district,
+                "timestamp": datetime.now().isoformat(),
+            }
+
+        cache = get_response_cache()
+        return cache.render(cache.make_key("prof-demand-forecast", forecast_days=forecast_days), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1387,6 +1743,141 @@ async def health_check():
         }
 
 
+# ============= METRICS =============
+
+
+def _collect_runtime_metrics():
+    """Gauges sampled at scrape time: cache ratios, pool, executor, scan rate"""
+    handler = get_async_handler()
+    pool = handler.connection_pool.get_stats()
+    async_cache = handler.cache.get_stats()
+    csv_cache = get_cache_stats()
+    executors = {
+        "handler": handler.get_executor_stats(),
+        "default": get_default_executor().get_stats(),
+    }
+    async_lookups = async_cache["hits"] + async_cache["misses"]
+    async_ratio = async_cache["hits"] / async_lookups if async_lookups else 0.0
+
+    yield ("cache_hit_ratio", "gauge", "Cache hit ratio by layer", [
+        ({"layer": "async"}, async_ratio),
+        ({"layer": "csv"}, csv_cache["hit_ratio"]),
+    ])
+    yield ("cache_entries", "gauge", "Live cache entries by layer", [
+        ({"layer": "async"}, async_cache["size"]),
+        ({"layer": "csv"}, csv_cache["active_entries"]),
+    ])
+    yield ("executor_queue_depth", "gauge", "Work items waiting for an executor thread", [
+        ({"executor": name}, stats["queue_depth"]) for name, stats in executors.items()
+    ])
+    yield ("executor_active_threads", "gauge", "Executor threads running a work item", [
+        ({"executor": name}, stats["active"]) for name, stats in executors.items()
+    ])
+    yield ("pool_active_connections", "gauge", "Connection pool slots in use", [
+        ({}, pool["active_connections"]),
+    ])
+    yield ("pool_timeouts_total", "counter", "Connection pool acquire timeouts", [
+        ({}, pool["timeouts"]),
+    ])
+    yield ("pool_rejections_total", "counter", "Pool acquisitions rejected or timed out", [
+        ({}, pool["rejections"]),
+    ])
+    yield ("pool_concurrency_limit", "gauge", "Current adaptive concurrency limit", [
+        ({}, pool["current_limit"]),
+    ])
+    yield ("scan_throughput_rows_per_second", "gauge", "Average CSV scan throughput", [
+        ({"dataset": dataset}, rate) for dataset, rate in scan_throughput().items()
+    ])
+    yield ("dashboard_event_subscribers", "gauge", "Connected dashboard SSE clients", [
+        ({}, get_event_broadcaster().get_stats()["subscribers"]),
+    ])
+
+
+get_metrics().register_collector(_collect_runtime_metrics)
+
+
+@app.on_event("startup")
+async def use_counting_default_executor():
+    """
+    Install a counting pool as the default executor so run_in_executor(None,
+    ...) work (warmup jobs, generation checks, request handlers) is observable.
+    It keeps asyncio's default capacity and does not share the handler pool.
+    """
+    asyncio.get_running_loop().set_default_executor(get_default_executor())
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text-format metrics (latency histograms, cache, executor, scans)"""
+    return PlainTextResponse(
+        get_metrics().render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+# ============= CACHE WARMUP & READINESS =============
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+
+
+async def _invalidate_caches():
+    """Drop process-local caches before re-warming after a data change.
+    The shared L2 tier is namespaced by dataset generation, so it stays."""
+    clear_cache(shared=False)
+    get_response_cache().clear()
+    await get_async_handler().cache.clear()
+
+
+async def _publish_dashboard_updates(status):
+    """Recompute every dashboard widget after a warmup pass; each publishes its diff"""
+    get_event_broadcaster().set_generation(status.get("generation") or get_dataset_generation())
+    params = {"months": 12}
+    for name, widget in DASHBOARD_WIDGETS.items():
+        try:
+            await widget(params)
+        except Exception as e:
+            logger.warning(f"Could not publish dashboard aggregate {name}: {e}")
+
+
+@app.on_event("startup")
+async def start_cache_warmup():
+    """Precompute hot dashboard aggregates in the background"""
+    warmer = get_cache_warmer()
+    warmer.generation_func = lambda: get_dataset_generation(force=True)
+    warmer.on_change = _invalidate_caches
+    warmer.on_warmed = _publish_dashboard_updates
+    warmer.register("national-overview", get_national_overview)
+    warmer.register("enrollment-timeline", functools.partial(get_enrollment_timeline, months=12))
+    warmer.register("state-distribution", get_state_distribution)
+    warmer.register("demographic-distribution", get_mobility_demographic_distribution)
+    warmer.register("state-profiles", get_state_profiles)
+    warmer.register("duplicate-index", _refresh_duplicate_index)
+    warmer.register("match-features", _match_features)
+    warmer.register("shared-cache-prune", prune_shared_cache)
+    if WARMUP_ENABLED:
+        warmer.start()
+        logger.info(f"Cache warmup scheduled for {warmer.selected_keys()}")
+
+
+@app.on_event("shutdown")
+async def stop_cache_warmup():
+    await get_cache_warmer().stop()
+
+
+@app.get("/api/health/ready")
+async def readiness():
+    """Readiness probe: 200 once a warmup pass met the success requirements, 503 before
+
+    WARMUP_REQUIRED_KEYS lists jobs that must succeed and WARMUP_MIN_SUCCESS the
+    share of all jobs that must (default 1.0). `degraded` is set when the
+    warmer is ready despite failed jobs.
+    """
+    status = get_cache_warmer().get_status()
+    if not WARMUP_ENABLED:
+        status = {**status, "ready": True, "state": "disabled"}
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 # ============= CACHE MANAGEMENT ENDPOINTS =============
 
 
@@ -1395,7 +1886,13 @@ def get_cache_stats_endpoint():
     """Get cache statistics and performance metrics"""
     try:
         stats = get_cache_stats()
-        return {"cache_stats": stats, "timestamp": datetime.now().isoformat()}
+        return {
+            "cache_stats": stats,
+            "response_cache": get_response_cache().get_stats(),
+            "duplicate_index": get_lsh_index().get_stats(),
+            "match_features": get_feature_store().get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1405,6 +1902,8 @@ def clear_cache_endpoint():
     """Clear all cached data (admin only)"""
     try:
         result = clear_cache()
+        get_response_cache().clear()
+        get_cache_warmer().request_rewarm()
         return {"result": result, "timestamp": datetime.now().isoformat()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1619,6 +2118,39 @@ async def cache_statistics():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+
+@app.get("/api/admin/profile/sample", dependencies=[Depends(require_admin)])
+async def sample_profile(
+    seconds: float = Query(5.0, gt=0, description="Sampling duration"),
+):
+    """
+    Sample every thread's stack for `seconds` and return collapsed stacks
+    ("frame;frame;frame count" lines) for flamegraph.pl / speedscope.
+    Requires the X-Admin-Token header.
+    """
+    sampler = get_sampling_profiler()
+    if sampler.busy:
+        raise HTTPException(status_code=409, detail="A sampling session is already running")
+    seconds = min(seconds, PROFILER_MAX_SECONDS)
+    try:
+        result = await sampler.sample_async(seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"profile-{datetime.now().strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        result["collapsed"],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Unique-Stacks": str(result["unique_stacks"]),
+        },
+    )
+
+
 @app.post("/api/admin/optimize-cache")
 async def optimize_database_cache():
     """
@@ -1668,6 +2200,8 @@ async def clear_database_cache():
     try:
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, clear_cache)
+        get_response_cache().clear()
+        get_cache_warmer().request_rewarm()
         
         logger.warning("Cache cleared by admin request")
         
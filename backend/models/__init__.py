@@ -1,16 +1,43 @@
 """
 Models module - Data models and schemas
 """
-from .adif_normalizer import ADIFNormalizer
-from .confidence import ConfidenceScorer
-from .escalation import EscalationManager
-from .risk_alerting import RiskAlerter
-from .audit_logs import AuditLogger
+from .adif_normalizer import (
+    CompiledNormalizer,
+    compile_normalizer,
+    dedup_digest,
+    dedupe_iter,
+    fingerprint,
+    iter_normalized_csv,
+    normalize_row,
+    row_digest,
+    row_fingerprint,
+    row_hash,
+)
+from .digest_set import BloomFilter, DigestSet, ExternalDigestSet
+from .confidence import score_record
+from .escalation import create_escalation, fail_safe_response
+from .risk_alerting import generate_alerts_from_hubs
+from .audit_logs import get_audit_log, log_event, verify_audit_log
 
 __all__ = [
-    "ADIFNormalizer",
-    "ConfidenceScorer",
-    "EscalationManager",
-    "RiskAlerter",
-    "AuditLogger",
+    "dedupe_iter",
+    "dedup_digest",
+    "normalize_row",
+    "compile_normalizer",
+    "CompiledNormalizer",
+    "iter_normalized_csv",
+    "row_hash",
+    "row_digest",
+    "fingerprint",
+    "row_fingerprint",
+    "DigestSet",
+    "BloomFilter",
+    "ExternalDigestSet",
+    "score_record",
+    "create_escalation",
+    "fail_safe_response",
+    "generate_alerts_from_hubs",
+    "get_audit_log",
+    "log_event",
+    "verify_audit_log",
 ]
@@ -2,13 +2,24 @@
 
 Provides:
 - normalize_row(row): canonicalize keys, date formats, state names, pincodes, numeric fields
+- compile_normalizer(header): normalize_row specialised to one file header, for
+  list rows (csv.reader) and batches; output is identical to normalize_row
+- iter_normalized_csv(fh, batch_size): batches of normalized rows of a CSV file
 - row_hash(row, keys=None): deterministic md5 of row or selected keys
-- dedupe_iter(rows, mode='hash'|'composite'|'id', composite_keys=None): yields unique rows
+- row_digest(row, keys=None): the same hash truncated to a 64-bit integer
+- fingerprint(values, algorithm) / row_fingerprint(row, keys, algorithm): binary
+  digests with md5, blake2b (small digest_size) or hash64 (in-process only)
+- dedup_digest(row, mode, composite_keys, algorithm): the 64-bit key dedupe_iter uses per mode
+- dedupe_iter(rows, mode='hash'|'composite'|'id', composite_keys=None, store='set'):
+  yields unique rows; store='compact'|'external' bound the memory of seen keys
 """
 
+import csv
 import hashlib
 from datetime import datetime
-from typing import Dict, Iterable, Iterator, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .digest_set import DigestSet, ExternalDigestSet
 
 # Minimal state canonicalization map; can be extended
 _STATE_MAP = {
@@ -36,11 +47,28 @@ def _normalize_pincode(p: Optional[str]) -> str:
     return s
 
 
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%Y")
+
+_NUMERIC_FIELDS = (
+    "age_0_5",
+    "age_5_17",
+    "age_18_greater",
+    "demo_age_5_17",
+    "demo_age_17_plus",
+    "bio_age_5_17",
+    "bio_age_17_plus",
+)
+
+
+def _normalize_key(k: str) -> str:
+    return k.strip().lower().replace(" ", "_").replace("-", "_")
+
+
 def _normalize_date(d: Optional[str]) -> Optional[str]:
     if not d:
         return None
     d = d.strip()
-    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%Y"):
+    for fmt in _DATE_FORMATS:
         try:
             dt = datetime.strptime(d, fmt)
             return dt.strftime("%Y-%m-%d")
@@ -69,7 +97,7 @@ def normalize_row(row: Dict[str, str]) -> Dict[str, str]:
     out: Dict[str, str] = {}
     # normalize keys: strip, lowercase, replace spaces/hyphens with underscores
     for k, v in row.items():
-        nk = k.strip().lower().replace(" ", "_").replace("-", "_")
+        nk = _normalize_key(k)
         nv = v.strip() if isinstance(v, str) else ("" if v is None else str(v))
         out[nk] = nv
 
@@ -86,36 +114,268 @@ def normalize_row(row: Dict[str, str]) -> Dict[str, str]:
     out["pincode"] = _normalize_pincode(out.get("pincode"))
 
     # numeric fields cleaned
-    for fld in [
-        "age_0_5",
-        "age_5_17",
-        "age_18_greater",
-        "demo_age_5_17",
-        "demo_age_17_plus",
-        "bio_age_5_17",
-        "bio_age_17_plus",
-    ]:
+    for fld in _NUMERIC_FIELDS:
         if fld in out:
             out[fld] = str(_safe_int(out.get(fld)))
 
     return out
 
 
-def row_hash(row: Dict[str, str], keys: Optional[List[str]] = None) -> str:
-    """Deterministic md5 hash of either a set of keys or the entire row (sorted keys)."""
+# Memo tables stop growing past this many distinct values (a file normally
+# has a few hundred dates and states; pincodes are the largest)
+_MEMO_LIMIT = 1 << 16
+
+
+class CompiledNormalizer:
+    """
+    normalize_row specialised to one header.
+
+    Keys are normalized once, columns are read by index, and the date, state
+    and pincode cleaners are memoized per distinct value. The date format is
+    detected from the first parsable value and tried first afterwards; the
+    four formats cannot match the same string (%Y takes exactly four digits,
+    %d at most two, and the separators differ), so a hit gives the same
+    result as trying them in order. Anything else falls back to the
+    normalize_row helpers.
+    """
+
+    def __init__(self, header: Sequence[str]):
+        self.header = list(header)
+        self.keys = [_normalize_key(k) for k in self.header]
+        present = set(self.keys)
+        self._has_date = "date" in present
+        self._numeric = [f for f in _NUMERIC_FIELDS if f in present]
+        self.date_format: Optional[str] = None
+        self._dates: Dict[str, Optional[str]] = {}
+        self._states: Dict[str, str] = {}
+        self._pincodes: Dict[str, str] = {}
+
+    def _date(self, value: str) -> Optional[str]:
+        cached = self._dates.get(value, self)
+        if cached is not self:
+            return cached
+        result = None
+        if value and self.date_format is not None:
+            try:
+                result = datetime.strptime(value, self.date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+        if result is None:
+            result = _normalize_date(value)
+            if result is not None and self.date_format is None:
+                self.date_format = _detect_date_format(value)
+        if len(self._dates) < _MEMO_LIMIT:
+            self._dates[value] = result
+        return result
+
+    def _state(self, value: Optional[str]) -> str:
+        if value is None:
+            return ""
+        out = self._states.get(value)
+        if out is None:
+            out = _canonical_state(value)
+            if len(self._states) < _MEMO_LIMIT:
+                self._states[value] = out
+        return out
+
+    def _pincode(self, value: Optional[str]) -> str:
+        if value is None:
+            return ""
+        out = self._pincodes.get(value)
+        if out is None:
+            out = _normalize_pincode(value)
+            if len(self._pincodes) < _MEMO_LIMIT:
+                self._pincodes[value] = out
+        return out
+
+    def normalize(self, values: Sequence[Optional[str]]) -> Dict[str, str]:
+        """Normalize one row given as values in header order."""
+        if len(values) != len(self.keys):
+            if len(values) > len(self.keys):
+                raise ValueError(
+                    f"Row has {len(values)} fields, header has {len(self.keys)}"
+                )
+            # csv.DictReader fills short rows with None
+            values = list(values) + [None] * (len(self.keys) - len(values))
+        # dict(zip()) keeps the first position and last value of a repeated
+        # key, exactly like the assignment loop in normalize_row
+        out = dict(zip(self.keys, [
+            v.strip() if isinstance(v, str) else ("" if v is None else str(v))
+            for v in values
+        ]))
+        if self._has_date:
+            norm_date = self._date(out["date"])
+            if norm_date:
+                out["date"] = norm_date
+        out["state"] = self._state(out.get("state"))
+        out["pincode"] = self._pincode(out.get("pincode"))
+        for fld in self._numeric:
+            v = out[fld]
+            out[fld] = str(int(v)) if v.isascii() and v.isdigit() else str(_safe_int(v))
+        return out
+
+    __call__ = normalize
+
+    def normalize_batch(self, rows: Iterable[Sequence[Optional[str]]]) -> List[Dict[str, str]]:
+        """Normalize a chunk of rows."""
+        normalize = self.normalize
+        return [normalize(values) for values in rows]
+
+    def iter_batches(
+        self,
+        rows: Iterable[Sequence[Optional[str]]],
+        batch_size: int = 10_000
+    ) -> Iterator[List[Dict[str, str]]]:
+        """Normalize rows in chunks of batch_size."""
+        batch: List[Sequence[Optional[str]]] = []
+        for values in rows:
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield self.normalize_batch(batch)
+                batch = []
+        if batch:
+            yield self.normalize_batch(batch)
+
+
+def _detect_date_format(d: str) -> Optional[str]:
+    for fmt in _DATE_FORMATS:
+        try:
+            datetime.strptime(d, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def compile_normalizer(header: Sequence[str]) -> CompiledNormalizer:
+    """Build a normalizer for rows read with csv.reader under `header`."""
+    return CompiledNormalizer(header)
+
+
+def iter_normalized_csv(fh, batch_size: int = 10_000) -> Iterator[List[Dict[str, str]]]:
+    """
+    Batches of normalized rows of an open CSV file, the same rows that
+    csv.DictReader + normalize_row would produce (blank lines are skipped).
+    """
+    reader = csv.reader(fh)
+    header = next(reader, None)
+    if header is None:
+        return
+    normalizer = compile_normalizer(header)
+    yield from normalizer.iter_batches((values for values in reader if values), batch_size)
+
+
+def _hash_payload(row: Dict[str, str], keys: Optional[List[str]] = None) -> bytes:
     if keys:
         vals = [str(row.get(k, "")) for k in keys]
         payload = "||".join(vals)
     else:
         items = sorted((k, str(v)) for k, v in row.items())
         payload = "||".join(f"{k}={v}" for k, v in items)
-    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+    return payload.encode("utf-8")
+
+
+def row_hash(row: Dict[str, str], keys: Optional[List[str]] = None) -> str:
+    """Deterministic md5 hash of either a set of keys or the entire row (sorted keys)."""
+    return hashlib.md5(_hash_payload(row, keys)).hexdigest()
+
+
+def row_digest(row: Dict[str, str], keys: Optional[List[str]] = None) -> int:
+    """First 64 bits of row_hash as an integer (for the compact dedup stores)."""
+    return int.from_bytes(hashlib.md5(_hash_payload(row, keys)).digest()[:8], "big")
+
+
+FINGERPRINT_ALGORITHMS = ("md5", "blake2b", "hash64")
+DEFAULT_FINGERPRINT_SIZE = 8
+
+# Separates values in the blake2b payload; does not occur in CSV text
+_FIELD_SEP = "\x1f"
+_MASK64 = (1 << 64) - 1
+
+
+def _joined(values: Sequence, sep: str) -> str:
+    try:
+        return sep.join(values)
+    except TypeError:
+        return sep.join(map(str, values))
+
+
+def fingerprint(
+    values: Sequence,
+    algorithm: str = "blake2b",
+    digest_size: int = DEFAULT_FINGERPRINT_SIZE
+) -> bytes:
+    """Binary fingerprint of a tuple of column values.
+
+    - blake2b: blake2b with `digest_size` bytes over the values joined by \\x1f;
+      stable across processes and runs
+    - hash64: Python's tuple hash as 8 bytes; the fastest, but string hashes
+      are salted per interpreter, so only use it for in-process dedup
+    - md5: md5 of the values joined by "||", the same digest as
+      row_hash(row, keys) for stored fingerprints
+    """
+    if algorithm == "blake2b":
+        return hashlib.blake2b(_joined(values, _FIELD_SEP).encode("utf-8"), digest_size=digest_size).digest()
+    if algorithm == "hash64":
+        return (hash(tuple(values)) & _MASK64).to_bytes(8, "big")
+    if algorithm == "md5":
+        return hashlib.md5(_joined(values, "||").encode("utf-8")).digest()
+    raise ValueError(f"Unknown fingerprint algorithm: {algorithm}")
+
+
+def row_fingerprint(
+    row: Dict[str, str],
+    keys: Optional[List[str]] = None,
+    algorithm: str = "blake2b",
+    digest_size: int = DEFAULT_FINGERPRINT_SIZE
+) -> bytes:
+    """fingerprint of the values of `keys`, or of the whole row (sorted keys and values).
+
+    With md5 the digest is exactly the one behind row_hash.
+    """
+    if algorithm == "md5":
+        return hashlib.md5(_hash_payload(row, keys)).digest()
+    if keys:
+        return fingerprint([row.get(k, "") for k in keys], algorithm, digest_size)
+    items = sorted(row.items())
+    if algorithm == "hash64":
+        return fingerprint(items, algorithm)
+    return fingerprint([x for item in items for x in item], algorithm, digest_size)
+
+
+def _key_digest(key: str, algorithm: str = "md5") -> int:
+    if algorithm == "md5":
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+    return int.from_bytes(fingerprint(("\x1e" + key,), algorithm, 8), "big")
+
+
+def dedup_digest(
+    row: Dict[str, str],
+    mode: str = "hash",
+    composite_keys: Optional[List[str]] = None,
+    algorithm: str = "md5"
+) -> int:
+    """64-bit dedup key of a row under a dedupe_iter mode (compact/external stores)."""
+    if mode == "id":
+        rid = row.get("id") or row.get("uid") or row.get("aadhar_id")
+        if rid:
+            # Keep ids and row hashes in separate key spaces, like the set store
+            return _key_digest("id:" + str(rid), algorithm)
+    keys = composite_keys if mode == "composite" else None
+    if algorithm == "md5":
+        return row_digest(row, keys=keys)
+    return int.from_bytes(row_fingerprint(row, keys, algorithm, 8)[:8], "big")
 
 
 def dedupe_iter(
     rows: Iterable[Dict[str, str]],
     mode: str = "hash",
     composite_keys: Optional[List[str]] = None,
+    store: str = "set",
+    bloom: bool = True,
+    max_memory_digests: int = 8_000_000,
+    spill_dir: Optional[str] = None,
+    algorithm: str = "md5",
 ) -> Iterator[Dict[str, str]]:
     """Yield unique rows according to the selected strategy.
 
@@ -124,16 +384,19 @@ def dedupe_iter(
     - id: uses id/uid/aadhar_id when present; falls back to full-row hash
     - composite: hash of selected keys
     - hash: full-row hash
-    """
 
-    def key_for_row(r: Dict[str, str]) -> str:
-        if mode == "id":
-            rid = r.get("id") or r.get("uid") or r.get("aadhar_id")
-            return str(rid) if rid else row_hash(r)
-        if mode == "composite":
-            return row_hash(r, keys=composite_keys) if composite_keys else row_hash(r)
-        # default 'hash' behaviour
-        return row_hash(r)
+    Stores for the keys seen so far (first occurrence wins in every store):
+    - set: Python set of md5 hex strings / ids
+    - compact: 64-bit digests in an array-backed open-addressing set
+    - external: compact set up to max_memory_digests, then sorted runs spilled
+      under spill_dir and merged; bloom=True checks each run's Bloom filter
+      before searching it
+
+    algorithm selects the row fingerprint (see fingerprint()); md5 keeps the
+    historical keys, blake2b and hash64 are faster.
+    """
+    if algorithm not in FINGERPRINT_ALGORITHMS:
+        raise ValueError(f"Unknown fingerprint algorithm: {algorithm}")
 
     if mode == "none" or not mode:
         # Fast path: no dedup
@@ -141,10 +404,38 @@ def dedupe_iter(
             yield r
         return
 
-    seen = set()
-    for r in rows:
-        k = key_for_row(r)
-        if k in seen:
-            continue
-        seen.add(k)
-        yield r
+    if store == "set":
+        keys = composite_keys if mode == "composite" else None
+
+        def key_for_row(r: Dict[str, str]):
+            if mode == "id":
+                rid = r.get("id") or r.get("uid") or r.get("aadhar_id")
+                if rid:
+                    return str(rid)
+            if algorithm == "md5":
+                return row_hash(r, keys=keys)
+            # bytes never equal the str ids above
+            return row_fingerprint(r, keys, algorithm)
+
+        seen = set()
+        for r in rows:
+            k = key_for_row(r)
+            if k in seen:
+                continue
+            seen.add(k)
+            yield r
+        return
+
+    if store == "compact":
+        digests = DigestSet()
+        for r in rows:
+            if digests.add(dedup_digest(r, mode, composite_keys, algorithm)):
+                yield r
+        return
+
+    if store != "external":
+        raise ValueError(f"Unknown dedup store: {store}")
+    with ExternalDigestSet(max_memory_digests, spill_dir=spill_dir, bloom=bloom) as digests:
+        for r in rows:
+            if digests.add(dedup_digest(r, mode, composite_keys, algorithm)):
+                yield r
@@ -0,0 +1,275 @@
+"""Compact and external-memory sets of 64-bit row digests for dedup
+
+- DigestSet: open-addressing (linear probing) hash set in an array('Q'),
+  about 12-23 bytes per digest instead of ~100 for a set of hex strings
+- BloomFilter: bit array answering "definitely absent" for a sorted run
+- ExternalDigestSet: DigestSet in memory up to a limit, then spilled as a
+  sorted run to disk (memory-mapped); lookups consult each run's Bloom filter
+  before a binary search, and small runs are merged when there are too many
+
+Digest 0 marks an empty slot, so it is stored as 1. Both sets are exact over
+digests; with 64-bit digests the chance of any collision among n rows is
+about n^2 / 2^65.
+"""
+
+import os
+import shutil
+import tempfile
+from array import array
+from typing import List, Optional
+
+import numpy as np
+
+_LOAD_FACTOR = 0.7
+
+
+def _slot_digest(d: int) -> int:
+    return d or 1
+
+
+class DigestSet:
+    """Growable open-addressing set of non-zero 64-bit integers."""
+    __slots__ = ('_slots', '_mask', '_size', '_limit')
+
+    def __init__(self, capacity: int = 1024):
+        size = 16
+        while size * _LOAD_FACTOR < capacity:
+            size *= 2
+        self._alloc(size)
+        self._size = 0
+
+    def _alloc(self, size: int) -> None:
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._limit = int(size * _LOAD_FACTOR)
+
+    def add(self, d: int) -> bool:
+        """Insert d; True if it was not present."""
+        d = _slot_digest(d)
+        slots = self._slots
+        mask = self._mask
+        i = d & mask
+        while True:
+            v = slots[i]
+            if v == 0:
+                slots[i] = d
+                self._size += 1
+                if self._size > self._limit:
+                    self._grow()
+                return True
+            if v == d:
+                return False
+            i = (i + 1) & mask
+
+    def __contains__(self, d: int) -> bool:
+        d = _slot_digest(d)
+        slots = self._slots
+        mask = self._mask
+        i = d & mask
+        while True:
+            v = slots[i]
+            if v == 0:
+                return False
+            if v == d:
+                return True
+            i = (i + 1) & mask
+
+    def _grow(self) -> None:
+        old = self._slots
+        self._alloc(len(old) * 2)
+        slots = self._slots
+        mask = self._mask
+        for d in old:
+            if d:
+                i = d & mask
+                while slots[i]:
+                    i = (i + 1) & mask
+                slots[i] = d
+
+    def to_array(self) -> np.ndarray:
+        """Stored digests as a uint64 array (unordered)."""
+        arr = np.frombuffer(self._slots, dtype=np.uint64)
+        return arr[arr != 0].copy()
+
+    def clear(self) -> None:
+        self._alloc(16)
+        self._size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._slots) * 8
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class BloomFilter:
+    """Bloom filter over 64-bit digests using double hashing of their halves."""
+    __slots__ = ('_bits', '_m', '_k')
+
+    def __init__(self, capacity: int, bits_per_item: int = 10):
+        self._m = max(64, capacity * bits_per_item)
+        # k = ln2 * m/n, rounded; 7 for 10 bits per item
+        self._k = max(1, round(0.693 * bits_per_item))
+        self._bits = np.zeros((self._m + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, digests: np.ndarray) -> np.ndarray:
+        h1 = digests & np.uint64(0xFFFFFFFF)
+        h2 = (digests >> np.uint64(32)) | np.uint64(1)
+        k = np.arange(self._k, dtype=np.uint64)
+        return (h1[:, None] + k[None, :] * h2[:, None]) % np.uint64(self._m)
+
+    def add_many(self, digests: np.ndarray) -> None:
+        pos = self._positions(digests.astype(np.uint64)).ravel()
+        np.bitwise_or.at(self._bits, (pos >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+
+    def might_contain(self, d: int) -> bool:
+        h1 = d & 0xFFFFFFFF
+        h2 = (d >> 32) | 1
+        bits = self._bits
+        m = self._m
+        for k in range(self._k):
+            p = (h1 + k * h2) % m
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+
+class _Run:
+    """A sorted, memory-mapped run of digests on disk with its Bloom filter."""
+    __slots__ = ('path', 'data', 'bloom')
+
+    def __init__(self, path: str, bloom: bool):
+        self.path = path
+        size = os.path.getsize(path) // 8
+        self.data = np.memmap(path, dtype=np.uint64, mode='r', shape=(size,)) if size else np.empty(0, np.uint64)
+        self.bloom = None
+        if bloom and size:
+            self.bloom = BloomFilter(size)
+            for start in range(0, size, 1 << 20):
+                self.bloom.add_many(np.asarray(self.data[start:start + (1 << 20)]))
+
+    def __contains__(self, d: int) -> bool:
+        data = self.data
+        i = int(np.searchsorted(data, np.uint64(d)))
+        return i < len(data) and int(data[i]) == d
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def _merge_runs(runs: List[_Run], out_path: str, chunk: int = 1 << 20) -> None:
+    """k-way merge of sorted runs, reading at most `chunk` digests per run at a time."""
+    buffers = [np.asarray(r.data[:chunk]) for r in runs]
+    offsets = [len(b) for b in buffers]
+    with open(out_path, "wb") as out:
+        while True:
+            active = [i for i in range(len(runs)) if len(buffers[i])]
+            if not active:
+                break
+            # Everything <= the smallest last-loaded value of an unfinished run is final
+            limits = [buffers[i][-1] for i in active if offsets[i] < len(runs[i])]
+            bound = min(limits) if limits else None
+            parts = []
+            for i in active:
+                b = buffers[i]
+                cut = len(b) if bound is None else int(np.searchsorted(b, bound, side="right"))
+                parts.append(b[:cut])
+                buffers[i] = b[cut:]
+                if not len(buffers[i]) and offsets[i] < len(runs[i]):
+                    buffers[i] = np.asarray(runs[i].data[offsets[i]:offsets[i] + chunk])
+                    offsets[i] += len(buffers[i])
+            np.sort(np.concatenate(parts)).tofile(out)
+
+
+class ExternalDigestSet:
+    """
+    Exact digest set for inputs larger than RAM.
+    Holds up to `max_memory_digests` in a DigestSet, then spills them as a
+    sorted run; when more than `max_runs` runs exist the smaller ones are merged.
+    """
+
+    def __init__(
+        self,
+        max_memory_digests: int = 8_000_000,
+        spill_dir: Optional[str] = None,
+        bloom: bool = True,
+        max_runs: int = 8
+    ):
+        self.max_memory_digests = max_memory_digests
+        self.bloom = bloom
+        self.max_runs = max_runs
+        self._dir = tempfile.mkdtemp(prefix="dedupe-", dir=spill_dir)
+        self._memory = DigestSet(min(max_memory_digests, 1 << 20))
+        self._runs: List[_Run] = []
+        self._seq = 0
+        self._size = 0
+        self.stats = {'spills': 0, 'merges': 0, 'bloom_skips': 0, 'run_probes': 0}
+
+    def __contains__(self, d: int) -> bool:
+        d = _slot_digest(d)
+        if d in self._memory:
+            return True
+        for run in self._runs:
+            if run.bloom is not None and not run.bloom.might_contain(d):
+                self.stats['bloom_skips'] += 1
+                continue
+            self.stats['run_probes'] += 1
+            if d in run:
+                return True
+        return False
+
+    def add(self, d: int) -> bool:
+        """Insert d; True if it was not present in memory or any run."""
+        d = _slot_digest(d)
+        if d in self:
+            return False
+        self._memory.add(d)
+        self._size += 1
+        if len(self._memory) >= self.max_memory_digests:
+            self._spill()
+        return True
+
+    def _next_path(self) -> str:
+        self._seq += 1
+        return os.path.join(self._dir, f"run-{self._seq}.u64")
+
+    def _spill(self) -> None:
+        path = self._next_path()
+        np.sort(self._memory.to_array()).tofile(path)
+        self._memory.clear()
+        self._runs.append(_Run(path, self.bloom))
+        self.stats['spills'] += 1
+        if len(self._runs) > self.max_runs:
+            # Tiered: merge the smaller half so each digest is rewritten
+            # O(log runs) times instead of on every merge
+            self._runs.sort(key=len)
+            count = max(2, len(self._runs) // 2)
+            merging, self._runs = self._runs[:count], self._runs[count:]
+            path = self._next_path()
+            _merge_runs(merging, path)
+            for run in merging:
+                del run.data
+                os.unlink(run.path)
+            self._runs.append(_Run(path, self.bloom))
+            self.stats['merges'] += 1
+
+    def close(self) -> None:
+        """Delete the spill directory."""
+        self._runs = []
+        self._memory.clear()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __enter__(self) -> "ExternalDigestSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
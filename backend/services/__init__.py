@@ -2,19 +2,43 @@
 Services module - Business logic and analysis services
 """
 from .anomaly_detector import AnomalyDetector
-from .duplicate_detector import DuplicateDetector
-from .hub_detector import HubDetector
-from .demand_forecasting import DemandForecaster
-from .migration_pressure_index import MigrationPressureIndex
-from .differential_privacy import DifferentialPrivacy
-from .mobility_framework import MobilityFramework
+from .duplicate_detector import detect_duplicates_in_rows, similarity_score
+from .blocking import candidate_pairs, sorted_neighbourhood_pairs
+from .match_features import FeatureStore, MatchKeys, get_feature_store, match_keys, soundex
+from .entity_clusters import EntityClusters, cluster_pairs
+from .lsh_index import MinHashLSHIndex, get_lsh_index
+from .hub_detector import analyze_hub_activity
+from .network_graph import detect_fraud_networks
+from .multi_factor import multi_factor_verification_score
+from .biometric_aging import biometric_aging_assessment
+from .demand_forecasting import adjust_forecast_by_district, forecast_demand
+from .migration_pressure_index import calculate_mpi, classify_pressure, rank_districts_by_mpi
+from .differential_privacy import compute_noisy_aggregate, estimate_privacy_loss
 
 __all__ = [
     "AnomalyDetector",
-    "DuplicateDetector", 
-    "HubDetector",
-    "DemandForecaster",
-    "MigrationPressureIndex",
-    "DifferentialPrivacy",
-    "MobilityFramework",
+    "detect_duplicates_in_rows",
+    "similarity_score",
+    "candidate_pairs",
+    "sorted_neighbourhood_pairs",
+    "soundex",
+    "MatchKeys",
+    "match_keys",
+    "FeatureStore",
+    "get_feature_store",
+    "EntityClusters",
+    "cluster_pairs",
+    "MinHashLSHIndex",
+    "get_lsh_index",
+    "analyze_hub_activity",
+    "detect_fraud_networks",
+    "multi_factor_verification_score",
+    "biometric_aging_assessment",
+    "adjust_forecast_by_district",
+    "forecast_demand",
+    "calculate_mpi",
+    "classify_pressure",
+    "rank_districts_by_mpi",
+    "compute_noisy_aggregate",
+    "estimate_privacy_loss",
 ]
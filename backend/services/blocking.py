@@ -0,0 +1,152 @@
+"""
+Candidate generation (blocking) for ADIF duplicate detection.
+Records are grouped by cheap keys (Aadhaar, pincode, district + date, name
+prefix, phonetic code) and only pairs sharing a block are scored, instead of
+all n*(n-1)/2 pairs. Sorted-neighbourhood compares each record with its
+`window` nearest neighbours under each of a few composite sort keys.
+Keys are read from each record's MatchKeys (services.match_features); callers
+holding precomputed features pass them as `features`, aligned with `rows`.
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .match_features import MatchKeys, match_keys
+
+DEFAULT_BLOCKING_KEYS = ("aadhaar", "pincode", "district_date", "phonetic")
+DEFAULT_WINDOW = 20
+# Blocks above this size are windowed instead of compared all-pairs
+MAX_BLOCK_SIZE = 500
+
+
+def _key_aadhaar(mk: MatchKeys) -> Optional[str]:
+    return mk.aadhaar or None
+
+
+def _key_pincode(mk: MatchKeys) -> Optional[str]:
+    return mk.pincode or None
+
+
+def _key_district_date(mk: MatchKeys) -> Optional[str]:
+    date = mk.dob.strip()
+    if not mk.district or not date:
+        return None
+    return f"{mk.state}|{mk.district}|{date}"
+
+
+def _key_name_prefix(mk: MatchKeys) -> Optional[str]:
+    return mk.name.replace(" ", "")[:4] or None
+
+
+def _key_phonetic(mk: MatchKeys) -> Optional[str]:
+    return mk.phonetic if mk.name else None
+
+
+BLOCKING_KEYS: Dict[str, Callable[[MatchKeys], Optional[str]]] = {
+    "aadhaar": _key_aadhaar,
+    "pincode": _key_pincode,
+    "district_date": _key_district_date,
+    "name_prefix": _key_name_prefix,
+    "phonetic": _key_phonetic,
+}
+
+
+def sort_key(mk: MatchKeys) -> Tuple[str, str, str, str]:
+    """Composite sort key for sorted-neighbourhood: name, dob, district, pincode."""
+    return (mk.name, mk.dob.strip(), mk.district, mk.pincode)
+
+
+# Multi-pass sorted-neighbourhood: a typo in the leading field of one key
+# still leaves the pair adjacent under another
+SORT_PASSES: Tuple[Callable[[MatchKeys], tuple], ...] = (
+    sort_key,
+    lambda mk: (mk.dob.strip(), mk.name),
+    lambda mk: (mk.pincode, mk.dob.strip(), mk.name),
+)
+
+
+def _features(
+    rows: Sequence[Dict[str, str]], features: Optional[Sequence[MatchKeys]]
+) -> Sequence[MatchKeys]:
+    return features if features is not None else [match_keys(r) for r in rows]
+
+
+def build_blocks(
+    rows: Sequence[Dict[str, str]],
+    keys: Iterable[str] = DEFAULT_BLOCKING_KEYS,
+    features: Optional[Sequence[MatchKeys]] = None,
+) -> Dict[Tuple[str, str], List[int]]:
+    """Map (key name, key value) -> row indices; singleton blocks are dropped."""
+    keys = list(keys)
+    unknown = [k for k in keys if k not in BLOCKING_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown blocking keys: {unknown}")
+    blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    funcs = [(k, BLOCKING_KEYS[k]) for k in keys]
+    for idx, mk in enumerate(_features(rows, features)):
+        for name, func in funcs:
+            value = func(mk)
+            if value is not None:
+                blocks[(name, value)].append(idx)
+    return {k: v for k, v in blocks.items() if len(v) > 1}
+
+
+def _window_pairs(
+    indices: Sequence[int],
+    features: Sequence[MatchKeys],
+    window: int,
+    out: Dict[int, Set[int]],
+) -> None:
+    for key in SORT_PASSES:
+        ordered = sorted(indices, key=lambda i: key(features[i]))
+        for pos, i in enumerate(ordered):
+            for j in ordered[pos + 1 : pos + window]:
+                a, b = (i, j) if i < j else (j, i)
+                out[a].add(b)
+
+
+def sorted_neighbourhood_pairs(
+    rows: Sequence[Dict[str, str]],
+    window: int = DEFAULT_WINDOW,
+    features: Optional[Sequence[MatchKeys]] = None,
+) -> Dict[int, Set[int]]:
+    """Candidates i -> {j > i}: records within `window` of each other in a sort pass."""
+    out: Dict[int, Set[int]] = defaultdict(set)
+    _window_pairs(range(len(rows)), _features(rows, features), window, out)
+    return out
+
+
+def candidate_pairs(
+    rows: Sequence[Dict[str, str]],
+    keys: Iterable[str] = DEFAULT_BLOCKING_KEYS,
+    window: int = DEFAULT_WINDOW,
+    max_block_size: int = MAX_BLOCK_SIZE,
+    stats: Optional[Dict[str, int]] = None,
+    features: Optional[Sequence[MatchKeys]] = None,
+) -> Dict[int, Set[int]]:
+    """
+    Union of within-block pairs over all keys, as i -> {j > i}.
+    Blocks larger than max_block_size fall back to sorted-neighbourhood inside
+    the block so one hot key (a busy pincode) cannot reintroduce O(n^2).
+    """
+    out: Dict[int, Set[int]] = defaultdict(set)
+    features = _features(rows, features)
+    blocks = build_blocks(rows, keys, features)
+    windowed = 0
+    for members in blocks.values():
+        if len(members) > max_block_size:
+            windowed += 1
+            _window_pairs(members, features, window, out)
+            continue
+        for pos, i in enumerate(members):
+            # members are ascending, so every later index is j > i
+            out[i].update(members[pos + 1 :])
+    if stats is not None:
+        stats.update(
+            {
+                "blocks": len(blocks),
+                "blocks_windowed": windowed,
+                "largest_block": max((len(m) for m in blocks.values()), default=0),
+            }
+        )
+    return out
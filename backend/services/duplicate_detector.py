@@ -1,12 +1,41 @@
 """
 Near-duplicate detection utilities for ADIF.
 Uses RapidFuzz for string similarity and computes a composite similarity
-score between two records.
+score between two records. The batch path normalizes each record once and
+scores many pairs at a time with rapidfuzz.process.cdist/cpdist on all cores,
+producing the same scores as similarity_score.
 """
 
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from .blocking import (
+    DEFAULT_BLOCKING_KEYS,
+    DEFAULT_WINDOW,
+    MAX_BLOCK_SIZE,
+    candidate_pairs,
+    sorted_neighbourhood_pairs,
+)
+from .match_features import MatchKeys, match_keys
+
+BLOCKING_MODES = ("keys", "window", "none")
+SCORERS = ("batch", "scalar")
+
+# Weighted sum (tuned for Aadhaar-like enrollees)
+WEIGHTS = {
+    "name": 0.5,
+    "dob": 0.2,
+    "state": 0.08,
+    "district": 0.12,
+    "pincode": 0.1,
+}
+
+# Score cells per batch (pairs for cpdist, matrix cells for cdist)
+BATCH_CELLS = 1_000_000
+# Fields with at most this many distinct values are scored once per value pair
+LOOKUP_MAX_DISTINCT = 1024
 
 
 def _normalize_str(s: str) -> str:
@@ -53,39 +82,306 @@ def similarity_score(a: Dict[str, str], b: Dict[str, str]) -> float:
     pincode_b = (b.get("pincode") or "").strip()
     pincode_score = 1.0 if pincode_a and pincode_b and pincode_a == pincode_b else 0.0
 
-    # Weighted sum (tuned for Aadhaar-like enrollees)
-    weights = {
-        "name": 0.5,
-        "dob": 0.2,
-        "state": 0.08,
-        "district": 0.12,
-        "pincode": 0.1,
-    }
-
     score = (
-        name_score * weights["name"]
-        + dob_score * weights["dob"]
-        + state_score * weights["state"]
-        + district_score * weights["district"]
-        + pincode_score * weights["pincode"]
+        name_score * WEIGHTS["name"]
+        + dob_score * WEIGHTS["dob"]
+        + state_score * WEIGHTS["state"]
+        + district_score * WEIGHTS["district"]
+        + pincode_score * WEIGHTS["pincode"]
     )
 
     # Clip to [0,1]
     return max(0.0, min(1.0, score))
 
 
+class TextField:
+    """
+    One normalized string field across records: distinct values plus a code
+    per record. Low-cardinality fields (state, district) get a full cdist
+    table of their distinct values, so pair scores become array lookups.
+    """
+
+    __slots__ = ("values", "codes", "table", "workers")
+
+    def __init__(self, strings: Sequence[str], workers: int = -1):
+        index: Dict[str, int] = {}
+        self.codes = np.fromiter(
+            (index.setdefault(v, len(index)) for v in strings),
+            dtype=np.int64,
+            count=len(strings),
+        )
+        self.values = np.empty(len(index), dtype=object)
+        self.values[:] = list(index)
+        self.workers = workers
+        self.table = None
+        if len(index) <= LOOKUP_MAX_DISTINCT:
+            self.table = process.cdist(
+                self.values,
+                self.values,
+                scorer=fuzz.token_sort_ratio,
+                dtype=np.float64,
+                workers=workers,
+            )
+
+    def ratio_pairs(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        a, b = self.codes[i], self.codes[j]
+        if self.table is not None:
+            return self.table[a, b]
+        return process.cpdist(
+            self.values[a],
+            self.values[b],
+            scorer=fuzz.token_sort_ratio,
+            dtype=np.float64,
+            workers=self.workers,
+        )
+
+    def ratio_matrix(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        a, b = self.codes[i], self.codes[j]
+        if self.table is not None:
+            return self.table[a[:, None], b[None, :]]
+        return process.cdist(
+            self.values[a],
+            self.values[b],
+            scorer=fuzz.token_sort_ratio,
+            dtype=np.float64,
+            workers=self.workers,
+        )
+
+
+class RecordFeatures:
+    """
+    Per-record normalized fields for batch scoring, taken from each row's
+    MatchKeys (computed here unless `keys` are passed in).
+    Exact-match fields are encoded as integer codes (-1 = missing) so
+    equality is a vectorized comparison.
+    """
+
+    __slots__ = ("name", "state", "district", "dob", "pincode", "aadhaar")
+
+    def __init__(
+        self,
+        rows: Sequence[Dict[str, str]],
+        workers: int = -1,
+        keys: Optional[Sequence[MatchKeys]] = None,
+    ):
+        if keys is None:
+            keys = [match_keys(r) for r in rows]
+        self.name = TextField([k.name for k in keys], workers)
+        self.state = TextField([k.state for k in keys], workers)
+        self.district = TextField([k.district for k in keys], workers)
+        self.dob = _codes(k.dob for k in keys)
+        self.pincode = _codes(k.pincode for k in keys)
+        self.aadhaar = _codes(k.aadhaar for k in keys)
+
+    def __len__(self) -> int:
+        return len(self.dob)
+
+
+def _codes(values) -> np.ndarray:
+    """Dense integer code per distinct non-empty value, -1 for empty."""
+    table: Dict[str, int] = {}
+    return np.fromiter(
+        (table.setdefault(v, len(table)) if v else -1 for v in values), dtype=np.int64
+    )
+
+
+def _equal(codes: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    a, b = codes[i], codes[j]
+    return (a >= 0) & (a == b)
+
+
+def _combine(name, state, district, dob_eq, pin_eq, aadhaar_eq) -> np.ndarray:
+    """Weighted sum in the same order as similarity_score, so floats match."""
+    score = (
+        (name / 100.0) * WEIGHTS["name"]
+        + dob_eq.astype(np.float64) * WEIGHTS["dob"]
+        + (state / 100.0) * WEIGHTS["state"]
+        + (district / 100.0) * WEIGHTS["district"]
+        + pin_eq.astype(np.float64) * WEIGHTS["pincode"]
+    )
+    score = np.clip(score, 0.0, 1.0)
+    score[aadhaar_eq] = 1.0
+    return score
+
+
+def score_pairs(features: RecordFeatures, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Scores of the aligned pairs (i[k], j[k]) (rapidfuzz cpdist)."""
+    return _combine(
+        features.name.ratio_pairs(i, j),
+        features.state.ratio_pairs(i, j),
+        features.district.ratio_pairs(i, j),
+        _equal(features.dob, i, j),
+        _equal(features.pincode, i, j),
+        _equal(features.aadhaar, i, j),
+    )
+
+
+def score_matrix(
+    features: RecordFeatures, rows_a: np.ndarray, rows_b: np.ndarray
+) -> np.ndarray:
+    """len(rows_a) x len(rows_b) score matrix (rapidfuzz cdist)."""
+    ii = rows_a[:, None]
+    jj = rows_b[None, :]
+    return _combine(
+        features.name.ratio_matrix(rows_a, rows_b),
+        features.state.ratio_matrix(rows_a, rows_b),
+        features.district.ratio_matrix(rows_a, rows_b),
+        _equal(features.dob, ii, jj),
+        _equal(features.pincode, ii, jj),
+        _equal(features.aadhaar, ii, jj),
+    )
+
+
 def detect_duplicates_in_rows(
-    rows: List[Dict[str, str]], threshold: float = 0.85
+    rows: List[Dict[str, str]],
+    threshold: float = 0.85,
+    deadline: Optional[Any] = None,
+    progress: Optional[Dict[str, Any]] = None,
+    blocking: str = "keys",
+    keys: Sequence[str] = DEFAULT_BLOCKING_KEYS,
+    window: int = DEFAULT_WINDOW,
+    max_block_size: int = MAX_BLOCK_SIZE,
+    scorer: str = "batch",
+    workers: int = -1,
+    features: Optional[Sequence[MatchKeys]] = None,
 ) -> List[Tuple[int, int, float]]:
-    """Brute-force O(n^2) detection for rows; returns list of (i, j, score)
+    """Detect near-duplicate pairs in rows; returns list of (i, j, score)
+
+    `blocking` selects the candidate pairs that are scored:
+    - "keys": pairs sharing any blocking key (see services.blocking)
+    - "window": sorted-neighbourhood with `window` neighbours
+    - "none": exhaustive over all pairs (small inputs only)
 
-    For MVP this is acceptable; callers should limit the number of rows to scan.
+    `scorer="batch"` scores chunks of rows with rapidfuzz cdist/cpdist on
+    `workers` threads (-1 = all cores); "scalar" calls similarity_score per
+    pair. Both give identical scores.
+
+    `features` are the rows' MatchKeys (e.g. from the FeatureStore), aligned
+    with `rows`; without them they are derived once here for blocking and
+    batch scoring.
+
+    With a deadline (any object with an `expired` flag) the scan stops between
+    chunks of rows and returns the pairs found so far; `progress`, if given, is
+    filled with complete/rows_done/pairs_compared/pairs_total and blocking figures.
     """
+    if blocking not in BLOCKING_MODES:
+        raise ValueError(f"blocking must be one of {BLOCKING_MODES}")
+    if scorer not in SCORERS:
+        raise ValueError(f"scorer must be one of {SCORERS}")
+    n = len(rows)
+    if features is None and (blocking != "none" or scorer == "batch"):
+        features = [match_keys(r) for r in rows]
+    block_stats: Dict[str, Any] = {}
+    if blocking == "keys":
+        candidates = candidate_pairs(
+            rows, keys, window, max_block_size, stats=block_stats, features=features
+        )
+    elif blocking == "window":
+        candidates = sorted_neighbourhood_pairs(rows, window, features=features)
+    else:
+        candidates = None
+    pairs_total = (
+        n * (n - 1) // 2
+        if candidates is None
+        else sum(len(js) for js in candidates.values())
+    )
+
+    if scorer == "batch":
+        results, done, compared = _detect_batch(
+            rows, candidates, threshold, deadline, workers, features
+        )
+    else:
+        results, done, compared = _detect_scalar(rows, candidates, threshold, deadline)
+
+    if progress is not None:
+        progress.update(
+            {
+                "complete": done == n,
+                "rows_done": done,
+                "rows_total": n,
+                "pairs_compared": compared,
+                "pairs_total": pairs_total,
+                "blocking": blocking,
+                "scorer": scorer,
+                **block_stats,
+            }
+        )
+    return results
+
+
+def _detect_scalar(rows, candidates, threshold, deadline):
     results = []
     n = len(rows)
+    compared = 0
     for i in range(n):
-        for j in range(i + 1, n):
+        if deadline is not None and deadline.expired:
+            return results, i, compared
+        if candidates is None:
+            partners = range(i + 1, n)
+        else:
+            partners = sorted(candidates.get(i, ()))
+        for j in partners:
             s = similarity_score(rows[i], rows[j])
             if s >= threshold:
                 results.append((i, j, s))
-    return results
+            compared += 1
+    return results, n, compared
+
+
+def _detect_batch(rows, candidates, threshold, deadline, workers, keys):
+    n = len(rows)
+    if n < 2:
+        return [], n, 0
+    features = RecordFeatures(rows, workers, keys)
+    if candidates is None:
+        return _batch_exhaustive(features, n, threshold, deadline)
+    return _batch_blocked(features, n, candidates, threshold, deadline)
+
+
+def _batch_exhaustive(features, n, threshold, deadline):
+    # Score row chunks against the rows after them, keep j > i
+    results = []
+    compared = 0
+    start = 0
+    chunk = max(1, BATCH_CELLS // n)
+    while start < n:
+        if deadline is not None and deadline.expired:
+            return results, start, compared
+        stop = min(n, start + chunk)
+        rows_a = np.arange(start, stop)
+        rows_b = np.arange(start + 1, n)
+        if len(rows_b):
+            scores = score_matrix(features, rows_a, rows_b)
+            mask = (scores >= threshold) & (rows_b[None, :] > rows_a[:, None])
+            for a, b in zip(*np.nonzero(mask)):
+                results.append((int(rows_a[a]), int(rows_b[b]), float(scores[a, b])))
+            compared += int((rows_b[None, :] > rows_a[:, None]).sum())
+        start = stop
+    return results, n, compared
+
+
+def _batch_blocked(features, n, candidates, threshold, deadline):
+    # Gather candidate pairs for a run of rows, score them with cpdist
+    results = []
+    compared = 0
+    start = 0
+    while start < n:
+        if deadline is not None and deadline.expired:
+            return results, start, compared
+        pairs_i: List[int] = []
+        pairs_j: List[int] = []
+        stop = start
+        while stop < n and len(pairs_i) < BATCH_CELLS:
+            partners = sorted(candidates.get(stop, ()))
+            pairs_i.extend([stop] * len(partners))
+            pairs_j.extend(partners)
+            stop += 1
+        if pairs_i:
+            i_idx = np.asarray(pairs_i, dtype=np.int64)
+            j_idx = np.asarray(pairs_j, dtype=np.int64)
+            scores = score_pairs(features, i_idx, j_idx)
+            for k in np.nonzero(scores >= threshold)[0]:
+                results.append((int(i_idx[k]), int(j_idx[k]), float(scores[k])))
+            compared += len(pairs_i)
+        start = stop
+    return results, n, compared
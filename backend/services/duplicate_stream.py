@@ -0,0 +1,260 @@
+"""
+Streaming full-dataset duplicate detection for ADIF.
+Pass 1 spills every row to one of `partitions` temporary files, chosen by a
+hash of state + district, so all candidates of a district share a file.
+Pass 2 loads one partition at a time, runs detect_duplicates_in_rows per
+district and yields matching pairs. Memory is bounded by the largest
+partition, not the dataset. A checkpoint after every partition lets a client
+resume an interrupted stream without rescoring finished partitions.
+
+Limitation: only records of the same state + district are ever compared, so
+cross-district duplicates (including exact Aadhaar matches) are not found by
+this stream.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+from .duplicate_detector import _normalize_str, detect_duplicates_in_rows
+from .entity_clusters import EntityClusters
+from .match_features import MatchKeys
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITIONS = 64
+PROGRESS_EVERY_ROWS = 100_000
+# Rows spilled between checks of the cancellation deadline
+CANCEL_CHECK_ROWS = 2000
+
+SAMPLE_FIELDS = ("aadhaar", "name", "date", "state", "district")
+
+
+class CheckpointError(ValueError):
+    """Checkpoint cannot be resumed."""
+
+
+class MalformedCheckpointError(CheckpointError):
+    """Checkpoint is not one this stream could have produced."""
+
+
+class StaleCheckpointError(CheckpointError):
+    """Checkpoint was taken on another dataset generation."""
+
+
+def make_checkpoint(generation: str, partition: int) -> str:
+    return f"{generation}.{partition}"
+
+
+def parse_checkpoint(checkpoint: str, generation: str, partitions: int) -> int:
+    """Index of the next partition to process."""
+    gen, _, part = checkpoint.rpartition(".")
+    if not gen or not part.isdigit():
+        raise MalformedCheckpointError(f"Malformed checkpoint: {checkpoint!r}")
+    if gen != generation:
+        raise StaleCheckpointError("Checkpoint was taken on another dataset generation")
+    index = int(part)
+    if index > partitions:
+        raise MalformedCheckpointError(f"Checkpoint partition {index} out of range")
+    return index
+
+
+def _partition_of(row: Dict[str, Any], partitions: int) -> int:
+    key = f"{_normalize_str(row.get('state'))}|{_normalize_str(row.get('district'))}"
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+def _sample(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: row.get(k) for k in SAMPLE_FIELDS}
+
+
+def _spill(
+    rows: Iterable[Dict[str, Any]],
+    spill_dir: str,
+    partitions: int,
+    start_partition: int,
+    deadline: Optional[Any],
+) -> Generator[Dict[str, Any], None, Optional[int]]:
+    """
+    Pass 1: write rows of partitions >= start_partition to one file each,
+    yielding progress events. Returns the number of rows read, or None when
+    the deadline expired.
+    """
+    files = {}
+    rows_total = 0
+    try:
+        for row in rows:
+            part = _partition_of(row, partitions)
+            if part >= start_partition:
+                fh = files.get(part)
+                if fh is None:
+                    fh = files[part] = open(
+                        os.path.join(spill_dir, f"{part}.ndjson"),
+                        "w",
+                        encoding="utf-8",
+                    )
+                fh.write(json.dumps([rows_total, row]) + "\n")
+            rows_total += 1
+            if (
+                deadline is not None
+                and rows_total % CANCEL_CHECK_ROWS == 0
+                and deadline.expired
+            ):
+                return None
+            if rows_total % PROGRESS_EVERY_ROWS == 0:
+                yield {
+                    "type": "progress",
+                    "phase": "partitioning",
+                    "rows_read": rows_total,
+                }
+    finally:
+        for fh in files.values():
+            fh.close()
+    return rows_total
+
+
+def _read_partition(path: str) -> Dict[Any, List[Any]]:
+    """(state, district) -> [(ordinal, row)] of one spilled partition."""
+    districts = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            ordinal, row = json.loads(line)
+            key = (
+                _normalize_str(row.get("state")),
+                _normalize_str(row.get("district")),
+            )
+            districts[key].append((ordinal, row))
+    return districts
+
+
+def _district_events(
+    members: List[Any],
+    pairs: List[Any],
+    clusters: bool,
+    totals: Dict[str, int],
+) -> Iterator[Dict[str, Any]]:
+    """Pair events of one scored district, then its clusters if requested."""
+    rows = [row for _, row in members]
+    entities = EntityClusters() if clusters else None
+    for i, j, score in pairs:
+        totals["pairs_found"] += 1
+        if entities is not None:
+            entities.add_pair(members[i][0], members[j][0], score)
+        yield {
+            "type": "pair",
+            "i": members[i][0],
+            "j": members[j][0],
+            "score": score,
+            "i_sample": _sample(rows[i]),
+            "j_sample": _sample(rows[j]),
+        }
+    if entities is not None:
+        for cluster in entities.clusters():
+            totals["clusters_found"] += 1
+            yield {"type": "cluster", **cluster}
+
+
+def stream_duplicates(
+    rows_factory: Callable[[], Iterable[Dict[str, Any]]],
+    generation: str,
+    threshold: float = 0.85,
+    blocking: str = "keys",
+    window: int = 20,
+    partitions: int = DEFAULT_PARTITIONS,
+    resume: Optional[str] = None,
+    workdir: Optional[str] = None,
+    clusters: bool = False,
+    features: Optional[Callable[[List[Dict[str, Any]]], Sequence[MatchKeys]]] = None,
+    deadline: Optional[Any] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {"type": "pair" | "cluster" | "progress" | "done", ...} events.
+    With `clusters`, each district's pairs are also merged into entity
+    clusters, emitted once the district is finished. `features`, if given,
+    maps a district's rows to their MatchKeys (e.g. FeatureStore.features).
+
+    `deadline` (any object with an `expired` flag, e.g. a cancellation token)
+    is polled while spilling and passed into detect_duplicates_in_rows; once
+    it expires the stream ends without further events, so the last checkpoint
+    seen is still the place to resume.
+
+    Only rows of the same state + district are compared; the `done` event
+    says so with `"scope": "district"`.
+
+    Row numbers (`i`, `j`) are ordinals in scan order, stable within one
+    dataset generation. Progress events carry a `checkpoint`; passing it back
+    as `resume` skips every partition finished before it.
+    """
+    start_partition = parse_checkpoint(resume, generation, partitions) if resume else 0
+    started = time.perf_counter()
+    spill_dir = tempfile.mkdtemp(prefix="dupstream-", dir=workdir)
+    try:
+        rows_total = yield from _spill(
+            rows_factory(), spill_dir, partitions, start_partition, deadline
+        )
+        if rows_total is None:
+            return
+
+        # Pass 2: score one partition at a time
+        totals = {"pairs_found": 0, "clusters_found": 0, "pairs_compared": 0}
+        rows_done = 0
+        for part in range(start_partition, partitions):
+            path = os.path.join(spill_dir, f"{part}.ndjson")
+            districts = _read_partition(path) if os.path.exists(path) else {}
+            if districts:
+                os.unlink(path)
+            for key in sorted(districts):
+                members = districts.pop(key)
+                rows = [row for _, row in members]
+                progress: Dict[str, Any] = {}
+                pairs = detect_duplicates_in_rows(
+                    rows,
+                    threshold=threshold,
+                    blocking=blocking,
+                    window=window,
+                    deadline=deadline,
+                    progress=progress,
+                    features=features(rows) if features is not None else None,
+                )
+                if deadline is not None and deadline.expired:
+                    return
+                totals["pairs_compared"] += progress.get("pairs_compared", 0)
+                rows_done += len(rows)
+                yield from _district_events(members, pairs, clusters, totals)
+            yield {
+                "type": "progress",
+                "phase": "scoring",
+                "partitions_done": part + 1,
+                "partitions_total": partitions,
+                "rows_done": rows_done,
+                "rows_total": rows_total,
+                **totals,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "checkpoint": make_checkpoint(generation, part + 1),
+            }
+        yield {
+            "type": "done",
+            "scope": "district",
+            "rows_total": rows_total,
+            **totals,
+            "resumed_from": start_partition,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
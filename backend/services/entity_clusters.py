@@ -0,0 +1,136 @@
+"""
+Entity clustering of ADIF duplicate pairs.
+Pairs (i, j, score) are merged with a union-find (disjoint set) using path
+halving and union by size, so transitive duplicates collapse into one entity
+and each new pair costs near-constant amortized time. Per-cluster score
+statistics are kept on the root and combined on union.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class _ClusterStats:
+    __slots__ = (
+        "members",
+        "representative",
+        "pairs",
+        "score_sum",
+        "min_score",
+        "max_score",
+    )
+
+    def __init__(self, member: Hashable):
+        self.members: List[Hashable] = [member]
+        self.representative = member
+        self.pairs = 0
+        self.score_sum = 0.0
+        self.min_score = 1.0
+        self.max_score = 0.0
+
+
+class EntityClusters:
+    """
+    Incremental union-find over record ids (any hashable).
+    The representative of a cluster is its smallest member id, so it does
+    not depend on the order in which pairs arrived.
+    """
+
+    def __init__(
+        self, pairs: Optional[Iterable[Tuple[Hashable, Hashable, float]]] = None
+    ):
+        self._parent: Dict[Hashable, Hashable] = {}
+        self._stats: Dict[Hashable, _ClusterStats] = {}
+        if pairs is not None:
+            for i, j, score in pairs:
+                self.add_pair(i, j, score)
+
+    def _make(self, x: Hashable) -> None:
+        if x not in self._parent:
+            self._parent[x] = x
+            self._stats[x] = _ClusterStats(x)
+
+    def find(self, x: Hashable) -> Hashable:
+        """Root of x's cluster (path halving)."""
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def add_pair(self, i: Hashable, j: Hashable, score: float) -> Hashable:
+        """Merge the clusters of i and j; returns the resulting root."""
+        self._make(i)
+        self._make(j)
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            si, sj = self._stats[ri], self._stats[rj]
+            # Union by size: the smaller member list is appended to the larger
+            if len(si.members) < len(sj.members):
+                ri, rj, si, sj = rj, ri, sj, si
+            self._parent[rj] = ri
+            si.members.extend(sj.members)
+            si.pairs += sj.pairs
+            si.score_sum += sj.score_sum
+            si.min_score = min(si.min_score, sj.min_score)
+            si.max_score = max(si.max_score, sj.max_score)
+            if _before(sj.representative, si.representative):
+                si.representative = sj.representative
+            del self._stats[rj]
+        stats = self._stats[ri]
+        stats.pairs += 1
+        stats.score_sum += score
+        stats.min_score = min(stats.min_score, score)
+        stats.max_score = max(stats.max_score, score)
+        return ri
+
+    def same_entity(self, i: Hashable, j: Hashable) -> bool:
+        if i not in self._parent or j not in self._parent:
+            return i == j
+        return self.find(i) == self.find(j)
+
+    def cluster_of(self, x: Hashable) -> Optional[Dict[str, Any]]:
+        if x not in self._parent:
+            return None
+        return self._describe(self._stats[self.find(x)])
+
+    @staticmethod
+    def _describe(stats: _ClusterStats) -> Dict[str, Any]:
+        return {
+            "representative": stats.representative,
+            "members": sorted(stats.members, key=_sort_key),
+            "size": len(stats.members),
+            "pairs": stats.pairs,
+            "min_score": stats.min_score,
+            "avg_score": stats.score_sum / stats.pairs if stats.pairs else 0.0,
+            "max_score": stats.max_score,
+        }
+
+    def clusters(self, min_size: int = 2) -> List[Dict[str, Any]]:
+        """All clusters with at least min_size members, largest first."""
+        out = [
+            self._describe(stats)
+            for stats in self._stats.values()
+            if len(stats.members) >= min_size
+        ]
+        out.sort(key=lambda c: (-c["size"], _sort_key(c["representative"])))
+        return out
+
+    def __len__(self) -> int:
+        """Number of clusters."""
+        return len(self._stats)
+
+
+def _sort_key(x: Hashable) -> Tuple[str, Any]:
+    # Mixed id types (ints from row ordinals, strings from refs) still sort
+    return (type(x).__name__, x)
+
+
+def _before(a: Hashable, b: Hashable) -> bool:
+    return _sort_key(a) < _sort_key(b)
+
+
+def cluster_pairs(
+    pairs: Iterable[Tuple[Hashable, Hashable, float]], min_size: int = 2
+) -> List[Dict[str, Any]]:
+    """Entity clusters of a batch of (i, j, score) pairs."""
+    return EntityClusters(pairs).clusters(min_size)
@@ -5,20 +5,28 @@ from single centers, devices, or IP addresses.
 """
 
 from collections import defaultdict
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 
 def analyze_hub_activity(
-    records: List[Dict[str, str]], time_window_hours: int = 24
+    records: List[Dict[str, str]],
+    time_window_hours: int = 24,
+    deadline: Optional[Any] = None,
+    progress: Optional[Dict[str, Any]] = None,
 ) -> List[Dict]:
     """Analyze enrollment/update activity by hub (center, device, IP).
 
-    Returns list of suspicious hubs with anomaly scores.
+    Returns list of suspicious hubs with anomaly scores. With a deadline,
+    only the records counted before it expired (checked every 1000) are scored.
     """
     hub_counts = defaultdict(int)
     hub_activity = defaultdict(list)
+    done = len(records)
 
-    for record in records:
+    for n, record in enumerate(records):
+        if deadline is not None and n % 1000 == 0 and deadline.expired:
+            done = n
+            break
         center_id = (record.get("center_id") or "unknown").strip()
         device_id = (record.get("device_id") or "unknown").strip()
         ip_address = (record.get("ip_address") or "unknown").strip()
@@ -32,6 +40,13 @@ def analyze_hub_activity(
             hub_counts[hub_key] += 1
             hub_activity[hub_key].append(record.get("timestamp") or "")
 
+    if progress is not None:
+        progress.update({
+            "complete": done == len(records),
+            "records_done": done,
+            "records_total": len(records),
+        })
+
     # Identify anomalies: hubs with activity > 3 standard deviations above mean
     counts_list = list(hub_counts.values())
     if not counts_list:
@@ -0,0 +1,547 @@
+"""
+Persistent MinHash-LSH index for incremental ADIF duplicate lookup.
+Each record is reduced to a MinHash signature over name character 3-grams and
+address tokens; the signature is cut into bands and every band is hashed to a
+bucket key. A lookup only rescores records that share at least one bucket with
+the probe, so it costs a few binary searches instead of a scan.
+
+Layout on disk (one directory per index):
+- snapshot.npz: band keys (sorted per band), ids of added records, and a JSON
+  blob with the record fields and build generation (no pickled objects)
+- additions.jsonl: fields and band keys of records added since the snapshot,
+  replayed on load
+
+Added records are carried over when the index is rebuilt for a new dataset
+generation, so arrivals recorded through add() are never lost. The directory
+holds enrollment fields, so it must be private to the current user.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from core.csv_db import DATASET_DIR
+from core.shared_cache import ensure_private_dir
+
+from .duplicate_detector import _normalize_str, similarity_score
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SEED = 1
+
+# Buckets larger than this (e.g. everyone in one pincode) carry no signal
+MAX_BUCKET_SIZE = 5000
+# Unsorted additions merged into the sorted band arrays beyond this many records
+COMPACT_THRESHOLD = 50_000
+# Records hashed per NumPy batch while building
+BUILD_BATCH = 2000
+# Additions logged before they are folded into a new snapshot and the log restarts
+MAX_LOG_RECORDS = 10_000
+SNAPSHOT_VERSION = 2
+
+DEFAULT_INDEX_DIR = os.path.join(DATASET_DIR, ".lsh-index")
+
+FIELDS = ("ref", "name", "dob", "state", "district", "pincode", "aadhaar")
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX32 = np.uint64(0xFFFFFFFF)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_rng = np.random.RandomState(SEED)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def record_fields(rec: Dict[str, Any], ref: str) -> Tuple[str, ...]:
+    """The subset of a record kept in the index for rescoring and display."""
+    return (
+        ref,
+        rec.get("name") or rec.get("full_name") or "",
+        rec.get("date_of_birth") or rec.get("dob") or rec.get("date") or "",
+        rec.get("state") or "",
+        rec.get("district") or "",
+        str(rec.get("pincode") or ""),
+        rec.get("aadhaar") or "",
+    )
+
+
+def shingles(rec: Dict[str, Any]) -> List[int]:
+    """32-bit hashes of name 3-grams and address tokens."""
+    out = set()
+    name = _normalize_str(rec.get("name") or rec.get("full_name") or "")
+    if name:
+        padded = f" {name} "
+        out.update("n:" + padded[k : k + 3] for k in range(len(padded) - 2))
+    address = rec.get("address") or " ".join(
+        str(rec.get(k) or "") for k in ("district", "state", "pincode")
+    )
+    out.update("a:" + token for token in _normalize_str(address).split())
+    return [zlib.crc32(s.encode("utf-8")) for s in out]
+
+
+def signatures(shingle_sets: Sequence[List[int]]) -> np.ndarray:
+    """MinHash signatures (len(shingle_sets) x NUM_PERM, uint32) in one pass."""
+    n = len(shingle_sets)
+    sig = np.full((n, NUM_PERM), 0xFFFFFFFF, dtype=np.uint64)
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=n)
+    nonempty = np.nonzero(lengths)[0]
+    if len(nonempty):
+        flat = np.fromiter(
+            (h for s in shingle_sets for h in s),
+            dtype=np.uint64,
+            count=int(lengths.sum()),
+        )
+        hashed = (
+            (flat[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) % _MERSENNE
+        ) & _MAX32
+        offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+        sig[nonempty] = np.minimum.reduceat(hashed, offsets, axis=0)
+    return sig.astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> np.ndarray:
+    """32-bit bucket key per band (N x BANDS) via FNV-1a over the band's rows."""
+    rows = sig.astype(np.uint64).reshape(len(sig), BANDS, ROWS_PER_BAND)
+    h = np.broadcast_to(
+        np.arange(BANDS, dtype=np.uint64) + np.uint64(0xCBF29CE484222325),
+        (len(sig), BANDS),
+    ).copy()
+    for r in range(ROWS_PER_BAND):
+        h = (h ^ rows[:, :, r]) * _FNV_PRIME
+    return ((h ^ (h >> np.uint64(32))) & _MAX32).astype(np.uint32)
+
+
+def _sorted_bands(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-band sorted keys (BANDS x N) and the record ids they belong to."""
+    order = np.argsort(keys, axis=0, kind="stable")
+    return np.take_along_axis(keys, order, axis=0).T.copy(), order.T.astype(np.uint32)
+
+
+def _log_entry(fields: Tuple[str, ...], keys: np.ndarray) -> str:
+    return json.dumps({"fields": fields, "keys": keys.tolist()}) + "\n"
+
+
+class MinHashLSHIndex:
+    """
+    Banded MinHash index with sorted per-band key arrays and an unsorted
+    tail for incremental additions. Thread-safe; persisted under `directory`,
+    which must be private to the current user (snapshots are skipped and
+    additions refused otherwise).
+
+    Loads and rebuilds run outside the index lock and are swapped in under
+    it, so lookups keep using the previous index while a new one is built.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.generation: Optional[str] = None
+        self._lock = threading.RLock()
+        # Serializes refresh(); held for a whole load or build
+        self._build_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        # Set once a snapshot was loaded or built (possibly of an empty dataset)
+        self._ready = False
+        self._records: List[Tuple[str, ...]] = []
+        # Per band: sorted keys and the record ids they belong to
+        self._keys = np.empty((BANDS, 0), dtype=np.uint32)
+        self._ids = np.empty((BANDS, 0), dtype=np.uint32)
+        # Additions not yet merged: band -> key -> [ids]
+        self._tail: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._tail_count = 0
+        # Ids of records added through add(), kept across rebuilds
+        self._added: List[int] = []
+        self._logged = 0
+        self._stats = {
+            "lookups": 0,
+            "added": 0,
+            "candidates": 0,
+            "skipped_buckets": 0,
+        }
+
+    # ---------- building and persistence ----------
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "snapshot.npz")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, "additions.jsonl")
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _private_dir(self) -> bool:
+        try:
+            ensure_private_dir(self.directory)
+        except OSError as e:
+            logger.warning(f"LSH snapshot disabled, unusable directory: {e}")
+            return False
+        return True
+
+    def build(
+        self, records: Iterable[Dict[str, Any]], generation: Optional[str]
+    ) -> None:
+        """
+        Replace the index with `records` (refs are their ordinal "row:<n>"),
+        then re-add the records previously added through add(). Hashing and
+        sorting happen outside the index lock; use refresh() so that only one
+        build runs at a time.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            since = len(self._added)
+            carried = self._additions()
+        fields: List[Tuple[str, ...]] = []
+        key_batches = []
+        batch: List[Dict[str, Any]] = []
+
+        def flush():
+            key_batches.append(band_keys(signatures([shingles(r) for r in batch])))
+            batch.clear()
+
+        for rec in records:
+            fields.append(record_fields(rec, f"row:{len(fields)}"))
+            batch.append(rec)
+            if len(batch) >= BUILD_BATCH:
+                flush()
+        if batch:
+            flush()
+        added = list(range(len(fields), len(fields) + len(carried)))
+        fields.extend(f for f, _ in carried)
+        key_batches.extend(k[None, :] for _, k in carried)
+        if key_batches:
+            keys = np.concatenate(key_batches)
+        else:
+            keys = np.empty((0, BANDS), np.uint32)
+        sorted_keys, ids = _sorted_bands(keys)
+        tmp_path = self._write_snapshot(generation, fields, sorted_keys, ids, added)
+
+        with self._lock:
+            # Records added while this build ran go on top of it
+            late = self._additions(since)
+            self._records = fields
+            self._keys = sorted_keys
+            self._ids = ids
+            self._tail = [{} for _ in range(BANDS)]
+            self._tail_count = 0
+            self._added = added
+            self.generation = generation
+            self._ready = True
+            for added_fields, added_keys in late:
+                self._insert_keys(added_fields, added_keys)
+            if tmp_path is not None:
+                self._install_snapshot(tmp_path, late)
+        logger.info(
+            f"LSH index built: {len(fields)} records "
+            f"(+{len(carried) + len(late)} added) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _additions(self, since: int = 0) -> List[Tuple[Tuple[str, ...], np.ndarray]]:
+        """Fields and band keys of the records added through add() from `since`."""
+        rids = self._added[since:]
+        if not rids:
+            return []
+        keys = self._all_keys()
+        return [(self._records[rid], keys[rid]) for rid in rids]
+
+    def _all_keys(self) -> np.ndarray:
+        """Band keys per record (N x BANDS) reconstructed from sorted + tail."""
+        keys = np.zeros((len(self._records), BANDS), dtype=np.uint32)
+        for b in range(BANDS):
+            keys[self._ids[b], b] = self._keys[b]
+            for key, ids in self._tail[b].items():
+                keys[ids, b] = key
+        return keys
+
+    def compact(self) -> None:
+        """Merge incremental additions into the sorted band arrays."""
+        with self._lock:
+            if self._tail_count:
+                self._keys, self._ids = _sorted_bands(self._all_keys())
+                self._tail = [{} for _ in range(BANDS)]
+                self._tail_count = 0
+
+    def save(self) -> None:
+        """Compact and write a snapshot; the additions log is then truncated."""
+        with self._lock:
+            self.compact()
+            tmp_path = self._write_snapshot(
+                self.generation, self._records, self._keys, self._ids, self._added
+            )
+            if tmp_path is not None:
+                self._install_snapshot(tmp_path, [])
+
+    def _write_snapshot(
+        self,
+        generation: Optional[str],
+        records: List[Tuple[str, ...]],
+        keys: np.ndarray,
+        ids: np.ndarray,
+        added: List[int],
+    ) -> Optional[str]:
+        """Write a snapshot to a temporary file; None if the directory is unusable."""
+        if not self._private_dir():
+            return None
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+            "seed": SEED,
+            "generation": generation,
+            "records": records,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    meta=np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8),
+                    keys=keys,
+                    ids=ids,
+                    added=np.asarray(added, dtype=np.uint32),
+                )
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    def _install_snapshot(
+        self,
+        tmp_path: str,
+        pending: List[Tuple[Tuple[str, ...], np.ndarray]],
+    ) -> None:
+        """Move a written snapshot in place; the log restarts with `pending`."""
+        os.replace(tmp_path, self._snapshot_path)
+        with open(self._log_path, "w", encoding="utf-8") as fh:
+            fh.writelines(_log_entry(fields, keys) for fields, keys in pending)
+        self._logged = len(pending)
+
+    def load(self) -> bool:
+        """Load the snapshot and replay the additions log; False if unusable."""
+        if not self._private_dir():
+            return False
+        try:
+            with np.load(self._snapshot_path, allow_pickle=False) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                keys, ids, added = data["keys"], data["ids"], data["added"]
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"LSH snapshot unreadable, rebuilding: {e}")
+            return False
+        params = tuple(meta.get(k) for k in ("version", "num_perm", "bands", "seed"))
+        if params != (SNAPSHOT_VERSION, NUM_PERM, BANDS, SEED):
+            return False
+        records = [tuple(r) for r in meta["records"]]
+        with self._lock:
+            self._records = records
+            self._keys = keys
+            self._ids = ids
+            self._tail = [{} for _ in range(BANDS)]
+            self._tail_count = 0
+            self._added = added.tolist()
+            self.generation = meta["generation"]
+            self._ready = True
+            replayed = 0
+            try:
+                with open(self._log_path, "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._insert_keys(
+                                tuple(entry["fields"]),
+                                np.asarray(entry["keys"], dtype=np.uint32),
+                            )
+                            replayed += 1
+            except FileNotFoundError:
+                pass
+            self._logged = replayed
+        logger.info(f"LSH index loaded: {len(records)} records ({replayed} replayed)")
+        return True
+
+    def is_current(self, generation: Optional[str]) -> bool:
+        """Whether the index was loaded or built for `generation`."""
+        return self._ready and self.generation == generation
+
+    def refresh(
+        self,
+        generation: Optional[str],
+        records_factory: Callable[[], Iterable[Dict[str, Any]]],
+    ) -> None:
+        """Load from disk, rebuilding when missing or built for another generation.
+
+        Blocks until the index is current; lookups meanwhile use the old one.
+        """
+        with self._build_lock:
+            if self.is_current(generation):
+                return
+            if self.load() and self.generation == generation:
+                return
+            self.build(records_factory(), generation)
+
+    def ensure(
+        self,
+        generation: Optional[str],
+        records_factory: Callable[[], Iterable[Dict[str, Any]]],
+    ) -> None:
+        """
+        Make the index follow `generation` without blocking lookups: the first
+        call loads or builds it inline, later ones leave a stale index serving
+        while a background thread refreshes it.
+        """
+        if self.is_current(generation):
+            return
+        if not self._ready:
+            self.refresh(generation, records_factory)
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_in_background,
+                args=(generation, records_factory),
+                name="lsh-index-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    def _refresh_in_background(
+        self,
+        generation: Optional[str],
+        records_factory: Callable[[], Iterable[Dict[str, Any]]],
+    ) -> None:
+        try:
+            self.refresh(generation, records_factory)
+        except Exception as e:
+            logger.warning(f"LSH index refresh failed: {type(e).__name__}: {e}")
+
+    # ---------- incremental updates and lookup ----------
+
+    def _insert_keys(self, fields: Tuple[str, ...], keys: np.ndarray) -> int:
+        rid = len(self._records)
+        self._records.append(fields)
+        for b in range(BANDS):
+            self._tail[b].setdefault(int(keys[b]), []).append(rid)
+        self._tail_count += 1
+        self._added.append(rid)
+        if self._tail_count >= COMPACT_THRESHOLD:
+            self.compact()
+        return rid
+
+    def add(self, rec: Dict[str, Any], ref: Optional[str] = None) -> str:
+        """
+        Index a newly arrived record. Only its record_fields and band keys are
+        logged (so it survives restarts); every MAX_LOG_RECORDS additions the
+        log is folded into a new snapshot. Raises PermissionError when the
+        index directory is not private to the current user.
+        """
+        keys = band_keys(signatures([shingles(rec)]))[0]
+        with self._lock:
+            ensure_private_dir(self.directory)
+            ref = ref or f"new:{len(self._records)}"
+            fields = record_fields(rec, ref)
+            with open(self._log_path, "a", encoding="utf-8") as fh:
+                fh.write(_log_entry(fields, keys))
+            self._insert_keys(fields, keys)
+            self._logged += 1
+            self._stats["added"] += 1
+            if self._logged >= MAX_LOG_RECORDS:
+                self.save()
+        return ref
+
+    def _candidates(self, keys: np.ndarray) -> Counter:
+        # Caller holds the lock
+        found: Counter = Counter()
+        for b in range(BANDS):
+            key = keys[b]
+            lo = np.searchsorted(self._keys[b], key, side="left")
+            hi = np.searchsorted(self._keys[b], key, side="right")
+            tail = self._tail[b].get(int(key), ())
+            if hi - lo + len(tail) > MAX_BUCKET_SIZE:
+                self._stats["skipped_buckets"] += 1
+                continue
+            found.update(self._ids[b][lo:hi].tolist())
+            found.update(tail)
+        return found
+
+    def candidates(self, rec: Dict[str, Any]) -> Counter:
+        """Record ids sharing a bucket with rec -> number of bands matched."""
+        keys = band_keys(signatures([shingles(rec)]))[0]
+        with self._lock:
+            return self._candidates(keys)
+
+    def lookup(
+        self,
+        rec: Dict[str, Any],
+        top_k: int = 10,
+        threshold: float = 0.7,
+        max_candidates: int = 2000,
+    ) -> Dict[str, Any]:
+        """Likely duplicates of rec, rescored with similarity_score."""
+        started = time.perf_counter()
+        keys = band_keys(signatures([shingles(rec)]))[0]
+        # Candidates and their fields come from the same index state, so a
+        # rebuild swapped in between cannot shift the record ids
+        with self._lock:
+            found = self._candidates(keys)
+            # Most band collisions first when the candidate set must be cut
+            ranked = [rid for rid, _ in found.most_common(max_candidates)]
+            stored = [self._records[rid] for rid in ranked]
+            self._stats["lookups"] += 1
+            self._stats["candidates"] += len(ranked)
+        matches = []
+        for rid, fields in zip(ranked, stored):
+            other = dict(zip(FIELDS, fields))
+            other["date_of_birth"] = other.pop("dob")
+            score = similarity_score(rec, other)
+            if score >= threshold:
+                other["score"] = score
+                other["bands_matched"] = found[rid]
+                matches.append(other)
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return {
+            "matches": matches[:top_k],
+            "candidates": len(found),
+            "rescored": len(ranked),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "records": len(self._records),
+            "unmerged": self._tail_count,
+            "added_records": len(self._added),
+            "logged": self._logged,
+            "generation": self.generation,
+            "refreshing": self._build_lock.locked(),
+            "directory": self.directory,
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+        }
+
+
+# Global instance
+_index: Optional[MinHashLSHIndex] = None
+
+
+def get_lsh_index() -> MinHashLSHIndex:
+    """
+    Get or create the global duplicate-lookup index. It is stored next to the
+    dataset (DATASET_DIR/.lsh-index) unless LSH_INDEX_DIR is set.
+    """
+    global _index
+    if _index is None:
+        _index = MinHashLSHIndex(os.getenv("LSH_INDEX_DIR", DEFAULT_INDEX_DIR))
+    return _index
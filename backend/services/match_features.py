@@ -0,0 +1,317 @@
+"""
+Per-record match keys for ADIF duplicate detection.
+Blocking, batch scoring and lookups need the same normalized fields of a
+record (name, date, state, district, pincode, Aadhaar, phonetic code).
+match_keys derives them in one pass; FeatureStore keeps them for the whole
+dataset keyed by a fingerprint of the identity fields, and persists them next
+to the dataset, per generation, so they are computed once rather than on every
+request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from core.csv_db import DATASET_DIR
+from core.shared_cache import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join(DATASET_DIR, ".match-features")
+SNAPSHOT_VERSION = 2
+
+# Raw fields the match keys are derived from; the fingerprint covers exactly these
+SOURCE_FIELDS = (
+    "name",
+    "full_name",
+    "date_of_birth",
+    "dob",
+    "date",
+    "state",
+    "district",
+    "pincode",
+    "aadhaar",
+)
+FINGERPRINT_SIZE = 8
+# Records computed on demand (not in the snapshot) kept in memory at most
+MAX_EXTRA_RECORDS = 200_000
+
+_FIELD_SEP = "\x1f"
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(word: str) -> str:
+    """American Soundex code of a single word ('' when it has no letters)."""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    last = _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def _norm(value: Any) -> str:
+    if not value:
+        return ""
+    return " ".join(str(value).strip().lower().split())
+
+
+class MatchKeys(NamedTuple):
+    """Normalized match fields of one record."""
+
+    name: str  # name or full_name, lowercased, whitespace collapsed
+    dob: str  # date_of_birth / dob / date as given (compared exactly)
+    state: str
+    district: str
+    pincode: str
+    aadhaar: str
+    phonetic: str  # soundex of the first and last name tokens
+
+
+def match_keys(rec: Dict[str, Any]) -> MatchKeys:
+    """Derive the match keys of a record."""
+    name = _norm(rec.get("name") or rec.get("full_name"))
+    tokens = name.split()
+    return MatchKeys(
+        name,
+        rec.get("date_of_birth") or rec.get("dob") or rec.get("date") or "",
+        _norm(rec.get("state")),
+        _norm(rec.get("district")),
+        str(rec.get("pincode") or "").strip(),
+        str(rec.get("aadhaar") or "").strip(),
+        # First and last token so middle names/initials do not split blocks
+        soundex(tokens[0]) + soundex(tokens[-1]) if tokens else "",
+    )
+
+
+def record_fingerprint(rec: Dict[str, Any]) -> bytes:
+    """
+    8-byte blake2b of the SOURCE_FIELDS values joined by \\x1f (the same
+    digest as models.adif_normalizer.fingerprint(values, "blake2b")).
+    """
+    values = [rec.get(f) or "" for f in SOURCE_FIELDS]
+    try:
+        payload = _FIELD_SEP.join(values)
+    except TypeError:
+        payload = _FIELD_SEP.join(map(str, values))
+    return hashlib.blake2b(
+        payload.encode("utf-8"), digest_size=FINGERPRINT_SIZE
+    ).digest()
+
+
+class FeatureStore:
+    """
+    Match keys by record fingerprint; records with equal identity fields share
+    one entry, so entries never go stale. Built from the dataset once per
+    generation and saved to <directory>/features.npz (fingerprint bytes plus a
+    JSON blob; nothing is unpickled on load). The directory must be private to
+    the current user; otherwise the store works from memory only. Records
+    outside the snapshot (samples of a newer dataset, probes) are computed on
+    first use and kept in memory up to max_extra.
+
+    Builds and loads run outside the store lock, which is only taken to swap
+    in a finished snapshot or merge a batch of new keys, so lookups never wait
+    for a rebuild.
+    """
+
+    def __init__(self, directory: str, max_extra: int = MAX_EXTRA_RECORDS):
+        self.directory = directory
+        self.max_extra = max_extra
+        self.generation: Optional[str] = None
+        self._lock = threading.Lock()
+        # Serializes ensure() so one rebuild runs at a time
+        self._build_lock = threading.Lock()
+        self._keys: Dict[bytes, MatchKeys] = {}
+        self._extra = 0
+        self._stats = {"hits": 0, "misses": 0}
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "features.npz")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _private_dir(self) -> bool:
+        try:
+            ensure_private_dir(self.directory)
+        except OSError as e:
+            logger.warning(f"Match feature snapshot disabled, unusable directory: {e}")
+            return False
+        return True
+
+    def _swap(self, keys: Dict[bytes, MatchKeys], generation: Optional[str]) -> None:
+        with self._lock:
+            self._keys = keys
+            self._extra = 0
+            self.generation = generation
+
+    def build(
+        self, records: Iterable[Dict[str, Any]], generation: Optional[str]
+    ) -> None:
+        """Replace the store with the match keys of `records` and save it."""
+        started = time.perf_counter()
+        keys: Dict[bytes, MatchKeys] = {}
+        # Share repeated strings (states, districts, dates) between entries
+        strings: Dict[str, str] = {}
+        rows = 0
+        for rec in records:
+            rows += 1
+            fp = record_fingerprint(rec)
+            if fp not in keys:
+                keys[fp] = MatchKeys._make(
+                    strings.setdefault(v, v) for v in match_keys(rec)
+                )
+        self._swap(keys, generation)
+        self._save(keys, generation)
+        logger.info(
+            f"Match features built: {len(keys)} distinct of {rows} records "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _save(self, keys: Dict[bytes, MatchKeys], generation: Optional[str]) -> None:
+        if not self._private_dir():
+            return
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "fingerprint_size": FINGERPRINT_SIZE,
+            "generation": generation,
+            "keys": list(keys.values()),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    meta=np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8),
+                    fingerprints=np.frombuffer(b"".join(keys), dtype=np.uint8),
+                )
+            os.replace(tmp_path, self._snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def load(self) -> bool:
+        """Load the saved snapshot; False if absent or incompatible."""
+        if not self._private_dir():
+            return False
+        try:
+            with np.load(self._snapshot_path, allow_pickle=False) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                fps = data["fingerprints"].tobytes()
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Match feature snapshot unreadable, rebuilding: {e}")
+            return False
+        version = (meta.get("version"), meta.get("fingerprint_size"))
+        if version != (SNAPSHOT_VERSION, FINGERPRINT_SIZE):
+            return False
+        size = FINGERPRINT_SIZE
+        if len(fps) != size * len(meta["keys"]):
+            logger.warning("Match feature snapshot inconsistent, rebuilding")
+            return False
+        keys = dict(
+            zip(
+                (fps[i : i + size] for i in range(0, len(fps), size)),
+                map(MatchKeys._make, meta["keys"]),
+            )
+        )
+        self._swap(keys, meta["generation"])
+        logger.info(f"Match features loaded: {len(keys)} records")
+        return True
+
+    def ensure(
+        self,
+        generation: Optional[str],
+        records_factory: Callable[[], Iterable[Dict[str, Any]]],
+    ) -> None:
+        """Load from disk, rebuilding when missing or built for another generation.
+
+        Lookups keep using the previous keys until the new ones are swapped in.
+        """
+        with self._build_lock:
+            if self.generation == generation and self._keys:
+                return
+            if self.load() and self.generation == generation:
+                return
+            self.build(records_factory(), generation)
+
+    def features(
+        self, rows: Iterable[Dict[str, Any]], timeout: Optional[float] = None
+    ) -> List[MatchKeys]:
+        """Match keys of each row, from the store where present.
+
+        Keys missing from the store are computed inline. Keeping them (and
+        counting hits) waits at most `timeout` seconds for the store lock and
+        is skipped when it cannot be had in time.
+        """
+        keys = self._keys
+        out: List[MatchKeys] = []
+        new: Dict[bytes, MatchKeys] = {}
+        for rec in rows:
+            fp = record_fingerprint(rec)
+            mk = keys.get(fp)
+            if mk is None:
+                mk = new.get(fp)
+                if mk is None:
+                    mk = new[fp] = match_keys(rec)
+            out.append(mk)
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            return out
+        try:
+            self._stats["hits"] += len(out) - len(new)
+            self._stats["misses"] += len(new)
+            if keys is self._keys and self._extra + len(new) <= self.max_extra:
+                self._keys.update(new)
+                self._extra += len(new)
+        finally:
+            self._lock.release()
+        return out
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "records": len(self._keys),
+            "extra": self._extra,
+            "generation": self.generation,
+            "directory": self.directory,
+        }
+
+
+# Global instance
+_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """
+    Get or create the global match feature store. Its snapshot lives next to
+    the dataset (DATASET_DIR/.match-features) unless FEATURE_STORE_DIR is set.
+    """
+    global _store
+    if _store is None:
+        _store = FeatureStore(os.getenv("FEATURE_STORE_DIR", DEFAULT_STORE_DIR))
+    return _store
@@ -5,7 +5,7 @@ devices, and IPs to detect coordinated fraud networks.
 """
 
 from collections import defaultdict
-from typing import Dict, List, Set
+from typing import Any, Dict, List, Optional, Set
 
 
 class NetworkGraph:
@@ -24,15 +24,25 @@ class NetworkGraph:
         self.edges[node_a].add(node_b)
         self.edges[node_b].add(node_a)
 
-    def find_cliques(self, min_size: int = 3) -> List[Set[str]]:
+    def find_cliques(
+        self,
+        min_size: int = 3,
+        deadline: Optional[Any] = None,
+        progress: Optional[Dict[str, Any]] = None,
+    ) -> List[Set[str]]:
         """Find cliques (tightly connected groups) in graph.
 
-        Simple O(n^3) approach; sufficient for moderate-size graphs.
+        Simple O(n^3) approach; sufficient for moderate-size graphs. Stops
+        between nodes once `deadline.expired`, recording nodes_done in progress.
         """
         cliques = []
         nodes = list(self.edges.keys())
+        done = len(nodes)
 
         for i, node_a in enumerate(nodes):
+            if deadline is not None and deadline.expired:
+                done = i
+                break
             for node_b in nodes[i + 1 :]:
                 if node_b not in self.edges[node_a]:
                     continue
@@ -43,6 +53,8 @@ class NetworkGraph:
                     if clique not in cliques and len(clique) >= min_size:
                         cliques.append(clique)
 
+        if progress is not None:
+            progress.update({"nodes_done": done, "nodes_total": len(nodes)})
         return cliques
 
 
@@ -81,25 +93,51 @@ def _add_record_edges(
         graph.add_edge(f"device:{device_id}", f"ip:{ip}")
 
 
-def build_network_from_records(records: List[Dict[str, str]]) -> NetworkGraph:
+def build_network_from_records(
+    records: List[Dict[str, str]],
+    deadline: Optional[Any] = None,
+    progress: Optional[Dict[str, Any]] = None,
+) -> NetworkGraph:
     """Build a network graph from enrollment records.
 
     Nodes: identities, centers, devices, IPs
     Edges: connections (identity enrolled at center via device from IP)
+    Stops adding records (checked every 1000) once `deadline.expired`.
     """
     graph = NetworkGraph()
+    done = len(records)
 
-    for record in records:
+    for n, record in enumerate(records):
+        if deadline is not None and n % 1000 == 0 and deadline.expired:
+            done = n
+            break
         aadhaar, center_id, device_id, ip_address = _add_record_nodes(graph, record)
         _add_record_edges(graph, aadhaar, center_id, device_id, ip_address)
 
+    if progress is not None:
+        progress.update({"records_done": done, "records_total": len(records)})
     return graph
 
 
-def detect_fraud_networks(records: List[Dict[str, str]]) -> List[Dict]:
-    """Detect coordinated fraud networks in enrollment records."""
-    graph = build_network_from_records(records)
-    cliques = graph.find_cliques(min_size=3)
+def detect_fraud_networks(
+    records: List[Dict[str, str]],
+    deadline: Optional[Any] = None,
+    progress: Optional[Dict[str, Any]] = None,
+) -> List[Dict]:
+    """Detect coordinated fraud networks in enrollment records.
+
+    With a deadline, returns the networks found before it expired; `progress`
+    then reports complete plus nodes_done/nodes_total of the clique search.
+    """
+    stats: Dict[str, Any] = {}
+    graph = build_network_from_records(records, deadline=deadline, progress=stats)
+    cliques = graph.find_cliques(min_size=3, deadline=deadline, progress=stats)
+    if progress is not None:
+        progress.update(stats)
+        progress["complete"] = (
+            stats["records_done"] == stats["records_total"]
+            and stats["nodes_done"] == stats["nodes_total"]
+        )
 
     networks = []
     for clique in cliques:
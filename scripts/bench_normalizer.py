@@ -0,0 +1,151 @@
+"""
+Benchmark normalize_row against the compiled per-file normalizer.
+
+Usage:
+  python scripts/bench_normalizer.py data/api_data_aadhar_enrolment/*.csv
+  python scripts/bench_normalizer.py --synthetic 500000
+
+Both paths read the same file (csv.DictReader + normalize_row versus
+csv.reader + compile_normalizer batches); the script checks that they write
+byte-identical CSV before reporting throughput.
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.models.adif_normalizer import (
+    iter_normalized_csv,
+    normalize_row,
+)  # noqa: E402
+
+SYNTHETIC_HEADER = [
+    "Date",
+    "State",
+    "District",
+    "Pincode",
+    "age_0_5",
+    "age_5_17",
+    "age_18_greater",
+]
+
+
+def write_synthetic(path, rows, seed=7):
+    rnd = random.Random(seed)
+    states = ["Uttar Pradesh", "up", "Bihar", " gujarat ", "Kerala", "Tamil Nadu"]
+    districts = ["Lucknow", "Patna", "Surat", "Kochi", "Madurai", "Kanpur"]
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(SYNTHETIC_HEADER)
+        for _ in range(rows):
+            day = rnd.randint(1, 28)
+            month = rnd.randint(1, 12)
+            writer.writerow(
+                [
+                    f"{day:02d}-{month:02d}-2025",
+                    rnd.choice(states),
+                    rnd.choice(districts),
+                    f"{rnd.randint(110000, 855999)}",
+                    str(rnd.randint(0, 400)),
+                    f" {rnd.randint(0, 200)}",
+                    str(rnd.randint(0, 50)) if rnd.random() > 0.01 else "",
+                ]
+            )
+
+
+def run_baseline(path, out):
+    rows = 0
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as fh:
+        writer = None
+        for r in csv.DictReader(fh):
+            r = normalize_row(r)
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(r))
+                writer.writeheader()
+            writer.writerow(r)
+            rows += 1
+    return rows
+
+
+def run_compiled(path, out, batch_size):
+    rows = 0
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as fh:
+        writer = None
+        for batch in iter_normalized_csv(fh, batch_size):
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(batch[0]))
+                writer.writeheader()
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
+
+
+def timed(repeat, fn, path, *extra):
+    best = None
+    result = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        start = time.perf_counter()
+        rows = fn(path, out, *extra)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+        result = (rows, out.getvalue())
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ADIF normalizer")
+    parser.add_argument("files", nargs="*", help="CSV files to normalize")
+    parser.add_argument(
+        "--synthetic", type=int, default=0, help="Generate a CSV with this many rows"
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per path; the best is reported"
+    )
+    args = parser.parse_args()
+
+    files = list(args.files)
+    tmp_path = None
+    if args.synthetic:
+        fd, tmp_path = tempfile.mkstemp(suffix=".csv", prefix="bench-normalizer-")
+        os.close(fd)
+        write_synthetic(tmp_path, args.synthetic)
+        files.append(tmp_path)
+    if not files:
+        parser.error("pass CSV files or --synthetic N")
+
+    failed = False
+    try:
+        for path in files:
+            base_s, (base_rows, base_out) = timed(args.repeat, run_baseline, path)
+            comp_s, (comp_rows, comp_out) = timed(
+                args.repeat, run_compiled, path, args.batch_size
+            )
+            identical = base_out.encode("utf-8") == comp_out.encode("utf-8")
+            failed = failed or not identical
+            print(f"{os.path.basename(path)}: {base_rows} rows")
+            print(
+                f"  normalize_row : {base_s:8.3f}s  {base_rows / base_s:12,.0f} rows/s"
+            )
+            print(
+                f"  compiled      : {comp_s:8.3f}s  {comp_rows / comp_s:12,.0f} rows/s"
+                f"  ({base_s / comp_s:.2f}x)"
+            )
+            print(f"  output        : {'identical' if identical else 'DIFFERENT'}")
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
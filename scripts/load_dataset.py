@@ -30,6 +30,7 @@ except Exception:
 
 import csv
 import hashlib
+import io
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -46,78 +47,274 @@ def compute_md5(path, chunk_size=8192):
     return h.hexdigest()
 
 
+FIELD_MAP = {
+    "enrollment": [
+        "date",
+        "state",
+        "district",
+        "pincode",
+        "age_0_5",
+        "age_5_17",
+        "age_18_greater",
+    ],
+    "demographic": [
+        "date",
+        "state",
+        "district",
+        "pincode",
+        "demo_age_5_17",
+        "demo_age_17_plus",
+    ],
+    "biometric": [
+        "date",
+        "state",
+        "district",
+        "pincode",
+        "bio_age_5_17",
+        "bio_age_17_plus",
+    ],
+}
+
+# Byte size of the ranges input files are split into for the preprocessing workers
+PREPROCESS_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def _text_reader(data):
+    # Same decoding and newline handling as open(path, encoding="utf-8", errors="replace")
+    return csv.reader(
+        io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace")
+    )
+
+
+def _file_chunks(path, chunk_bytes):
+    """Header of a CSV file and newline-aligned (start, end) byte ranges of its rows.
+
+    Rows must not contain quoted newlines (true for the aggregated UIDAI exports).
+    """
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    header = next(_text_reader(header_line), [])
+    return header, ranges
+
+
+def _as_row(header, values):
+    """The dict csv.DictReader would build for `values`."""
+    row = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header) :]
+    else:
+        for key in header[len(values) :]:
+            row[key] = None
+    return row
+
+
+def _preprocess_chunk(task):
+    """Worker: normalize one byte range into <work_dir>/<index>.csv.
+
+    With dedup, also writes <index>.npy: (digest, row) pairs ordered by
+    digest shard (the top `shard_bits` bits), and returns where each shard's
+    slice starts.
+    """
+    import numpy as np
+
+    from backend.models.adif_normalizer import compile_normalizer, dedup_digest
+
+    (
+        index,
+        path,
+        start,
+        end,
+        header,
+        fields,
+        normalize,
+        dedup_mode,
+        keys,
+        fingerprint,
+        shard_bits,
+        work_dir,
+    ) = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    normalizer = compile_normalizer(header) if normalize else None
+    dedup = dedup_mode and dedup_mode != "none"
+    digests = []
+    rows = 0
+    with open(
+        os.path.join(work_dir, f"{index}.csv"), "w", encoding="utf-8", newline=""
+    ) as out:
+        writer = csv.writer(out)
+        for values in _text_reader(data):
+            if not values:
+                continue
+            r = normalizer(values) if normalizer else _as_row(header, values)
+            if dedup:
+                digests.append(dedup_digest(r, dedup_mode, keys, fingerprint))
+            writer.writerow([r.get(k, "") for k in fields])
+            rows += 1
+
+    offsets = None
+    if dedup:
+        d = np.array(digests, dtype=np.uint64)
+        shard = (
+            d >> np.uint64(64 - shard_bits)
+            if shard_bits
+            else np.zeros(len(d), np.uint64)
+        )
+        order = np.argsort(shard, kind="stable")
+        pairs = np.stack([d[order], order.astype(np.uint64)], axis=1)
+        np.save(os.path.join(work_dir, f"{index}.npy"), pairs)
+        offsets = np.searchsorted(
+            shard[order], np.arange((1 << shard_bits) + 1)
+        ).tolist()
+    return index, rows, offsets
+
+
+def _dedup_shard(task):
+    """Worker: (chunk, row) of every repeated digest in one shard, in global order."""
+    import numpy as np
+
+    shard, parts, work_dir = task
+    digests, chunk_ids, row_ids = [], [], []
+    for index, lo, hi in parts:
+        pairs = np.load(os.path.join(work_dir, f"{index}.npy"), mmap_mode="r")
+        block = np.asarray(pairs[lo:hi])
+        digests.append(block[:, 0])
+        row_ids.append(block[:, 1])
+        chunk_ids.append(np.full(hi - lo, index, dtype=np.int64))
+    if not digests:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    d = np.concatenate(digests)
+    # Parts are in chunk order and rows within a part in file order, so the
+    # first index of each digest is its first occurrence in the input
+    _, first = np.unique(d, return_index=True)
+    drop = np.ones(len(d), dtype=bool)
+    drop[first] = False
+    return np.concatenate(chunk_ids)[drop], np.concatenate(row_ids)[drop].astype(
+        np.int64
+    )
+
+
 def preprocess_files_to_temp(
-    file_paths, kind, normalize=False, dedup_mode="none", dedup_keys=None
+    file_paths,
+    kind,
+    normalize=False,
+    dedup_mode="none",
+    dedup_keys=None,
+    workers=None,
+    chunk_bytes=PREPROCESS_CHUNK_BYTES,
+    fingerprint="md5",
 ):
     """Combine multiple CSV files, optionally normalize and deduplicate, and write a single temp CSV.
     Returns (temp_file_path, rows_written).
+
+    Files are split into newline-aligned byte ranges that a process pool
+    normalizes in parallel. Dedup is sharded by digest prefix: each worker
+    finds the repeated rows of one shard, and the first occurrence in input
+    order is kept (as with dedupe_iter's compact store). The chunks are then
+    concatenated in input order, so the output does not depend on `workers`.
+    `fingerprint` is the row digest algorithm (md5 or blake2b; hash64 is
+    salted per process and cannot be shared between workers).
     """
+    import shutil
     import tempfile
+    from concurrent.futures import ProcessPoolExecutor
 
-    try:
-        from backend.adif_normalizer import dedupe_iter, normalize_row
-    except Exception:
-        import sys
-        from pathlib import Path
-
-        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-        from backend.adif_normalizer import dedupe_iter, normalize_row
+    import numpy as np
 
+    if fingerprint not in ("md5", "blake2b"):
+        raise ValueError(f"Unsupported fingerprint for parallel dedup: {fingerprint}")
     keys = [k.strip() for k in (dedup_keys or "").split(",")] if dedup_keys else None
-    field_map = {
-        "enrollment": [
-            "date",
-            "state",
-            "district",
-            "pincode",
-            "age_0_5",
-            "age_5_17",
-            "age_18_greater",
-        ],
-        "demographic": [
-            "date",
-            "state",
-            "district",
-            "pincode",
-            "demo_age_5_17",
-            "demo_age_17_plus",
-        ],
-        "biometric": [
-            "date",
-            "state",
-            "district",
-            "pincode",
-            "bio_age_5_17",
-            "bio_age_17_plus",
-        ],
-    }
-    fields = field_map.get(kind)
-    tmp = tempfile.NamedTemporaryFile(
-        delete=False, mode="w", encoding="utf-8", newline=""
-    )
-    rows_written = 0
-    with tmp:
-        writer = csv.DictWriter(tmp, fieldnames=fields)
-        writer.writeheader()
-
-        def gen_all():
-            for p in file_paths:
-                with open(p, "r", encoding="utf-8", errors="replace") as f:
-                    reader = csv.DictReader(f)
-                    for r in reader:
-                        if normalize:
-                            r = normalize_row(r)
-                        yield r
+    fields = FIELD_MAP.get(kind)
+    dedup = dedup_mode and dedup_mode != "none"
+    workers = max(1, workers or os.cpu_count() or 1)
+    shard_bits = (workers - 1).bit_length() + 1 if workers > 1 else 0
+
+    work_dir = tempfile.mkdtemp(prefix="preprocess-")
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run = executor.map if executor else map
+    try:
+        tasks = []
+        for p in file_paths:
+            header, ranges = _file_chunks(p, chunk_bytes)
+            for start, end in ranges:
+                tasks.append(
+                    (
+                        len(tasks),
+                        p,
+                        start,
+                        end,
+                        header,
+                        fields,
+                        normalize,
+                        dedup_mode,
+                        keys,
+                        fingerprint,
+                        shard_bits,
+                        work_dir,
+                    )
+                )
+        print(
+            f"Preprocessing {len(file_paths)} files in {len(tasks)} chunks with {workers} workers..."
+        )
+        chunks = list(run(_preprocess_chunk, tasks))
+
+        drops = {}
+        if dedup:
+            shard_tasks = [
+                (
+                    shard,
+                    [
+                        (index, offsets[shard], offsets[shard + 1])
+                        for index, _, offsets in chunks
+                        if offsets[shard + 1] > offsets[shard]
+                    ],
+                    work_dir,
+                )
+                for shard in range(1 << shard_bits)
+            ]
+            results = list(run(_dedup_shard, shard_tasks))
+            chunk_ids = np.concatenate([c for c, _ in results])
+            row_ids = np.concatenate([r for _, r in results])
+            for index in np.unique(chunk_ids).tolist():
+                drops[index] = set(row_ids[chunk_ids == index].tolist())
+    finally:
+        if executor:
+            executor.shutdown()
 
-        rows_iter = (
-            dedupe_iter(gen_all(), mode=dedup_mode, composite_keys=keys)
-            if (dedup_mode and dedup_mode != "none")
-            else gen_all()
+    try:
+        tmp = tempfile.NamedTemporaryFile(
+            delete=False, mode="w", encoding="utf-8", newline=""
         )
-        for r in rows_iter:
-            out = {k: r.get(k, "") for k in fields}
-            writer.writerow(out)
-            rows_written += 1
+        rows_written = 0
+        with tmp:
+            writer = csv.writer(tmp)
+            writer.writerow(fields)
+            for index, rows, _ in chunks:
+                path = os.path.join(work_dir, f"{index}.csv")
+                dropped = drops.get(index)
+                if not dropped:
+                    tmp.flush()
+                    with open(path, "rb") as part:
+                        shutil.copyfileobj(part, tmp.buffer)
+                    rows_written += rows
+                    continue
+                with open(path, "r", encoding="utf-8", newline="") as part:
+                    for i, values in enumerate(csv.reader(part)):
+                        if i not in dropped:
+                            writer.writerow(values)
+                            rows_written += 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
 
     return tmp.name, rows_written
 
@@ -159,8 +356,7 @@ def copy_csv_to_temp(conn, csv_path, temp_table, columns):
 
 def upsert_enrollment(conn):
     with conn.cursor() as cur:
-        cur.execute(
-            """
+        cur.execute("""
             INSERT INTO enrollment_aggregated (date, state, district, pincode, age_0_5, age_5_17, age_18_greater)
             SELECT date, state, district, pincode, SUM(age_0_5), SUM(age_5_17), SUM(age_18_greater)
             FROM temp_enrollment
@@ -169,15 +365,13 @@ def upsert_enrollment(conn):
             SET age_0_5 = enrollment_aggregated.age_0_5 + EXCLUDED.age_0_5,
                 age_5_17 = enrollment_aggregated.age_5_17 + EXCLUDED.age_5_17,
                 age_18_greater = enrollment_aggregated.age_18_greater + EXCLUDED.age_18_greater
-            """
-        )
+            """)
     conn.commit()
 
 
 def upsert_demographic(conn):
     with conn.cursor() as cur:
-        cur.execute(
-            """
+        cur.execute("""
             INSERT INTO demographic_aggregated (date, state, district, pincode, demo_age_5_17, demo_age_17_plus)
             SELECT date, state, district, pincode, SUM(demo_age_5_17), SUM(demo_age_17_plus)
             FROM temp_demographic
@@ -185,15 +379,13 @@ def upsert_demographic(conn):
             ON CONFLICT (date, state, district, pincode) DO UPDATE
             SET demo_age_5_17 = demographic_aggregated.demo_age_5_17 + EXCLUDED.demo_age_5_17,
                 demo_age_17_plus = demographic_aggregated.demo_age_17_plus + EXCLUDED.demo_age_17_plus
-            """
-        )
+            """)
     conn.commit()
 
 
 def upsert_biometric(conn):
     with conn.cursor() as cur:
-        cur.execute(
-            """
+        cur.execute("""
             INSERT INTO biometric_aggregated (date, state, district, pincode, bio_age_5_17, bio_age_17_plus)
             SELECT date, state, district, pincode, SUM(bio_age_5_17), SUM(bio_age_17_plus)
             FROM temp_biometric
@@ -201,8 +393,7 @@ def upsert_biometric(conn):
             ON CONFLICT (date, state, district, pincode) DO UPDATE
             SET bio_age_5_17 = biometric_aggregated.bio_age_5_17 + EXCLUDED.bio_age_5_17,
                 bio_age_17_plus = biometric_aggregated.bio_age_17_plus + EXCLUDED.bio_age_17_plus
-            """
-        )
+            """)
     conn.commit()
 
 
@@ -218,6 +409,8 @@ def load_folder(
     normalize=False,
     dedup_mode="none",
     dedup_keys=None,
+    workers=None,
+    fingerprint="md5",
 ):
     files = sorted([f for f in os.listdir(folder_path) if f.lower().endswith(".csv")])
     if not files:
@@ -249,6 +442,8 @@ def load_folder(
             normalize=normalize,
             dedup_mode=dedup_mode,
             dedup_keys=dedup_keys,
+            workers=workers,
+            fingerprint=fingerprint,
         )
         try:
             print(
@@ -257,8 +452,7 @@ def load_folder(
             # Create temp template if needed (reuse existing per-kind templates)
             if kind == "enrollment":
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
+                    cur.execute("""
                         CREATE TEMP TABLE IF NOT EXISTS temp_enrollment_template (
                             date DATE,
                             state TEXT,
@@ -268,8 +462,7 @@ def load_folder(
                             age_5_17 INT,
                             age_18_greater INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                 cur = conn.cursor()
                 cur.execute(
@@ -283,8 +476,7 @@ def load_folder(
                 upsert_enrollment(conn)
             elif kind == "demographic":
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
+                    cur.execute("""
                         CREATE TEMP TABLE IF NOT EXISTS temp_demographic_template (
                             date DATE,
                             state TEXT,
@@ -293,8 +485,7 @@ def load_folder(
                             demo_age_5_17 INT,
                             demo_age_17_plus INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                 cur = conn.cursor()
                 cur.execute(
@@ -308,8 +499,7 @@ def load_folder(
                 upsert_demographic(conn)
             elif kind == "biometric":
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
+                    cur.execute("""
                         CREATE TEMP TABLE IF NOT EXISTS temp_biometric_template (
                             date DATE,
                             state TEXT,
@@ -318,8 +508,7 @@ def load_folder(
                             bio_age_5_17 INT,
                             bio_age_17_plus INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                 cur = conn.cursor()
                 cur.execute(
@@ -371,8 +560,7 @@ def load_folder(
                 # Create a temporary table template to use in copy
                 with conn.cursor() as cur, open(full, "r", encoding="utf-8") as f:
                     # Ensure temp template exists
-                    cur.execute(
-                        """
+                    cur.execute("""
                         CREATE TEMP TABLE IF NOT EXISTS temp_enrollment_template (
                             date DATE,
                             state TEXT,
@@ -382,8 +570,7 @@ def load_folder(
                             age_5_17 INT,
                             age_18_greater INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                     # Preprocess CSV (normalize/dedup) if requested
                 preprocessed = full
@@ -460,8 +647,7 @@ def load_folder(
                 upsert_enrollment(conn)
             elif kind == "demographic":
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
+                    cur.execute("""
                     cur.execute("CREATE TEMP TABLE IF NOT EXISTS temp_demographic_template (
                             date DATE,
                             state TEXT,
@@ -470,8 +656,7 @@ def load_folder(
                             demo_age_5_17 INT,
                             demo_age_17_plus INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                 # Preprocess for demographic
                 preprocessed = full
@@ -544,8 +729,7 @@ def load_folder(
                 upsert_demographic(conn)
             elif kind == "biometric":
                 with conn.cursor() as cur:
-                    cur.execute(
-                        """
+                    cur.execute("""
                         CREATE TEMP TABLE IF NOT EXISTS temp_biometric_template (
                             date DATE,
                             state TEXT,
@@ -554,8 +738,7 @@ def load_folder(
                             bio_age_5_17 INT,
                             bio_age_17_plus INT
                         ) ON COMMIT DROP
-                        """
-                    )
+                        """)
                     conn.commit()
                 # Preprocess for biometric
                 preprocessed = full
@@ -698,6 +881,22 @@ if __name__ == "__main__":
         default=None,
         help="Comma-separated keys for composite dedup (e.g., date,state)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for cross-file preprocessing (default: CPU count)",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        choices=["md5", "blake2b"],
+        default="md5",
+        help=(
+            "Row digest used for cross-file dedup. md5 (default) keeps the "
+            "historical dedup keys; blake2b (64-bit) is faster but yields "
+            "different digests"
+        ),
+    )
     args = parser.parse_args()
 
     # Dry-run mode: summarize CSV files locally without DB changes
@@ -1097,6 +1296,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
         elif "demo" in p.lower():
             total_loaded += load_folder(
@@ -1108,6 +1309,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
         elif "bio" in p.lower():
             total_loaded += load_folder(
@@ -1119,6 +1322,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
         else:
             # Try all folders
@@ -1133,6 +1338,8 @@ if __name__ == "__main__":
                     normalize=args.normalize,
                     dedup_mode=args.dedup,
                     dedup_keys=args.dedup_keys,
+                    workers=args.workers,
+                    fingerprint=args.fingerprint,
                 )
     else:
         # Enrollment
@@ -1146,6 +1353,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
 
         demo_folder = os.path.join(args.dir, "api_data_aadhar_demographic")
@@ -1162,6 +1371,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
 
         bio_folder = os.path.join(args.dir, "api_data_aadhar_biometric")
@@ -1174,6 +1385,8 @@ if __name__ == "__main__":
                 normalize=args.normalize,
                 dedup_mode=args.dedup,
                 dedup_keys=args.dedup_keys,
+                workers=args.workers,
+                fingerprint=args.fingerprint,
             )
 
     print(f"Total files loaded: {total_loaded}")